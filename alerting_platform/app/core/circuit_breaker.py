@@ -0,0 +1,121 @@
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from . import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one notification channel.
+    
+    Closed: calls go through; failure_threshold consecutive failed calls open the circuit.
+    Open: calls are refused (fail fast) for open_seconds. Half-open: one probe call is let
+    through - success closes the circuit, failure opens it for another open_seconds.
+    A failure_threshold of 0 disables the breaker.
+    """
+    
+    def __init__(self, channel: str, failure_threshold: int = None, open_seconds: float = None):
+        self.channel = channel
+        self.failure_threshold = failure_threshold if failure_threshold is not None else config.CIRCUIT_FAILURE_THRESHOLD
+        self.open_seconds = open_seconds if open_seconds is not None else config.CIRCUIT_OPEN_SECONDS
+        
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.changed_at: Optional[datetime] = None
+        
+        self.transitions = {OPEN: 0, HALF_OPEN: 0, CLOSED: 0}
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.fallbacks = 0
+    
+    def allow(self) -> bool:
+        """Whether a call may go out now; every allowed call must be followed by record_success, record_failure or record_cancelled"""
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            self.calls += 1
+            return True
+        
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN and not self._probing:
+            # One probe at a time; the other calls keep failing fast until it reports back
+            self._probing = True
+            self.calls += 1
+            return True
+        
+        self.rejected += 1
+        return False
+    
+    def record_success(self):
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self._probing = False
+            self._transition(CLOSED)
+    
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            self._probing = False
+            self._open()
+        elif self.state == CLOSED and 0 < self.failure_threshold <= self.consecutive_failures:
+            self._open()
+    
+    def record_cancelled(self):
+        """An allowed call was cancelled before it reported - no verdict, but a half-open circuit may probe again"""
+        self._probing = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "open_seconds": self.open_seconds,
+            "changed_at": self.changed_at.isoformat() if self.changed_at else None,
+            "transitions": dict(self.transitions),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "fallbacks": self.fallbacks
+        }
+    
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._transition(OPEN)
+    
+    def _transition(self, state: str):
+        if state == self.state and state != OPEN:
+            return
+        logger.warning("Circuit for channel %s: %s -> %s (%d consecutive failures)",
+                       self.channel, self.state, state, self.consecutive_failures)
+        self.state = state
+        self.changed_at = datetime.utcnow()
+        self.transitions[state] += 1
+
+class CircuitBreakers:
+    """The process's breakers, one per channel - shared by every NotificationContext"""
+    
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+    
+    def get(self, channel: str) -> CircuitBreaker:
+        if channel not in self._breakers:
+            self._breakers[channel] = CircuitBreaker(channel)
+        return self._breakers[channel]
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        return [breaker.stats() for breaker in self._breakers.values()]
+    
+    def reset(self):
+        self._breakers = {}
+
+# Shared breakers for the process
+circuit_breakers = CircuitBreakers()
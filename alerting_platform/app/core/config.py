@@ -0,0 +1,147 @@
+import os
+
+# Delivery log writer - NotificationDelivery rows are buffered and bulk inserted
+DELIVERY_LOG_BATCH_SIZE = int(os.getenv("DELIVERY_LOG_BATCH_SIZE", "500"))
+DELIVERY_LOG_MAX_AGE_SECONDS = float(os.getenv("DELIVERY_LOG_MAX_AGE_SECONDS", "5"))
+
+# Reminder engine - preferences are streamed and committed in chunks of this size
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", "1000"))
+
+# Notification dispatch - maximum in-flight sends per channel
+CHANNEL_CONCURRENCY_LIMITS = {
+    "in_app": int(os.getenv("IN_APP_CONCURRENCY", "200")),
+    "email": int(os.getenv("EMAIL_CONCURRENCY", "20")),
+    "sms": int(os.getenv("SMS_CONCURRENCY", "10")),
+    "webhook": int(os.getenv("WEBHOOK_CONCURRENCY", "50")),
+}
+DEFAULT_CHANNEL_CONCURRENCY = int(os.getenv("DEFAULT_CHANNEL_CONCURRENCY", "20"))
+# Sends are scheduled in windows of this many tasks so huge fan-outs don't create one task per user up front
+DISPATCH_WINDOW_SIZE = int(os.getenv("DISPATCH_WINDOW_SIZE", "1000"))
+# A channel's limit is shared by every send in the process. When sends have to wait for a slot, they
+# queue in a lane per alert severity and freed slots go to the lanes in proportion to these weights
+DISPATCH_LANE_WEIGHTS = {
+    lane.split(":")[0].strip(): int(lane.split(":")[1])
+    for lane in os.getenv("DISPATCH_LANE_WEIGHTS", "critical:8,warning:3,info:1").split(",") if ":" in lane
+}
+
+# Per-user inbox cache for GET /user/alerts
+INBOX_CACHE_MAX_ENTRIES = int(os.getenv("INBOX_CACHE_MAX_ENTRIES", "10000"))
+INBOX_CACHE_TTL_SECONDS = float(os.getenv("INBOX_CACHE_TTL_SECONDS", "30"))
+# Longest GET /user/alerts?wait= long-poll a client may ask for
+INBOX_LONG_POLL_MAX_SECONDS = float(os.getenv("INBOX_LONG_POLL_MAX_SECONDS", "60"))
+
+# Audience index - rebuilt when the audience version changes, and at least this often to pick up writes that bypass the ORM
+AUDIENCE_INDEX_MAX_AGE_SECONDS = float(os.getenv("AUDIENCE_INDEX_MAX_AGE_SECONDS", "60"))
+
+# Analytics counters - pending increments are flushed, other processes' increments re-read,
+# and everything rebuilt from the base tables on these intervals
+COUNTERS_FLUSH_SECONDS = float(os.getenv("COUNTERS_FLUSH_SECONDS", "5"))
+COUNTERS_REFRESH_SECONDS = float(os.getenv("COUNTERS_REFRESH_SECONDS", "10"))
+COUNTERS_RECONCILE_MINUTES = float(os.getenv("COUNTERS_RECONCILE_MINUTES", "60"))
+
+# Hourly delivery/engagement rollups - the aggregator runs every ROLLUP_INTERVAL_SECONDS and stays
+# ROLLUP_LAG_SECONDS behind now so buffered delivery records have landed; work is committed per slice
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "300"))
+ROLLUP_LAG_SECONDS = float(os.getenv("ROLLUP_LAG_SECONDS", "60"))
+ROLLUP_SLICE_HOURS = int(os.getenv("ROLLUP_SLICE_HOURS", "24"))
+
+# Time-to-read latency sketches - relative accuracy of reported percentiles, and how often
+# each process merges its new samples into the shared sketches
+LATENCY_SKETCH_ACCURACY = float(os.getenv("LATENCY_SKETCH_ACCURACY", "0.01"))
+LATENCY_SKETCH_FLUSH_SECONDS = float(os.getenv("LATENCY_SKETCH_FLUSH_SECONDS", "30"))
+
+# Analytics response cache - per-endpoint TTLs; past its TTL a value is still served (while one
+# background refresh runs) for up to ANALYTICS_CACHE_STALE_SECONDS
+ANALYTICS_CACHE_TTL_SECONDS = {
+    "system": float(os.getenv("ANALYTICS_SYSTEM_CACHE_TTL", "15")),
+    "alert_performance": float(os.getenv("ANALYTICS_ALERT_CACHE_TTL", "60")),
+    "user_engagement": float(os.getenv("ANALYTICS_ENGAGEMENT_CACHE_TTL", "300")),
+}
+ANALYTICS_CACHE_STALE_SECONDS = float(os.getenv("ANALYTICS_CACHE_STALE_SECONDS", "600"))
+ANALYTICS_CACHE_MAX_ENTRIES = int(os.getenv("ANALYTICS_CACHE_MAX_ENTRIES", "1000"))
+
+# Delivery outbox - when enabled, alert create/update only write delivery_jobs rows (in the same
+# transaction) and `python -m app.worker` processes send the notifications
+USE_DELIVERY_OUTBOX = os.getenv("USE_DELIVERY_OUTBOX", "false").lower() in ("1", "true", "yes")
+# Organization/team alerts are split into this many jobs so one fan-out spreads across workers
+OUTBOX_SHARDS = int(os.getenv("OUTBOX_SHARDS", "4"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_BASE_SECONDS = float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "10"))
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(os.cpu_count() or 1)))
+
+# Delivery retries - failed sends are retried after DELIVERY_RETRY_BASE_SECONDS * 2^(attempts - 1) seconds
+# (with jitter, capped at DELIVERY_RETRY_MAX_SECONDS) by a drain job running every DELIVERY_RETRY_DRAIN_SECONDS.
+# After DELIVERY_RETRY_MAX_ATTEMPTS sends a delivery is moved to the dead-letter table
+DELIVERY_RETRY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_RETRY_MAX_ATTEMPTS", "5"))
+DELIVERY_RETRY_BASE_SECONDS = float(os.getenv("DELIVERY_RETRY_BASE_SECONDS", "30"))
+DELIVERY_RETRY_MAX_SECONDS = float(os.getenv("DELIVERY_RETRY_MAX_SECONDS", "3600"))
+DELIVERY_RETRY_DRAIN_SECONDS = float(os.getenv("DELIVERY_RETRY_DRAIN_SECONDS", "10"))
+DELIVERY_RETRY_BATCH_SIZE = int(os.getenv("DELIVERY_RETRY_BATCH_SIZE", "500"))
+DELIVERY_RETRY_LEASE_SECONDS = float(os.getenv("DELIVERY_RETRY_LEASE_SECONDS", "120"))
+
+# Sharded reminder processing - every process polls for unclaimed shards of the current cycle,
+# so a cycle is split across processes/nodes and each shard runs once per REMINDER_INTERVAL_MINUTES.
+# REMINDER_SHARDS must be the same on every node sharing the database
+REMINDER_INTERVAL_MINUTES = float(os.getenv("REMINDER_INTERVAL_MINUTES", "120"))
+REMINDER_SHARDS = int(os.getenv("REMINDER_SHARDS", "16"))
+REMINDER_POLL_SECONDS = float(os.getenv("REMINDER_POLL_SECONDS", "60"))
+REMINDER_LEASE_SECONDS = float(os.getenv("REMINDER_LEASE_SECONDS", "300"))
+
+# Reminder digests - on these channels a cycle's due reminders are coalesced into one send per
+# user (of up to REMINDER_DIGEST_MAX_ALERTS alerts) instead of one per alert. Critical alerts are
+# still reminded individually unless REMINDER_DIGEST_INCLUDE_CRITICAL is set. At most
+# REMINDER_DIGEST_BUFFER_SIZE reminders are held before the digests collected so far are sent
+REMINDER_DIGEST_CHANNELS = {
+    channel.strip() for channel in os.getenv("REMINDER_DIGEST_CHANNELS", "email,sms,webhook").split(",") if channel.strip()
+}
+REMINDER_DIGEST_INCLUDE_CRITICAL = os.getenv("REMINDER_DIGEST_INCLUDE_CRITICAL", "false").lower() in ("1", "true", "yes")
+REMINDER_DIGEST_MAX_ALERTS = int(os.getenv("REMINDER_DIGEST_MAX_ALERTS", "50"))
+REMINDER_DIGEST_BUFFER_SIZE = int(os.getenv("REMINDER_DIGEST_BUFFER_SIZE", "100000"))
+
+# Circuit breakers - after CIRCUIT_FAILURE_THRESHOLD consecutive failed sends (0 = never) a channel's
+# circuit opens and its sends fail fast for CIRCUIT_OPEN_SECONDS, then one probe send decides whether
+# it closes again. Critical alerts for an open channel go through CIRCUIT_FALLBACK_CHANNEL ("" = none)
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+CIRCUIT_FALLBACK_CHANNEL = os.getenv("CIRCUIT_FALLBACK_CHANNEL", "in_app")
+
+# Email channel (SMTP) - connections are pooled per process, logged in once and reused for up to
+# SMTP_MESSAGES_PER_CONNECTION messages; each message carries up to SMTP_RECIPIENTS_PER_MESSAGE recipients
+SMTP_HOST = os.getenv("SMTP_HOST", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "false").lower() in ("1", "true", "yes")  # Implicit TLS (port 465)
+SMTP_START_TLS = os.getenv("SMTP_START_TLS", "auto").lower()  # "auto" upgrades when the server offers it
+SMTP_FROM = os.getenv("SMTP_FROM", "alerts@example.com")
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", str(CHANNEL_CONCURRENCY_LIMITS["email"])))
+SMTP_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MESSAGES_PER_CONNECTION", "100"))
+SMTP_RECIPIENTS_PER_MESSAGE = int(os.getenv("SMTP_RECIPIENTS_PER_MESSAGE", "50"))
+SMTP_IDLE_SECONDS = float(os.getenv("SMTP_IDLE_SECONDS", "30"))
+
+# Webhook channel - each endpoint URL gets a process-wide keep-alive HTTP client with up to
+# WEBHOOK_ENDPOINT_CONCURRENCY connections (and requests in flight). With WEBHOOK_ALERTS_PER_REQUEST > 1,
+# payloads for the same endpoint are held for up to WEBHOOK_LINGER_MS and posted together.
+# Bodies of WEBHOOK_GZIP_MIN_BYTES or more are gzipped (0 = never)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "10"))
+WEBHOOK_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "8"))
+WEBHOOK_RECIPIENTS_PER_REQUEST = int(os.getenv("WEBHOOK_RECIPIENTS_PER_REQUEST", "100"))
+WEBHOOK_ALERTS_PER_REQUEST = int(os.getenv("WEBHOOK_ALERTS_PER_REQUEST", "1"))
+WEBHOOK_LINGER_MS = float(os.getenv("WEBHOOK_LINGER_MS", "20"))
+WEBHOOK_GZIP_MIN_BYTES = int(os.getenv("WEBHOOK_GZIP_MIN_BYTES", "1024"))
+
+# Alert observers run as background tasks - per observer type, up to ALERT_EVENT_QUEUE_SIZE events wait
+# for ALERT_EVENT_WORKERS workers. Each event gets ALERT_EVENT_TIMEOUT_SECONDS (notification fan-outs get
+# ALERT_NOTIFICATION_TIMEOUT_SECONDS); shutdown waits up to ALERT_EVENT_DRAIN_SECONDS for queued events
+ALERT_EVENT_QUEUE_SIZE = int(os.getenv("ALERT_EVENT_QUEUE_SIZE", "1000"))
+ALERT_EVENT_WORKERS = int(os.getenv("ALERT_EVENT_WORKERS", "4"))
+ALERT_EVENT_TIMEOUT_SECONDS = float(os.getenv("ALERT_EVENT_TIMEOUT_SECONDS", "30"))
+ALERT_NOTIFICATION_TIMEOUT_SECONDS = float(os.getenv("ALERT_NOTIFICATION_TIMEOUT_SECONDS", "600"))
+ALERT_EVENT_DRAIN_SECONDS = float(os.getenv("ALERT_EVENT_DRAIN_SECONDS", "30"))
+
+# Realtime push (GET /user/ws) - events queued per connection before a slow client is told to resync
+REALTIME_QUEUE_SIZE = int(os.getenv("REALTIME_QUEUE_SIZE", "100"))
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from . import config
+
+class PriorityLimiter:
+    """A channel's concurrency limit, handed out by severity lane instead of in arrival order.
+    
+    Sends take a slot right away while the channel has one free and nobody is waiting.
+    Otherwise they queue in their lane. Each freed slot goes to the next lane picked by
+    smooth weighted round robin among the lanes with waiters, so a backlogged channel
+    serves lanes in proportion to their weights. Critical sends jump ahead of a big info
+    backlog, and info still gets its share instead of starving.
+    """
+    
+    def __init__(self, channel: str, limit: int, weights: Dict[str, int] = None):
+        self.channel = channel
+        self.limit = max(limit, 1)
+        self.weights = dict(weights or config.DISPATCH_LANE_WEIGHTS)
+        self.in_flight = 0
+        self._lanes: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {lane: deque() for lane in self.weights}
+        self._credit = {lane: 0 for lane in self.weights}
+        self._stats = {lane: {"acquired": 0, "queued": 0, "max_depth": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+                       for lane in self.weights}
+    
+    @asynccontextmanager
+    async def slot(self, lane: str):
+        """Hold one of the channel's slots for the duration of a send"""
+        await self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, lane: str):
+        lane = lane if lane in self._lanes else self._default_lane()
+        if self.in_flight < self.limit and not self.depth():
+            self.in_flight += 1
+            self._record_wait(lane, 0.0)
+            return
+        
+        waiter = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        self._lanes[lane].append((waiter, enqueued_at))
+        stats = self._stats[lane]
+        stats["queued"] += 1
+        stats["max_depth"] = max(stats["max_depth"], len(self._lanes[lane]))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled - pass it on
+                self.release()
+            elif (waiter, enqueued_at) in self._lanes[lane]:
+                self._lanes[lane].remove((waiter, enqueued_at))
+            raise
+        self._record_wait(lane, time.monotonic() - enqueued_at)
+    
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+    
+    def set_limit(self, limit: int):
+        self.limit = max(limit, 1)
+        self._wake()
+    
+    def depth(self, lane: str = None) -> int:
+        if lane is not None:
+            return len(self._lanes[lane])
+        return sum(len(waiters) for waiters in self._lanes.values())
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        lanes = []
+        for lane, waiters in self._lanes.items():
+            stats = self._stats[lane]
+            oldest = waiters[0][1] if waiters else None
+            lanes.append({
+                "channel": self.channel,
+                "lane": lane,
+                "weight": self.weights[lane],
+                "depth": len(waiters),
+                "max_depth": stats["max_depth"],
+                "acquired": stats["acquired"],
+                "queued": stats["queued"],
+                "mean_wait_seconds": round(stats["wait_seconds"] / stats["acquired"], 6) if stats["acquired"] else 0.0,
+                "max_wait_seconds": round(stats["max_wait_seconds"], 6),
+                "oldest_wait_seconds": round(now - oldest, 6) if oldest is not None else 0.0
+            })
+        return lanes
+    
+    def _wake(self):
+        while self.in_flight < self.limit:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            waiter, _ = self._lanes[lane].popleft()
+            if waiter.done():
+                # Cancelled while queued
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+    
+    def _next_lane(self) -> Optional[str]:
+        """Smooth weighted round robin over the lanes that have waiters"""
+        waiting = [lane for lane, waiters in self._lanes.items() if waiters]
+        if not waiting:
+            return None
+        for lane in waiting:
+            self._credit[lane] += self.weights[lane]
+        lane = max(waiting, key=lambda lane: self._credit[lane])
+        self._credit[lane] -= sum(self.weights[lane] for lane in waiting)
+        if len(waiting) == 1:
+            # Credit only builds up while lanes compete
+            self._credit[lane] = 0
+        return lane
+    
+    def _default_lane(self) -> str:
+        return min(self.weights, key=self.weights.get)
+    
+    def _record_wait(self, lane: str, waited: float):
+        stats = self._stats[lane]
+        stats["acquired"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+
+class DispatchLanes:
+    """The process's per-channel limiters, shared by every NotificationContext so lanes hold across all sends"""
+    
+    def __init__(self):
+        self._limiters: Dict[str, PriorityLimiter] = {}
+    
+    def get(self, channel: str, limit: int) -> PriorityLimiter:
+        if channel not in self._limiters:
+            self._limiters[channel] = PriorityLimiter(channel, limit)
+        return self._limiters[channel]
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        return [lane for limiter in self._limiters.values() for lane in limiter.stats()]
+    
+    def reset(self):
+        self._limiters = {}
+
+# Shared limiters for the process
+dispatch_lanes = DispatchLanes()
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class EventLane:
+    """One observer type's bounded queue of pending events and the workers running them"""
+    
+    def __init__(self, name: str, max_queue: int, workers: int):
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.workers: Set[asyncio.Task] = set()
+        self.worker_count = max(workers, 1)
+        self.in_flight = 0
+        
+        self.published = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.blocked = 0
+        self.max_seconds = 0.0
+
+class AlertEventBus:
+    """Runs alert observers as tracked background tasks instead of inside the request.
+    
+    Each observer type gets a lane: a bounded queue and a few worker tasks, so observers run
+    concurrently with each other and with the request that published the event. An observer
+    gets timeout_seconds per event (its own attribute, or ALERT_EVENT_TIMEOUT_SECONDS); a
+    timeout or exception is logged and counted, and never reaches the publisher or the other
+    observers. When a lane's queue is full, publish() waits for room - backpressure instead of
+    unbounded memory. drain() waits for the queued events and stops the workers at shutdown.
+    
+    Lanes live on the event loop that published to them; a new loop (the app restarted
+    in-process) starts with fresh lanes.
+    """
+    
+    def __init__(self, max_queue: int = None, workers: int = None, timeout_seconds: float = None):
+        self.max_queue = max_queue or config.ALERT_EVENT_QUEUE_SIZE
+        self.workers = workers or config.ALERT_EVENT_WORKERS
+        self.timeout_seconds = timeout_seconds or config.ALERT_EVENT_TIMEOUT_SECONDS
+        self._lanes: Dict[str, EventLane] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    async def publish(self, observers: List[Any], method: str, alert: Any):
+        """Queue `await observer.<method>(alert)` for each observer; returns once everything is queued"""
+        for observer in observers:
+            lane = self._lane(type(observer).__name__)
+            if lane.queue.full():
+                lane.blocked += 1
+                logger.warning("Alert event lane %s is full (%d events) - waiting for room", lane.name, self.max_queue)
+            await lane.queue.put((observer, method, alert))
+            lane.published += 1
+    
+    async def drain(self, timeout: float = None):
+        """Wait (up to timeout seconds) for every queued event to finish, then stop the workers"""
+        timeout = timeout if timeout is not None else config.ALERT_EVENT_DRAIN_SECONDS
+        lanes = list(self._lanes.values())
+        if lanes and self._loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(asyncio.gather(*(lane.queue.join() for lane in lanes)), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Gave up draining alert events after %.0fs: %s", timeout, {
+                    lane.name: lane.queue.qsize() + lane.in_flight for lane in lanes
+                })
+        
+        workers = [worker for lane in lanes for worker in lane.workers]
+        for worker in workers:
+            worker.cancel()
+        if workers and self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*workers, return_exceptions=True)
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "observer": lane.name,
+                "queued": lane.queue.qsize(),
+                "in_flight": lane.in_flight,
+                "max_queue": self.max_queue,
+                "workers": len(lane.workers),
+                "published": lane.published,
+                "completed": lane.completed,
+                "failed": lane.failed,
+                "timed_out": lane.timed_out,
+                "blocked": lane.blocked,
+                "max_seconds": round(lane.max_seconds, 4)
+            }
+            for lane in self._lanes.values()
+        ]
+    
+    def _lane(self, name: str) -> EventLane:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if any(lane.queue.qsize() or lane.in_flight for lane in self._lanes.values()):
+                logger.warning("Alert events left on a previous event loop are dropped")
+            self._loop = loop
+            self._lanes = {}
+        
+        if name not in self._lanes:
+            self._lanes[name] = EventLane(name, self.max_queue, self.workers)
+        lane = self._lanes[name]
+        if not lane.workers:
+            # New lane, or stopped by drain()
+            for _ in range(lane.worker_count):
+                worker = loop.create_task(self._work(lane))
+                lane.workers.add(worker)
+                worker.add_done_callback(lane.workers.discard)
+        return lane
+    
+    async def _work(self, lane: EventLane):
+        while True:
+            observer, method, alert = await lane.queue.get()
+            lane.in_flight += 1
+            timeout = getattr(observer, "timeout_seconds", None) or self.timeout_seconds
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(getattr(observer, method)(alert), timeout)
+                lane.completed += 1
+            except asyncio.TimeoutError:
+                lane.timed_out += 1
+                logger.error("%s.%s timed out after %gs for alert %s", lane.name, method, timeout, getattr(alert, "id", None))
+            except Exception:
+                lane.failed += 1
+                logger.exception("%s.%s failed for alert %s", lane.name, method, getattr(alert, "id", None))
+            finally:
+                lane.in_flight -= 1
+                lane.max_seconds = max(lane.max_seconds, time.perf_counter() - started)
+                lane.queue.task_done()
+
+# Shared event bus for the API process
+alert_event_bus = AlertEventBus()
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from . import config
+
+class InboxCache:
+    """In-process cache of rendered user inboxes with LRU + TTL eviction.
+    
+    Entries are grouped per user so a user's pages/filters can be dropped together
+    when one of their alerts changes. The total number of cached pages is bounded
+    by max_entries; least recently used users are evicted first.
+    """
+    
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None):
+        self.max_entries = max_entries or config.INBOX_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.INBOX_CACHE_TTL_SECONDS
+        
+        # user_id -> {page key -> (expires_at, inbox)}, ordered from least to most recently used
+        self._users: "OrderedDict[int, Dict[Hashable, Tuple[float, Any]]]" = OrderedDict()
+        self._entry_count = 0
+        # Bumped on every invalidation so a slow query can't store a result that is already stale
+        self._version = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(states=None, cursor: int = None, limit: int = None) -> Hashable:
+        return (tuple(sorted(states)) if states else None, cursor, limit)
+    
+    def version(self) -> int:
+        """Token to pass to set() - captured before computing the value"""
+        return self._version
+    
+    def get(self, user_id: int, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            pages = self._users.get(user_id)
+            entry = pages.get(key) if pages else None
+            
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del pages[key]
+                    self._entry_count -= 1
+                self.misses += 1
+                return None
+            
+            self._users.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, user_id: int, key: Hashable, value: Any, version: int = None):
+        with self._lock:
+            if version is not None and version != self._version:
+                # Something was invalidated while the value was being computed
+                return
+            
+            pages = self._users.setdefault(user_id, {})
+            if key not in pages:
+                self._entry_count += 1
+            pages[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._users.move_to_end(user_id)
+            
+            while self._entry_count > self.max_entries and self._users:
+                _, evicted_pages = self._users.popitem(last=False)
+                self._entry_count -= len(evicted_pages)
+                self.evictions += len(evicted_pages)
+    
+    def invalidate_user(self, user_id: int):
+        self.invalidate_users([user_id])
+    
+    def invalidate_users(self, user_ids: Iterable[int]):
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            for user_id in user_ids:
+                pages = self._users.pop(user_id, None)
+                if pages:
+                    self._entry_count -= len(pages)
+    
+    def invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            self._users.clear()
+            self._entry_count = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._users),
+            "entries": self._entry_count,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups * 100) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+# Shared cache for the API process
+inbox_cache = InboxCache()
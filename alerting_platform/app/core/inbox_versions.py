@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import secrets
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, Set
+from . import config
+
+class InboxVersions:
+    """Per-user inbox version tokens - the ETag of GET /user/alerts, and what long-polls wait on.
+    
+    A user's version changes whenever something in their inbox changes through this process
+    (bump_users/bump_all), or when it is evicted to stay within max_entries. Tokens carry a
+    per-process epoch, so one issued by another API process never matches. Changes written by
+    other processes are caught by revalidating: once a version has gone max_age_seconds without
+    a check, the next request re-reads the inbox and validate() compares a digest of it with the
+    one last served - the version only changes if the content did.
+    """
+    
+    def __init__(self, max_age_seconds: float = None, max_entries: int = None):
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else config.INBOX_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or config.INBOX_CACHE_MAX_ENTRIES
+        self._epoch = secrets.token_hex(4)
+        self._counter = itertools.count(1)
+        # user_id -> _Version, in issue order; a missing user gets a fresh version
+        self._versions: Dict[int, _Version] = {}
+        self._waiters: Dict[int, Set[asyncio.Future]] = {}
+        self._lock = threading.Lock()
+    
+    def etag(self, user_id: int) -> str:
+        with self._lock:
+            return self._format(self._current(user_id))
+    
+    def needs_validation(self, user_id: int) -> bool:
+        """Whether the user's version has gone max_age_seconds without validate() checking it"""
+        with self._lock:
+            return time.monotonic() - self._current(user_id).checked_at >= self.max_age_seconds
+    
+    def validate(self, user_id: int, key: Hashable, etag: str, inbox: Any) -> str:
+        """Record the inbox served at etag; returns the ETag to send, which is new if the content changed unseen"""
+        digest = hashlib.sha1(json.dumps(inbox, sort_keys=True, default=str).encode()).hexdigest()
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is None or self._format(entry) != etag:
+                # Bumped while the inbox was read - the next request gets the new version
+                return etag
+            if entry.digests.get(key, digest) != digest:
+                # Changed by another process
+                del self._versions[user_id]
+                entry = self._current(user_id)
+                woken = list(self._waiters.get(user_id, ()))
+            else:
+                woken = []
+            entry.digests[key] = digest
+            entry.checked_at = time.monotonic()
+        self._wake(woken)
+        return self._format(entry)
+    
+    def bump_user(self, user_id: int):
+        self.bump_users([user_id])
+    
+    def bump_users(self, user_ids: Iterable[int]):
+        woken = []
+        with self._lock:
+            for user_id in user_ids:
+                self._versions.pop(user_id, None)
+                woken.extend(self._waiters.get(user_id, ()))
+        self._wake(woken)
+    
+    def bump_all(self):
+        with self._lock:
+            self._versions.clear()
+            woken = [future for futures in self._waiters.values() for future in futures]
+        self._wake(woken)
+    
+    async def wait_for_change(self, user_id: int, etag: str, timeout: float) -> str:
+        """Wait until the user's ETag differs from etag, or timeout seconds pass; returns the current ETag"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            future = loop.create_future()
+            with self._lock:
+                self._waiters.setdefault(user_id, set()).add(future)
+            try:
+                # Registered before checking, so a bump in between still wakes us
+                current = self.etag(user_id)
+                remaining = deadline - loop.time()
+                if current != etag or remaining <= 0 or self.needs_validation(user_id):
+                    return current
+                try:
+                    # Wake up at least when the version is due for validation, to pick up other processes' changes
+                    await asyncio.wait_for(future, min(remaining, self.max_age_seconds))
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._lock:
+                    waiters = self._waiters.get(user_id)
+                    if waiters is not None:
+                        waiters.discard(future)
+                        if not waiters:
+                            del self._waiters[user_id]
+    
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(len(futures) for futures in self._waiters.values())
+    
+    def _current(self, user_id: int) -> "_Version":
+        entry = self._versions.get(user_id)
+        if entry is None:
+            entry = self._versions[user_id] = _Version(next(self._counter), time.monotonic())
+            while len(self._versions) > self.max_entries:
+                # Forgetting a version only costs that user one full response
+                del self._versions[next(iter(self._versions))]
+        return entry
+    
+    def _format(self, entry: "_Version") -> str:
+        return f'W/"{self._epoch}-{entry.version}"'
+    
+    @staticmethod
+    def _wake(futures):
+        # Bumps can come from executor threads; resolve each future on its own loop
+        for future in futures:
+            loop = future.get_loop()
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, future)
+
+class _Version:
+    __slots__ = ("version", "checked_at", "digests")
+    
+    def __init__(self, version: int, checked_at: float):
+        self.version = version
+        self.checked_at = checked_at
+        # Digest of the last inbox served per page key (InboxCache.make_key)
+        self.digests: Dict[Hashable, str] = {}
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+# Shared versions for the API process
+inbox_versions = InboxVersions()
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """One connected client - the events waiting to be pushed to it"""
+    
+    def __init__(self, user_id: int, max_queue: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self.overflows = 0
+
+class RealtimeHub:
+    """In-process pub/sub from alert deliveries to users' open connections.
+    
+    Each connection subscribes with a bounded queue. Publishing never waits on a client: when
+    a connection's queue is full (the client isn't reading fast enough), its backlog is dropped
+    and replaced by a single {"type": "resync"} event telling it to re-fetch GET /user/alerts,
+    so a slow client costs at most max_queue events of memory.
+    
+    Subscriptions live on the event loop serving the connections; publish() may be called
+    from any thread (sync services run in the executor) and is handed over to that loop.
+    """
+    
+    def __init__(self, max_queue: int = None):
+        self.max_queue = max_queue or config.REALTIME_QUEUE_SIZE
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        self.published = 0
+        self.pushed = 0
+        self.overflows = 0
+    
+    def subscribe(self, user_id: int) -> Subscription:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A new event loop (e.g. the app restarted in-process) - old subscriptions are gone
+            self._loop = loop
+            self._subscriptions = {}
+        subscription = Subscription(user_id, self.max_queue)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+    
+    def publish(self, user_id: int, event: Dict[str, Any]):
+        self.publish_many([user_id], event)
+    
+    def publish_many(self, user_ids: Iterable[int], event: Dict[str, Any]):
+        """Push an event to every open connection of the given users (no-op for users not connected)"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(user_ids, event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, list(user_ids), event)
+    
+    def connection_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connected_users": len(self._subscriptions),
+            "connections": self.connection_count(),
+            "max_queue": self.max_queue,
+            "published": self.published,
+            "pushed": self.pushed,
+            "overflows": self.overflows
+        }
+    
+    def _deliver(self, user_ids: Iterable[int], event: Dict[str, Any]):
+        self.published += 1
+        for user_id in user_ids:
+            for subscription in self._subscriptions.get(user_id, ()):
+                self._offer(subscription, event)
+    
+    def _offer(self, subscription: Subscription, event: Dict[str, Any]):
+        try:
+            subscription.queue.put_nowait(event)
+            self.pushed += 1
+        except asyncio.QueueFull:
+            # Don't let a slow client's backlog grow - it catches up from the inbox instead
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait({"type": "resync"})
+            subscription.overflows += 1
+            self.overflows += 1
+            logger.info("Realtime queue of a user %d connection overflowed, asking it to resync",
+                        subscription.user_id)
+
+# Shared hub for the API process
+realtime_hub = RealtimeHub()
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """In-process cache of computed responses with stale-while-revalidate and request coalescing.
+    
+    A fresh entry is returned as is. Past its TTL (but within stale_seconds) the stale value is
+    returned immediately while a single background task recomputes it. Without a usable entry,
+    the first caller starts the computation and every concurrent caller for the same key awaits
+    that same task, so at most one computation per key is ever running.
+    
+    compute() callables must not use request-scoped resources (e.g. the request's DB session):
+    a background refresh outlives the request that triggered it.
+    """
+    
+    def __init__(self, max_entries: int = None, stale_seconds: float = None):
+        self.max_entries = max_entries or config.ANALYTICS_CACHE_MAX_ENTRIES
+        self.stale_seconds = stale_seconds if stale_seconds is not None else config.ANALYTICS_CACHE_STALE_SECONDS
+        
+        # key -> (fresh_until, stale_until, value), ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+    
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]], ttl_seconds: float) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        
+        if entry is not None and now < entry[0]:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        
+        if entry is not None and now < entry[1]:
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            if self._running_task(key) is None:
+                self.refreshes += 1
+                self._start(key, compute, ttl_seconds, background=True)
+            return entry[2]
+        
+        task = self._running_task(key)
+        if task is None:
+            self.misses += 1
+            task = self._start(key, compute, ttl_seconds, background=False)
+        else:
+            self.coalesced += 1
+        # Shielded so one client disconnecting doesn't cancel the computation the others are waiting on
+        return await asyncio.shield(task)
+    
+    def invalidate(self, key: Hashable = None):
+        """Drop one key (or everything); an in-flight computation still completes and is stored"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "stale_seconds": self.stale_seconds,
+            "in_flight": len(self._inflight),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": ((self.hits + self.stale_hits) / lookups * 100) if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors
+        }
+    
+    def _running_task(self, key: Hashable):
+        task = self._inflight.get(key)
+        # A task left over from another event loop (e.g. a previous app instance) can't be awaited here
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            return None
+        return task
+    
+    def _start(self, key: Hashable, compute, ttl_seconds: float, background: bool) -> asyncio.Task:
+        async def run():
+            try:
+                value = await compute()
+            except Exception:
+                if background:
+                    # Keep serving the stale value; the next request past the TTL retries
+                    self.refresh_errors += 1
+                    logger.exception("Background refresh of %r failed", key)
+                    return None
+                raise
+            finally:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+            
+            self._store(key, value, ttl_seconds)
+            return value
+        
+        task = asyncio.get_running_loop().create_task(run())
+        self._inflight[key] = task
+        if background:
+            # Nobody awaits a background refresh - retrieve its result so failures aren't reported as unhandled
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+    
+    def _store(self, key: Hashable, value: Any, ttl_seconds: float):
+        now = time.monotonic()
+        self._entries[key] = (now + ttl_seconds, now + ttl_seconds + self.stale_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+# Shared cache for the analytics router
+analytics_cache = ResponseCache()
@@ -2,25 +2,94 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from sqlalchemy.orm import sessionmaker
 from ..database import SessionLocal
 from ..services.notification_service import NotificationService
+from ..services.delivery_log import delivery_log_writer
+from ..services.delivery_retries import delivery_retries
+from ..services.metric_counters import metric_counters
+from ..services.rollup_service import RollupService
+from ..services.latency_sketches import latency_sketches
+from ..services.reminder_shards import run_reminder_cycle
+from . import config
 import asyncio
 
 def setup_scheduler(scheduler: AsyncIOScheduler):
     """Setup recurring jobs for reminder processing"""
     
     async def process_reminders():
-        """Job function to process reminders every 2 hours"""
+        """Job function to process this cycle's unclaimed reminder shards (each shard runs once every 2 hours)"""
+        await run_reminder_cycle()
+    
+    async def drain_delivery_retries():
+        """Job function to resend failed deliveries whose backoff has passed"""
+        await delivery_retries.drain()
+    
+    def roll_up_analytics():
+        """Job function to fold new deliveries/reads into the hourly rollups (runs in the executor)"""
         db = SessionLocal()
         try:
-            notification_service = NotificationService(db)
-            await notification_service.process_reminders()
+            RollupService(db).run_incremental()
         finally:
             db.close()
     
-    # Schedule reminder processing every 2 hours
+    # Poll for reminder shards - every process/node registers this job, and shard leases make
+    # sure each shard is processed by one of them per REMINDER_INTERVAL_MINUTES cycle
     scheduler.add_job(
         process_reminders,
         'interval',
-        hours=2,
+        seconds=config.REMINDER_POLL_SECONDS,
         id='reminder_processor',
         replace_existing=True
     )
+    
+    # Flush buffered delivery records that have reached the age threshold
+    scheduler.add_job(
+        delivery_log_writer.flush_if_stale,
+        'interval',
+        seconds=config.DELIVERY_LOG_MAX_AGE_SECONDS,
+        id='delivery_log_flusher',
+        replace_existing=True
+    )
+    
+    # Resend failed deliveries that are due (leased, so every process can run this job)
+    scheduler.add_job(
+        drain_delivery_retries,
+        'interval',
+        seconds=config.DELIVERY_RETRY_DRAIN_SECONDS,
+        id='delivery_retry_drainer',
+        replace_existing=True
+    )
+    
+    # Persist pending analytics counter increments
+    scheduler.add_job(
+        metric_counters.flush,
+        'interval',
+        seconds=config.COUNTERS_FLUSH_SECONDS,
+        id='metric_counters_flusher',
+        replace_existing=True
+    )
+    
+    # Correct analytics counter drift against the base tables
+    scheduler.add_job(
+        metric_counters.reconcile,
+        'interval',
+        minutes=config.COUNTERS_RECONCILE_MINUTES,
+        id='metric_counters_reconciler',
+        replace_existing=True
+    )
+    
+    # Incrementally update the hourly delivery/engagement rollups
+    scheduler.add_job(
+        roll_up_analytics,
+        'interval',
+        seconds=config.ROLLUP_INTERVAL_SECONDS,
+        id='rollup_aggregator',
+        replace_existing=True
+    )
+    
+    # Merge this process's time-to-read samples into the shared sketches
+    scheduler.add_job(
+        latency_sketches.flush,
+        'interval',
+        seconds=config.LATENCY_SKETCH_FLUSH_SECONDS,
+        id='latency_sketch_flusher',
+        replace_existing=True
+    )
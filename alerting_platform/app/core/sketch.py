@@ -0,0 +1,114 @@
+import math
+from typing import Dict, Any, Optional
+
+# Values at or below this are counted as zero (log buckets can't hold them)
+MIN_INDEXABLE_VALUE = 1e-9
+
+class QuantileSketch:
+    """Mergeable streaming quantile sketch (DDSketch-style).
+    
+    Values are counted in logarithmically sized buckets, so every quantile is returned within
+    `relative_accuracy` of the true value using a few hundred buckets for values spanning
+    seconds to months. Two sketches with the same accuracy merge by adding bucket counts,
+    which is what lets each process keep its own sketch and fold it into the shared one.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+    
+    def add(self, value: float, count: int = 1):
+        if value < 0:
+            raise ValueError("QuantileSketch only accepts non-negative values")
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0) + count
+            if len(self.bins) > self.max_buckets:
+                self._collapse_lowest()
+        
+        self.count += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+    
+    def merge(self, other: "QuantileSketch"):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if not other.count:
+            return
+        
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        while len(self.bins) > self.max_buckets:
+            self._collapse_lowest()
+        
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate value at quantile q (0..1), or None if the sketch is empty"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if not self.count:
+            return None
+        
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Bucket midpoint (in relative terms), clamped to the observed range
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+    
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": {str(index): count for index, count in self.bins.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_buckets: int = 2048) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], max_buckets)
+        sketch.bins = {int(index): count for index, count in data.get("bins", {}).items()}
+        sketch.zero_count = data.get("zero_count", 0)
+        sketch.count = data.get("count", 0)
+        sketch.sum = data.get("sum", 0.0)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
+    
+    def _collapse_lowest(self):
+        # Fold the two lowest buckets together - keeps memory bounded and only costs
+        # accuracy at the very bottom of the distribution
+        lowest, second = sorted(self.bins)[:2]
+        self.bins[second] += self.bins.pop(lowest)
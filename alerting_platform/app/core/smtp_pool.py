@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from . import config
+
+logger = logging.getLogger(__name__)
+
+class PooledSMTPConnection:
+    """An authenticated SMTP session plus the bookkeeping the pool needs to recycle it"""
+    
+    def __init__(self, client):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPConnectionPool:
+    """Bounded pool of logged-in aiosmtplib sessions.
+    
+    At most max_size connections exist at once; callers beyond that wait for one to be
+    returned. A connection is reused for up to max_messages messages (the server-side limit
+    most providers enforce per session) and dropped after idle_seconds without use or after
+    any connection-level error.
+    """
+    
+    def __init__(self, hostname: str = None, port: int = None, username: str = None, password: str = None,
+                 use_tls: bool = None, start_tls: Optional[bool] = None, timeout: float = None,
+                 max_size: int = None, max_messages: int = None, idle_seconds: float = None):
+        self.hostname = hostname or config.SMTP_HOST
+        self.port = port or config.SMTP_PORT
+        self.username = username if username is not None else config.SMTP_USERNAME
+        self.password = password if password is not None else config.SMTP_PASSWORD
+        self.use_tls = use_tls if use_tls is not None else config.SMTP_USE_TLS
+        self.start_tls = start_tls if start_tls is not None else _start_tls_setting(config.SMTP_START_TLS)
+        self.timeout = timeout or config.SMTP_TIMEOUT_SECONDS
+        self.max_size = max_size or config.SMTP_POOL_SIZE
+        self.max_messages = max_messages or config.SMTP_MESSAGES_PER_CONNECTION
+        self.idle_seconds = idle_seconds if idle_seconds is not None else config.SMTP_IDLE_SECONDS
+        
+        self._idle: List[PooledSMTPConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        
+        self.connections_opened = 0
+        self.messages_sent = 0
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.hostname)
+    
+    @asynccontextmanager
+    async def connection(self):
+        """Borrow a logged-in connection; it goes back to the pool unless the body raised a connection error"""
+        self._bind_to_running_loop()
+        async with self._slots:
+            connection = await self._take()
+            reusable = True
+            try:
+                yield connection
+            except (OSError, asyncio.TimeoutError) + _disconnect_errors():
+                reusable = False
+                raise
+            except asyncio.CancelledError:
+                # Cancelled mid-conversation - the session may be halfway through a message, so it is
+                # dropped without a QUIT round trip rather than handed to the next sender
+                reusable = False
+                connection.client.close()
+                raise
+            finally:
+                connection.last_used = time.monotonic()
+                if reusable and connection.client.is_connected and connection.messages_sent < self.max_messages:
+                    self._idle.append(connection)
+                else:
+                    await self._close(connection)
+    
+    async def send_message(self, message, sender: str, recipients: List[str]):
+        """Send one message over a pooled connection; returns aiosmtplib's (refused recipients, response).
+        
+        A pooled connection the server has silently closed is only noticed on use, so a
+        disconnect is retried once on a fresh connection.
+        """
+        from aiosmtplib import SMTPServerDisconnected
+        
+        for attempt in range(2):
+            try:
+                async with self.connection() as connection:
+                    result = await connection.client.send_message(message, sender=sender, recipients=recipients)
+                    connection.messages_sent += 1
+                    self.messages_sent += 1
+                    return result
+            except SMTPServerDisconnected:
+                if attempt:
+                    raise
+                logger.info("Pooled SMTP connection to %s was closed by the server, retrying", self.hostname)
+    
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._close(connection)
+    
+    async def _take(self) -> PooledSMTPConnection:
+        now = time.monotonic()
+        while self._idle:
+            # Most recently used first - the likeliest to still be open on the server side
+            connection = self._idle.pop()
+            if connection.client.is_connected and now - connection.last_used < self.idle_seconds:
+                return connection
+            await self._close(connection)
+        return await self._open()
+    
+    async def _open(self) -> PooledSMTPConnection:
+        import aiosmtplib
+        
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        # Connects, upgrades to TLS if configured and logs in - once per pooled connection
+        await client.connect()
+        self.connections_opened += 1
+        return PooledSMTPConnection(client)
+    
+    async def _close(self, connection: PooledSMTPConnection):
+        try:
+            if connection.client.is_connected:
+                await connection.client.quit()
+        except Exception:
+            connection.client.close()
+    
+    def _bind_to_running_loop(self):
+        # asyncio connections and semaphores belong to one event loop; start over on a new one
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.max_size)
+
+def _start_tls_setting(value: str) -> Optional[bool]:
+    if value in ("1", "true", "yes"):
+        return True
+    if value in ("0", "false", "no"):
+        return False
+    return None  # aiosmtplib upgrades when the server advertises STARTTLS
+
+def _disconnect_errors():
+    from aiosmtplib import SMTPServerDisconnected, SMTPConnectError, SMTPTimeoutError
+    return (SMTPServerDisconnected, SMTPConnectError, SMTPTimeoutError)
+
+_shared_pool: Optional[SMTPConnectionPool] = None
+
+def get_smtp_pool() -> SMTPConnectionPool:
+    """Process-wide pool, so connections are reused across requests and reminder cycles"""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = SMTPConnectionPool()
+    return _shared_pool
+
+async def close_smtp_pool():
+    if _shared_pool is not None:
+        await _shared_pool.close()
@@ -1,10 +1,11 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager, contextmanager
 import os
 
 # Database configuration
-SQLALCHEMY_DATABASE_URL = "sqlite:///./alerting_platform.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./alerting_platform.db")
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -21,7 +22,98 @@ def get_db():
     finally:
         db.close()
 
+def _async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite locally, asyncpg in production)"""
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith(("postgresql:", "postgresql+psycopg2:", "postgres:")):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+# Async database configuration - route handlers use it when USE_ASYNC_DB is enabled
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_database_url(SQLALCHEMY_DATABASE_URL))
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+_async_engine = None
+_async_session_factory = None
+
+def get_async_session_factory():
+    """Lazily create the async engine so aiosqlite/asyncpg are only needed when it's used"""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        _async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+        _async_session_factory = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+async def get_async_db():
+    """Async database dependency"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+async def dispose_async_engine():
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+async def run_in_session(db, fn):
+    """Run sync ORM code against either session type; AsyncSession I/O doesn't block the event loop"""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn)
+    return fn(db)
+
+@contextmanager
+def borrowed_session(db):
+    """Hand out a caller-owned session where a `with session_factory() as db` block is expected, without closing it"""
+    yield db
+
+# Session dependency for async route handlers: async engine when enabled, sync session otherwise
+get_route_db = get_async_db if USE_ASYNC_DB else get_db
+
+@asynccontextmanager
+async def open_route_session():
+    """A session of the kind get_route_db provides, for work that outlives the request (background refreshes)"""
+    if USE_ASYNC_DB:
+        async with get_async_session_factory()() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+def dialect_insert(db, table):
+    """Return an INSERT construct for the session's dialect (supports ON CONFLICT on SQLite/Postgres)"""
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy import insert
+    return insert(table)
+
+# Revision matching the tables create_all() built before migrations (see migrations/versions)
+BASELINE_REVISION = "0001"
+
 def create_tables():
-    """Create all database tables"""
-    from .models import user, alert, notification
-    Base.metadata.create_all(bind=engine)
+    """Create all database tables on a new database, or migrate an existing one to the latest revision"""
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
+    from .models import user, alert, notification, analytics
+    
+    alembic_config = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+    with engine.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        tables = inspect(connection).get_table_names()
+        if not tables:
+            Base.metadata.create_all(bind=connection)
+            command.stamp(alembic_config, "head")
+            return
+        if "alembic_version" not in tables:
+            # Created by create_all() before the project had migrations. create_all() adds new
+            # tables but never new columns, so the migrations skip tables that already exist
+            command.stamp(alembic_config, BASELINE_REVISION)
+        command.upgrade(alembic_config, "head")
@@ -4,10 +4,17 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from contextlib import asynccontextmanager
 import asyncio
 
-from .database import create_tables, get_db
+from .database import create_tables, get_db, dispose_async_engine
 from .routers import admin, user, analytics
 from .services.notification_service import NotificationService
+from .services.delivery_log import delivery_log_writer
+from .services.delivery_retries import delivery_retries
+from .services.metric_counters import metric_counters
+from .services.latency_sketches import latency_sketches
+from .core.event_bus import alert_event_bus
 from .core.scheduler import setup_scheduler
+from .core.smtp_pool import close_smtp_pool
+from .core.webhook_pool import close_webhook_pool
 
 # Scheduler instance
 scheduler = AsyncIOScheduler()
@@ -17,11 +24,26 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan"""
     # Startup
     create_tables()
+    metric_counters.load()
+    if not metric_counters.snapshot():
+        # First start (or empty counters table) - build the counters from the base tables
+        metric_counters.reconcile()
+    if latency_sketches.is_empty():
+        latency_sketches.rebuild()
     setup_scheduler(scheduler)
     scheduler.start()
     yield
     # Shutdown
     scheduler.shutdown()
+    # Let queued observer events (notification fan-outs) finish before the buffers are flushed
+    await alert_event_bus.drain()
+    delivery_log_writer.flush()
+    delivery_retries.flush()
+    metric_counters.flush()
+    latency_sketches.flush()
+    await close_smtp_pool()
+    await close_webhook_pool()
+    await dispose_async_engine()
 
 app = FastAPI(
     title="Alerting & Notification Platform",
@@ -13,6 +13,7 @@ class DeliveryTypeEnum(enum.Enum):
     IN_APP = "in_app"
     EMAIL = "email"
     SMS = "sms"
+    WEBHOOK = "webhook"
 
 class VisibilityTypeEnum(enum.Enum):
     ORGANIZATION = "organization"
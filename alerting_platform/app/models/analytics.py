@@ -0,0 +1,47 @@
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Enum, ForeignKey, UniqueConstraint, Index, Text
+from datetime import datetime
+from ..database import Base
+from .alert import SeverityEnum
+
+class MetricCounter(Base):
+    __tablename__ = "metric_counters"
+    
+    # e.g. "alerts_total", "deliveries_sent", "alerts_severity:critical", "alerts_created_day:2025-09-18"
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class AlertHourlyRollup(Base):
+    __tablename__ = "alert_hourly_rollups"
+    __table_args__ = (
+        # One row per bucket/alert/channel - rebuilding a bucket replaces its rows
+        UniqueConstraint("bucket_start", "alert_id", "channel", name="uq_alert_hourly_rollups_bucket_alert_channel"),
+        Index("ix_alert_hourly_rollups_bucket_severity", "bucket_start", "severity"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_start = Column(DateTime, nullable=False)  # Start of the hour (UTC)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), nullable=False)
+    severity = Column(Enum(SeverityEnum))  # Denormalized from the alert so trends can filter without a join
+    channel = Column(String, nullable=False)
+    sent_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    read_count = Column(Integer, default=0, nullable=False)
+    snoozed_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String, primary_key=True)
+    # Raw events before this time have been rolled up
+    processed_until = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class LatencySketch(Base):
+    __tablename__ = "latency_sketches"
+    
+    # e.g. "read_latency:all", "read_latency:severity:critical", "read_latency:team:3"
+    name = Column(String, primary_key=True)
+    data = Column(Text, nullable=False)  # QuantileSketch.to_dict() as JSON
+    updated_at = Column(DateTime, default=datetime.utcnow)
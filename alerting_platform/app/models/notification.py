@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Enum, Text, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 import enum
@@ -14,6 +14,16 @@ class UserAlertStateEnum(enum.Enum):
     READ = "read"
     SNOOZED = "snoozed"
 
+class DeliveryJobKindEnum(enum.Enum):
+    ALERT_CREATED = "alert_created"
+    ALERT_UPDATED = "alert_updated"
+
+class DeliveryJobStatusEnum(enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
 class NotificationDelivery(Base):
     __tablename__ = "notification_deliveries"
     
@@ -24,6 +34,8 @@ class NotificationDelivery(Base):
     status = Column(Enum(NotificationStatusEnum))
     delivered_at = Column(DateTime, default=datetime.utcnow)
     error_message = Column(Text, nullable=True)
+    # Set on reminders sent as part of a digest - every alert in one digest send shares it
+    digest_id = Column(String, nullable=True, index=True)
     
     # Relationships
     alert = relationship("Alert", back_populates="deliveries")
@@ -31,6 +43,12 @@ class NotificationDelivery(Base):
 
 class UserAlertPreference(Base):
     __tablename__ = "user_alert_preferences"
+    __table_args__ = (
+        # One preference per (user, alert) - lets audience fan-out insert with ON CONFLICT DO NOTHING
+        UniqueConstraint("user_id", "alert_id", name="uq_user_alert_preferences_user_alert"),
+        # Reminder scans walk this index for rows that are due now (keyset on next_reminder_at, id)
+        Index("ix_user_alert_preferences_next_reminder", "next_reminder_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -38,6 +56,7 @@ class UserAlertPreference(Base):
     state = Column(Enum(UserAlertStateEnum), default=UserAlertStateEnum.UNREAD)
     snoozed_until = Column(DateTime, nullable=True)
     last_reminded_at = Column(DateTime, nullable=True)
+    next_reminder_at = Column(DateTime, nullable=True)  # Maintained by read/snooze/remind; NULL = no reminder
     read_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
@@ -45,3 +64,71 @@ class UserAlertPreference(Base):
     # Relationships
     user = relationship("User", back_populates="alert_preferences")
     alert = relationship("Alert", back_populates="user_preferences")
+
+class DeliveryJob(Base):
+    """Outbox row - written in the same transaction as the alert change, executed by app.worker"""
+    __tablename__ = "delivery_jobs"
+    __table_args__ = (
+        # Workers claim the oldest available job (pending, or running with an expired lease)
+        Index("ix_delivery_jobs_claim", "status", "available_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"))
+    kind = Column(Enum(DeliveryJobKindEnum))
+    # Large audiences are split into shard_count jobs; this one covers users with user_id % shard_count == shard
+    shard = Column(Integer, default=0, nullable=False)
+    shard_count = Column(Integer, default=1, nullable=False)
+    status = Column(Enum(DeliveryJobStatusEnum), default=DeliveryJobStatusEnum.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, default=datetime.utcnow)  # Not claimable before this (retry backoff)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+class ReminderShardLease(Base):
+    """One row per reminder shard - a process must hold the lease to process that shard's reminders"""
+    __tablename__ = "reminder_shard_leases"
+    
+    shard = Column(Integer, primary_key=True)  # Covers preferences with user_id % REMINDER_SHARDS == shard
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    completed_cycle = Column(Integer, default=-1, nullable=False)  # Last reminder cycle this shard finished
+    completed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DeliveryRetry(Base):
+    """A failed delivery waiting to be sent again - drained by DeliveryRetries once available_at passes"""
+    __tablename__ = "delivery_retries"
+    __table_args__ = (
+        # The drain job claims due retries (available_at passed, no live lease) in this order
+        Index("ix_delivery_retries_due", "available_at", "id"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))
+    delivery_type = Column(String)
+    attempts = Column(Integer, default=1, nullable=False)  # Sends so far, including the original one
+    available_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)  # When the first attempt failed
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class DeadLetterDelivery(Base):
+    """A delivery that failed DELIVERY_RETRY_MAX_ATTEMPTS times - kept for admins to inspect and replay"""
+    __tablename__ = "dead_letter_deliveries"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    delivery_type = Column(String)
+    attempts = Column(Integer, nullable=False)
+    last_error = Column(Text, nullable=True)
+    first_failed_at = Column(DateTime)
+    dead_at = Column(DateTime, default=datetime.utcnow)
@@ -35,3 +35,11 @@ class Team(Base):
     
     # Relationships
     members = relationship("User", secondary=user_team_association, back_populates="teams")
+
+class AudienceVersion(Base):
+    __tablename__ = "audience_version"
+    
+    # Single row, bumped in the same transaction as any user/team membership change
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -1,47 +1,206 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, List, Optional
+from ..core import config
+from ..core.circuit_breaker import CircuitBreaker, CircuitBreakers, circuit_breakers
+from ..core.dispatch_lanes import DispatchLanes, PriorityLimiter, dispatch_lanes
+from ..core.realtime import RealtimeHub, realtime_hub
+from ..core.smtp_pool import SMTPConnectionPool, get_smtp_pool
+from ..core.webhook_pool import WebhookPool, get_webhook_pool
 from ..models.user import User
-from ..models.alert import Alert
+from ..models.alert import Alert, SeverityEnum
+
+def alert_event(alert: Alert) -> Dict[str, Any]:
+    """Realtime event announcing a new (or updated) alert"""
+    return {
+        "type": "alert",
+        "alert": {
+            "id": alert.id,
+            "title": alert.title,
+            "message": alert.message,
+            "severity": alert.severity.value,
+            "created_at": alert.created_at.isoformat() if alert.created_at else None
+        }
+    }
+
+def render_digest(alerts: List[Alert]) -> Alert:
+    """Fold several alerts into one unsaved Alert - the message a reminder digest sends.
+    
+    Most severe alerts are listed first, and the digest takes the highest severity among them.
+    """
+    severities = list(SeverityEnum)
+    alerts = sorted(alerts, key=lambda alert: severities.index(alert.severity), reverse=True)
+    return Alert(
+        title=f"{len(alerts)} unread alert{'s' if len(alerts) != 1 else ''}",
+        message="\n".join(f"- [{alert.severity.value.upper()}] {alert.title}: {alert.message}" for alert in alerts),
+        severity=alerts[0].severity,
+        delivery_type=alerts[0].delivery_type,
+        created_at=datetime.utcnow()
+    )
+
+def is_permanent_error(error: Exception) -> bool:
+    """Whether resending can't help - an HTTP 4xx other than timeout/rate limiting"""
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code is not None and 400 <= status_code < 500 and status_code not in (408, 429)
 
 class NotificationStrategy(ABC):
     """Strategy pattern for different notification delivery methods"""
     
+    # Most recipients handed to one send_batch call - raise it for providers with a bulk API.
+    # Each call holds one slot of the channel's concurrency limit
+    max_batch_size = 1
+    
     @abstractmethod
     async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
         pass
     
+    async def send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        """Send an alert to several users; returns one result per user, in the same order.
+        
+        The default sends to each user individually - override it for providers that accept
+        many recipients per request, reporting per-recipient failures in the results. Failed
+        results are retried later unless they carry "retryable": False.
+        """
+        results = await asyncio.gather(
+            *(self.send_notification(user, alert) for user in users), return_exceptions=True
+        )
+        return [
+            {"status": "failed", "error": str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+    
+    async def send_digest(self, user: User, alerts: List[Alert]) -> Dict[str, Any]:
+        """Remind a user of several alerts in one send; returns a single result covering all of them.
+        
+        The default renders the alerts into one message (render_digest) and sends it as an alert.
+        """
+        return await self.send_notification(user, render_digest(alerts))
+    
     @abstractmethod
     def get_channel_name(self) -> str:
         pass
 
 class InAppNotificationStrategy(NotificationStrategy):
-    """In-app notification strategy (MVP implementation)"""
+    """In-app notification strategy - pushes the alert to the users' open realtime connections.
+    
+    The inbox (GET /user/alerts) remains the source of truth, so a user with no open
+    connection still counts as delivered and sees the alert on their next fetch.
+    """
+    
+    # Publishing is a few queue puts per user - no point in one dispatch task per recipient
+    max_batch_size = 500
+    
+    def __init__(self, hub: RealtimeHub = None):
+        self.hub = hub or realtime_hub
     
     async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
-        # For MVP, we just mark as "sent" - in real implementation, 
-        # this could push to WebSocket connections, store in cache, etc.
+        return (await self.send_batch([user], alert))[0]
+    
+    async def send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        self.hub.publish_many([user.id for user in users], alert_event(alert))
+        return [
+            {
+                "status": "sent",
+                "channel": "in_app",
+                "user_id": user.id,
+                "alert_id": alert.id,
+                "message": f"Alert: {alert.title}"
+            }
+            for user in users
+        ]
+    
+    async def send_digest(self, user: User, alerts: List[Alert]) -> Dict[str, Any]:
+        self.hub.publish(user.id, {
+            "type": "reminder_digest",
+            "alerts": [alert_event(alert)["alert"] for alert in alerts]
+        })
         return {
             "status": "sent",
             "channel": "in_app",
             "user_id": user.id,
-            "alert_id": alert.id,
-            "message": f"Alert: {alert.title}"
+            "alert_ids": [alert.id for alert in alerts]
         }
     
     def get_channel_name(self) -> str:
         return "in_app"
 
 class EmailNotificationStrategy(NotificationStrategy):
-    """Email notification strategy (future implementation)"""
+    """Email notification strategy - SMTP through a pool of logged-in connections.
+    
+    A batch goes out as one message with every recipient in the envelope (users never see
+    each other's addresses - there is no To/Cc header listing them), so a fan-out costs one
+    DATA transfer per SMTP_RECIPIENTS_PER_MESSAGE users instead of one per user.
+    """
+    
+    max_batch_size = config.SMTP_RECIPIENTS_PER_MESSAGE
+    
+    def __init__(self, pool: SMTPConnectionPool = None, sender: str = None):
+        self._pool = pool
+        self.sender = sender or config.SMTP_FROM
+    
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        # Resolved lazily so importing the strategy never opens connections
+        if self._pool is None:
+            self._pool = get_smtp_pool()
+        return self._pool
     
     async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
-        # Future implementation - integrate with email service
-        return {
-            "status": "not_implemented",
+        return (await self.send_batch([user], alert))[0]
+    
+    async def send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        if not self.pool.configured:
+            return [self._result(user, alert, "failed", "SMTP_HOST is not configured", retryable=False) for user in users]
+        
+        recipients = [user for user in users if user.email]
+        if recipients:
+            from aiosmtplib import SMTPException, SMTPRecipientsRefused
+            try:
+                refused, _ = await self.pool.send_message(
+                    self._build_message(alert), self.sender, [user.email for user in recipients]
+                )
+            except SMTPRecipientsRefused as e:
+                refused = {error.recipient: error for error in e.recipients}
+            except (SMTPException, OSError, asyncio.TimeoutError) as e:
+                return [self._result(user, alert, "failed", str(e) or type(e).__name__) for user in users]
+        else:
+            refused = {}
+        
+        results = []
+        for user in users:
+            if not user.email:
+                results.append(self._result(user, alert, "failed", "user has no email address", retryable=False))
+            elif user.email in refused:
+                # 4xx replies are temporary (mailbox busy, greylisting); 5xx are final
+                results.append(self._result(user, alert, "failed", f"recipient refused: {refused[user.email]}",
+                                            retryable=getattr(refused[user.email], "code", 0) < 500))
+            else:
+                results.append(self._result(user, alert, "sent"))
+        return results
+    
+    def _build_message(self, alert: Alert) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = "undisclosed-recipients:;"
+        message["Subject"] = f"[{alert.severity.value.upper()}] {alert.title}"
+        message.set_content(alert.message)
+        return message
+    
+    @staticmethod
+    def _result(user: User, alert: Alert, status: str, error: str = None, retryable: bool = True) -> Dict[str, Any]:
+        result = {
+            "status": status,
             "channel": "email",
             "user_id": user.id,
             "alert_id": alert.id
         }
+        if error is not None:
+            result["error"] = error
+        if not retryable:
+            result["retryable"] = False
+        return result
     
     def get_channel_name(self) -> str:
         return "email"
@@ -61,19 +220,237 @@ class SMSNotificationStrategy(NotificationStrategy):
     def get_channel_name(self) -> str:
         return "sms"
 
+class WebhookNotificationStrategy(NotificationStrategy):
+    """Webhook notification strategy - POSTs alerts to HTTP endpoints through a shared WebhookPool.
+    
+    endpoint_for(user, alert) picks each recipient's URL (by default WEBHOOK_URL for everyone).
+    A batch posts one payload per endpoint - the alert plus the recipients routed there - so a
+    chat channel shared by many users receives the alert once, not once per user.
+    """
+    
+    max_batch_size = config.WEBHOOK_RECIPIENTS_PER_REQUEST
+    
+    def __init__(self, pool: WebhookPool = None,
+                 endpoint_for: Callable[[User, Alert], Optional[str]] = None):
+        self._pool = pool
+        self._endpoint_for = endpoint_for or (lambda user, alert: config.WEBHOOK_URL or None)
+    
+    @property
+    def pool(self) -> WebhookPool:
+        if self._pool is None:
+            self._pool = get_webhook_pool()
+        return self._pool
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        return (await self.send_batch([user], alert))[0]
+    
+    async def send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        routes = [self._endpoint_for(user, alert) for user in users]
+        by_endpoint: Dict[str, List[User]] = {}
+        for user, url in zip(users, routes):
+            if url:
+                by_endpoint.setdefault(url, []).append(user)
+        
+        urls = list(by_endpoint)
+        outcomes = await asyncio.gather(
+            *(self.pool.post(url, self._payload(alert, by_endpoint[url])) for url in urls), return_exceptions=True
+        )
+        errors = {
+            url: outcome if isinstance(outcome, Exception) else None
+            for url, outcome in zip(urls, outcomes)
+        }
+        
+        results = []
+        for user, url in zip(users, routes):
+            if not url:
+                results.append(self._result(user, alert, "failed", "no webhook endpoint configured", retryable=False))
+            elif errors[url] is not None:
+                results.append(self._result(user, alert, "failed", str(errors[url]) or type(errors[url]).__name__,
+                                            retryable=not is_permanent_error(errors[url])))
+            else:
+                results.append(self._result(user, alert, "sent"))
+        return results
+    
+    async def send_digest(self, user: User, alerts: List[Alert]) -> Dict[str, Any]:
+        result = {"channel": "webhook", "user_id": user.id, "alert_ids": [alert.id for alert in alerts]}
+        url = self._endpoint_for(user, alerts[0])
+        if not url:
+            return {**result, "status": "failed", "error": "no webhook endpoint configured", "retryable": False}
+        
+        payload = self._payload(render_digest(alerts), [user])
+        payload["alert_ids"] = result["alert_ids"]
+        try:
+            await self.pool.post(url, payload)
+        except Exception as e:
+            return {**result, "status": "failed", "error": str(e) or type(e).__name__,
+                    "retryable": not is_permanent_error(e)}
+        return {**result, "status": "sent"}
+    
+    @staticmethod
+    def _payload(alert: Alert, users: List[User]) -> Dict[str, Any]:
+        return {
+            "alert_id": alert.id,
+            "title": alert.title,
+            "message": alert.message,
+            "severity": alert.severity.value,
+            "created_at": alert.created_at,
+            "recipients": [{"user_id": user.id, "name": user.name, "email": user.email} for user in users]
+        }
+    
+    @staticmethod
+    def _result(user: User, alert: Alert, status: str, error: str = None, retryable: bool = True) -> Dict[str, Any]:
+        result = {
+            "status": status,
+            "channel": "webhook",
+            "user_id": user.id,
+            "alert_id": alert.id
+        }
+        if error is not None:
+            result["error"] = error
+        if not retryable:
+            result["retryable"] = False
+        return result
+    
+    def get_channel_name(self) -> str:
+        return "webhook"
+
+class CircuitBreakerStrategy(NotificationStrategy):
+    """Wraps a channel's strategy in its circuit breaker.
+    
+    While the circuit is open, sends fail fast (retryable - DeliveryRetries picks them up once
+    the channel is back) instead of each waiting out the provider's timeout; critical alerts are
+    sent through the fallback channel instead. A call counts as failed when it raises or every
+    result in it failed for a reason worth retrying - permanent per-recipient errors (a bad
+    address, a 4xx) say nothing about the provider's health.
+    """
+    
+    def __init__(self, strategy: NotificationStrategy, breaker: CircuitBreaker,
+                 fallback: Callable[[], Optional[NotificationStrategy]] = None):
+        self.strategy = strategy
+        self.breaker = breaker
+        self.fallback = fallback or (lambda: None)
+    
+    @property
+    def max_batch_size(self) -> int:
+        return self.strategy.max_batch_size
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        return (await self.send_batch([user], alert))[0]
+    
+    async def send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        if not self.breaker.allow():
+            fallback = self._fallback([alert])
+            if fallback is not None:
+                self.breaker.fallbacks += len(users)
+                return await fallback.send_batch(users, alert)
+            return [self._open_result() for _ in users]
+        
+        try:
+            results = await self.strategy.send_batch(users, alert)
+        except asyncio.CancelledError:
+            # Says nothing about the provider - but a cancelled probe must still hand its turn back
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self._record(results)
+        return results
+    
+    async def send_digest(self, user: User, alerts: List[Alert]) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            fallback = self._fallback(alerts)
+            if fallback is not None:
+                self.breaker.fallbacks += 1
+                return await fallback.send_digest(user, alerts)
+            return self._open_result()
+        
+        try:
+            result = await self.strategy.send_digest(user, alerts)
+        except asyncio.CancelledError:
+            # Says nothing about the provider - but a cancelled probe must still hand its turn back
+            self.breaker.record_cancelled()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self._record([result])
+        return result
+    
+    def get_channel_name(self) -> str:
+        return self.strategy.get_channel_name()
+    
+    def _fallback(self, alerts: List[Alert]) -> Optional[NotificationStrategy]:
+        if any(alert.severity == SeverityEnum.CRITICAL for alert in alerts):
+            return self.fallback()
+        return None
+    
+    def _record(self, results: List[Dict[str, Any]]):
+        if results and all(
+            result.get("status") == "failed" and result.get("retryable", True) for result in results
+        ):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+    
+    def _open_result(self) -> Dict[str, Any]:
+        return {"status": "failed", "error": f"circuit open for channel {self.breaker.channel}"}
+
 class NotificationContext:
     """Context class for strategy pattern"""
     
-    def __init__(self):
+    def __init__(self, breakers: CircuitBreakers = None, lanes: DispatchLanes = None):
+        self.breakers = breakers or circuit_breakers
+        self.lanes = lanes or dispatch_lanes
         self._strategies = {
-            "in_app": InAppNotificationStrategy(),
-            "email": EmailNotificationStrategy(),
-            "sms": SMSNotificationStrategy()
+            channel: self._wrap(channel, strategy)
+            for channel, strategy in (
+                ("in_app", InAppNotificationStrategy()),
+                ("email", EmailNotificationStrategy()),
+                ("sms", SMSNotificationStrategy()),
+                ("webhook", WebhookNotificationStrategy())
+            )
         }
+        self._concurrency_limits = dict(config.CHANNEL_CONCURRENCY_LIMITS)
+        self._digest_channels = set(config.REMINDER_DIGEST_CHANNELS)
     
     def get_strategy(self, channel: str) -> NotificationStrategy:
         return self._strategies.get(channel, self._strategies["in_app"])
     
-    def add_strategy(self, channel: str, strategy: NotificationStrategy):
+    def add_strategy(self, channel: str, strategy: NotificationStrategy, concurrency_limit: int = None):
         """Allows adding new notification strategies dynamically"""
-        self._strategies[channel] = strategy
+        self._strategies[channel] = self._wrap(channel, strategy)
+        if concurrency_limit is not None:
+            self.set_concurrency_limit(channel, concurrency_limit)
+    
+    def set_concurrency_limit(self, channel: str, limit: int):
+        """Set the maximum number of concurrent sends for a channel (process-wide)"""
+        self._concurrency_limits[channel] = limit
+        self.get_limiter(channel).set_limit(limit)
+    
+    def get_concurrency_limit(self, channel: str) -> int:
+        return self._concurrency_limits.get(channel, config.DEFAULT_CHANNEL_CONCURRENCY)
+    
+    def get_limiter(self, channel: str) -> PriorityLimiter:
+        """Limiter bounding in-flight sends for a channel, handing out slots by severity lane"""
+        return self.lanes.get(channel, self.get_concurrency_limit(channel))
+    
+    def set_digest_mode(self, channel: str, enabled: bool):
+        """Coalesce a channel's reminders into one digest per user and cycle (or stop doing so)"""
+        if enabled:
+            self._digest_channels.add(channel)
+        else:
+            self._digest_channels.discard(channel)
+    
+    def uses_digest(self, channel: str) -> bool:
+        return channel in self._digest_channels
+    
+    def _wrap(self, channel: str, strategy: NotificationStrategy) -> NotificationStrategy:
+        """Put a strategy behind the channel's (process-wide) circuit breaker"""
+        return CircuitBreakerStrategy(strategy, self.breakers.get(channel), lambda: self._fallback_for(channel))
+    
+    def _fallback_for(self, channel: str) -> Optional[NotificationStrategy]:
+        fallback = config.CIRCUIT_FALLBACK_CHANNEL
+        if not fallback or fallback == channel or fallback not in self._strategies:
+            return None
+        return self._strategies[fallback]
@@ -1,10 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from ..core import config
+from ..core.event_bus import AlertEventBus, alert_event_bus
+from ..database import SessionLocal
 from ..models.alert import Alert
 
 class AlertObserver(ABC):
     """Observer pattern for alert events"""
     
+    # Seconds each event may take before it is cancelled (None = the event bus default)
+    timeout_seconds: Optional[float] = None
+    
     @abstractmethod
     async def on_alert_created(self, alert: Alert) -> None:
         pass
@@ -17,45 +25,71 @@ class AlertObserver(ABC):
     async def on_alert_expired(self, alert: Alert) -> None:
         pass
 
-class NotificationObserver(AlertObserver):
+class ServiceObserver(AlertObserver):
+    """Observer backed by a service - each event opens its own session, since events run after the request's is closed"""
+    
+    def __init__(self, service_factory: Callable[[Session], Any], session_factory: Callable[[], Session] = None):
+        self.service_factory = service_factory
+        self.session_factory = session_factory or SessionLocal
+    
+    @contextmanager
+    def _service(self, alert: Alert) -> Iterator[Tuple[Any, Optional[Alert]]]:
+        """A service on a fresh session, and the alert re-read through it (None if it is gone)"""
+        db = self.session_factory()
+        try:
+            yield self.service_factory(db), db.get(Alert, alert.id)
+        finally:
+            db.close()
+
+class NotificationObserver(ServiceObserver):
     """Observer that handles notifications when alerts change"""
     
-    def __init__(self, notification_service):
-        self.notification_service = notification_service
+    @property
+    def timeout_seconds(self) -> float:
+        return config.ALERT_NOTIFICATION_TIMEOUT_SECONDS
     
     async def on_alert_created(self, alert: Alert) -> None:
         """Trigger initial notifications when alert is created"""
-        await self.notification_service.process_new_alert(alert)
+        with self._service(alert) as (notification_service, alert):
+            if alert is not None:
+                await notification_service.process_new_alert(alert)
     
     async def on_alert_updated(self, alert: Alert) -> None:
         """Handle alert updates"""
-        if alert.is_active:
-            await self.notification_service.process_alert_update(alert)
+        with self._service(alert) as (notification_service, alert):
+            if alert is not None and alert.is_active:
+                await notification_service.process_alert_update(alert)
     
     async def on_alert_expired(self, alert: Alert) -> None:
         """Clean up when alert expires"""
-        await self.notification_service.process_alert_expiry(alert)
+        with self._service(alert) as (notification_service, alert):
+            if alert is not None:
+                await notification_service.process_alert_expiry(alert)
 
-class AnalyticsObserver(AlertObserver):
+class AnalyticsObserver(ServiceObserver):
     """Observer that tracks analytics for alerts"""
     
-    def __init__(self, analytics_service):
-        self.analytics_service = analytics_service
-    
     async def on_alert_created(self, alert: Alert) -> None:
-        await self.analytics_service.track_alert_created(alert)
+        with self._service(alert) as (analytics_service, alert):
+            if alert is not None:
+                await analytics_service.track_alert_created(alert)
     
     async def on_alert_updated(self, alert: Alert) -> None:
-        await self.analytics_service.track_alert_updated(alert)
+        with self._service(alert) as (analytics_service, alert):
+            if alert is not None:
+                await analytics_service.track_alert_updated(alert)
     
     async def on_alert_expired(self, alert: Alert) -> None:
-        await self.analytics_service.track_alert_expired(alert)
+        with self._service(alert) as (analytics_service, alert):
+            if alert is not None:
+                await analytics_service.track_alert_expired(alert)
 
 class AlertSubject:
-    """Subject class for observer pattern"""
+    """Subject class for observer pattern - observers run on the event bus, not in the caller"""
     
-    def __init__(self):
+    def __init__(self, bus: AlertEventBus = None):
         self._observers: List[AlertObserver] = []
+        self.bus = bus or alert_event_bus
     
     def attach(self, observer: AlertObserver) -> None:
         self._observers.append(observer)
@@ -65,13 +99,10 @@ class AlertSubject:
             self._observers.remove(observer)
     
     async def notify_created(self, alert: Alert) -> None:
-        for observer in self._observers:
-            await observer.on_alert_created(alert)
+        await self.bus.publish(self._observers, "on_alert_created", alert)
     
     async def notify_updated(self, alert: Alert) -> None:
-        for observer in self._observers:
-            await observer.on_alert_updated(alert)
+        await self.bus.publish(self._observers, "on_alert_updated", alert)
     
     async def notify_expired(self, alert: Alert) -> None:
-        for observer in self._observers:
-            await observer.on_alert_expired(alert)
+        await self.bus.publish(self._observers, "on_alert_expired", alert)
@@ -17,6 +17,11 @@ class AlertState(ABC):
     def should_remind(self, preference) -> bool:
         pass
     
+    @abstractmethod
+    def next_reminder_at(self, preference) -> Optional[datetime]:
+        """When the next reminder for this preference is due (None = never)"""
+        pass
+    
     @abstractmethod
     def get_state_name(self) -> str:
         pass
@@ -40,6 +45,12 @@ class UnreadState(AlertState):
         time_since_last_reminder = datetime.utcnow() - preference.last_reminded_at
         return time_since_last_reminder.total_seconds() >= preference.alert.reminder_frequency_hours * 3600
     
+    def next_reminder_at(self, preference) -> Optional[datetime]:
+        if preference.last_reminded_at is None:
+            return preference.created_at or datetime.utcnow()
+        
+        return preference.last_reminded_at + timedelta(hours=preference.alert.reminder_frequency_hours)
+    
     def get_state_name(self) -> str:
         return "unread"
 
@@ -58,6 +69,9 @@ class ReadState(AlertState):
         # Don't remind for read alerts
         return False
     
+    def next_reminder_at(self, preference) -> Optional[datetime]:
+        return None
+    
     def get_state_name(self) -> str:
         return "read"
 
@@ -86,6 +100,13 @@ class SnoozedState(AlertState):
         
         return False
     
+    def next_reminder_at(self, preference) -> Optional[datetime]:
+        if preference.snoozed_until is not None:
+            return preference.snoozed_until
+        
+        # Snooze has lapsed - remind on the regular unread schedule
+        return UnreadState().next_reminder_at(preference)
+    
     def get_state_name(self) -> str:
         return "snoozed"
 
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from ..database import get_db
-from ..services.alert_service import AlertService
+from ..database import get_db, get_route_db
+from ..services.alert_service import AlertService, AsyncAlertService
 from ..services.notification_service import NotificationService
 from ..services.analytics_service import AnalyticsService
+from ..services.delivery_retries import delivery_retries
 from ..patterns.observer import AlertSubject, NotificationObserver, AnalyticsObserver
+from ..core import config
 from ..schemas.alert import AlertCreate, AlertUpdate, AlertResponse
+from ..schemas.notification import DeadLetterReplay, DeadLetterResponse
 from ..models.user import User
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -17,12 +20,11 @@ def get_alert_service(db: Session = Depends(get_db)) -> AlertService:
     """Dependency to create AlertService with observers"""
     alert_subject = AlertSubject()
     
-    # Attach observers
-    notification_service = NotificationService(db)
-    analytics_service = AnalyticsService(db)
-    
-    alert_subject.attach(NotificationObserver(notification_service))
-    alert_subject.attach(AnalyticsObserver(analytics_service))
+    # Attach observers - they run after the response, each on its own session
+    if not config.USE_DELIVERY_OUTBOX:
+        # With the outbox, delivery jobs are committed with the alert and sent by app.worker
+        alert_subject.attach(NotificationObserver(NotificationService))
+    alert_subject.attach(AnalyticsObserver(AnalyticsService))
     
     return AlertService(db, alert_subject)
 
@@ -88,7 +90,7 @@ async def get_admin_alerts(
     severity: Optional[str] = None,
     is_active: Optional[bool] = None,
     visibility_type: Optional[str] = None,
-    alert_service: AlertService = Depends(get_alert_service),
+    db=Depends(get_route_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get alerts created by the admin with optional filters"""
@@ -103,7 +105,7 @@ async def get_admin_alerts(
     if visibility_type:
         filters["visibility_type"] = visibility_type
     
-    alerts = alert_service.get_alerts_by_admin(current_user.id, filters)
+    alerts = await AsyncAlertService(db).get_alerts_by_admin(current_user.id, filters)
     return [AlertResponse.from_orm(alert) for alert in alerts]
 
 @router.post("/alerts/trigger-reminders")
@@ -116,6 +118,33 @@ async def trigger_reminders(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     notification_service = NotificationService(db)
-    await notification_service.process_reminders()
+    dispatch_stats = await notification_service.process_reminders()
+    
+    return {"message": "Reminders processed", "dispatch": dispatch_stats}
+
+@router.get("/dead-letters", response_model=List[DeadLetterResponse])
+async def get_dead_letters(
+    alert_id: Optional[int] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """List deliveries that failed every retry, newest first (optionally for one alert, paginated by cursor)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return [DeadLetterResponse.from_orm(row) for row in delivery_retries.dead_letters(db, alert_id, cursor, limit)]
+
+@router.post("/dead-letters/replay")
+async def replay_dead_letters(
+    replay: DeadLetterReplay,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Queue dead-lettered deliveries for another round of retries (by id, by alert, or all)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
     
-    return {"message": "Reminders processed"}
+    replayed = delivery_retries.replay(db, replay.ids, replay.alert_id)
+    return {"message": "Dead letters queued for retry", "replayed": replayed}
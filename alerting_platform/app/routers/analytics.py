@@ -1,11 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta
 
-from ..database import get_db
-from ..services.analytics_service import AnalyticsService
-from ..schemas.analytics import SystemMetrics, AlertPerformance, UserEngagement
+from ..database import get_route_db, open_route_session
+from ..services.analytics_service import AsyncAnalyticsService
+from ..services.delivery_retries import delivery_retries
+from ..services.rollup_service import AsyncRollupService
+from ..schemas.analytics import SystemMetrics, AlertPerformance, UserEngagement, TrendBucket, RollupRun, ReadLatency
+from ..models.alert import SeverityEnum
 from ..models.user import User
+from ..core import config
+from ..core.circuit_breaker import circuit_breakers
+from ..core.dispatch_lanes import dispatch_lanes
+from ..core.event_bus import alert_event_bus
+from ..core.inbox_cache import inbox_cache
+from ..core.realtime import realtime_hub
+from ..core.response_cache import analytics_cache
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
@@ -13,32 +24,43 @@ def get_current_admin_user() -> User:
     """Mock function - replace with proper authentication"""
     return User(id=1, name="Admin", email="admin@example.com", role="admin")
 
-def get_analytics_service(db: Session = Depends(get_db)) -> AnalyticsService:
-    return AnalyticsService(db)
+def get_analytics_service(db=Depends(get_route_db)) -> AsyncAnalyticsService:
+    return AsyncAnalyticsService(db)
+
+def get_rollup_service(db=Depends(get_route_db)) -> AsyncRollupService:
+    return AsyncRollupService(db)
+
+async def cached_analytics(endpoint: str, key, compute):
+    """Serve an analytics response through the shared cache; compute(service) runs with its own session"""
+    async def run():
+        async with open_route_session() as db:
+            return await compute(AsyncAnalyticsService(db))
+    
+    return await analytics_cache.get_or_compute((endpoint, key), run, config.ANALYTICS_CACHE_TTL_SECONDS[endpoint])
 
 @router.get("/system", response_model=SystemMetrics)
 async def get_system_metrics(
-    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get system-wide analytics metrics"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    metrics = analytics_service.get_system_metrics()
+    metrics = await cached_analytics("system", None, lambda service: service.get_system_metrics())
     return SystemMetrics(**metrics)
 
 @router.get("/alerts/{alert_id}", response_model=AlertPerformance)
 async def get_alert_performance(
     alert_id: int,
-    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get performance metrics for a specific alert"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    performance = analytics_service.get_alert_performance(alert_id)
+    performance = await cached_analytics(
+        "alert_performance", alert_id, lambda service: service.get_alert_performance(alert_id)
+    )
     if not performance:
         raise HTTPException(status_code=404, detail="Alert not found")
     
@@ -46,12 +68,149 @@ async def get_alert_performance(
 
 @router.get("/users/engagement", response_model=List[UserEngagement])
 async def get_user_engagement(
-    analytics_service: AnalyticsService = Depends(get_analytics_service),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get user engagement metrics"""
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    engagement = analytics_service.get_user_engagement_metrics()
+    engagement = await cached_analytics("user_engagement", None, lambda service: service.get_user_engagement_metrics())
     return [UserEngagement(**item) for item in engagement]
+
+@router.get("/response-cache")
+async def get_response_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get hit/stale/coalesced counters of the analytics response cache"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return analytics_cache.stats()
+
+@router.get("/read-latency", response_model=List[ReadLatency])
+async def get_read_latency(
+    breakdown: Optional[str] = Query(None, description="severity or team"),
+    percentile: List[float] = Query([50, 90, 99]),
+    analytics_service: AsyncAnalyticsService = Depends(get_analytics_service),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get time-to-read percentiles (alert creation to read) from streaming sketches"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if breakdown not in (None, "severity", "team"):
+        raise HTTPException(status_code=400, detail="breakdown must be 'severity' or 'team'")
+    if any(not 0 <= p <= 100 for p in percentile):
+        raise HTTPException(status_code=400, detail="percentile must be between 0 and 100")
+    
+    latency = await analytics_service.get_read_latency(breakdown, percentile)
+    return [ReadLatency(**item) for item in latency]
+
+@router.get("/inbox-cache")
+async def get_inbox_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get hit/miss counters and size of the per-user inbox cache"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return inbox_cache.stats()
+
+@router.get("/realtime")
+async def get_realtime_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get open realtime connections and push/overflow counters"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return realtime_hub.stats()
+
+@router.get("/delivery-retries")
+async def get_delivery_retry_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get the number of deliveries waiting for a retry, due now, and dead-lettered"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return delivery_retries.stats()
+
+@router.get("/circuit-breakers")
+async def get_circuit_breaker_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get each channel's circuit state, transition counts, fast-failed sends and fallbacks"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return circuit_breakers.stats()
+
+@router.get("/dispatch-lanes")
+async def get_dispatch_lane_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get queue depth and wait times of each channel's severity lanes"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return dispatch_lanes.stats()
+
+@router.get("/alert-events")
+async def get_alert_event_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get each observer's queued and in-flight alert events, failures and timeouts"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return alert_event_bus.stats()
+
+@router.get("/trends", response_model=List[TrendBucket])
+async def get_trends(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: str = Query("hour", description="hour or day"),
+    alert_id: Optional[int] = None,
+    severity: Optional[str] = None,
+    channel: Optional[str] = None,
+    rollup_service: AsyncRollupService = Depends(get_rollup_service),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get delivery/read/snooze counts over time from the hourly rollups (default: last 7 days)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if granularity not in ("hour", "day"):
+        raise HTTPException(status_code=400, detail="granularity must be 'hour' or 'day'")
+    
+    severity_enum = None
+    if severity is not None:
+        try:
+            severity_enum = SeverityEnum(severity)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"severity must be one of {sorted(s.value for s in SeverityEnum)}")
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    trends = await rollup_service.get_trends(
+        start, end, granularity, alert_id=alert_id, severity=severity_enum, channel=channel
+    )
+    return [TrendBucket(**bucket) for bucket in trends]
+
+@router.post("/rollups/backfill", response_model=RollupRun)
+async def backfill_rollups(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    rollup_service: AsyncRollupService = Depends(get_rollup_service),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Rebuild the hourly rollups for a range (default: all history) from the raw tables"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    result = await rollup_service.backfill(start, end)
+    return RollupRun(**result)
@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from ..database import get_db
-from ..services.alert_service import AlertService
-from ..services.notification_service import NotificationService
+from ..core import config
+from ..core.inbox_cache import inbox_cache
+from ..core.inbox_versions import inbox_versions
+from ..core.realtime import Subscription, realtime_hub
+from ..database import get_db, get_route_db
+from ..services.alert_service import AlertService, AsyncAlertService
+from ..services.notification_service import NotificationService, AsyncNotificationService
 from ..patterns.observer import AlertSubject, NotificationObserver
 from ..models.user import User
+from ..models.notification import UserAlertStateEnum
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -17,27 +23,62 @@ def get_current_user() -> User:
 
 def get_alert_service(db: Session = Depends(get_db)) -> AlertService:
     alert_subject = AlertSubject()
-    notification_service = NotificationService(db)
-    alert_subject.attach(NotificationObserver(notification_service))
+    alert_subject.attach(NotificationObserver(NotificationService))
     return AlertService(db, alert_subject)
 
 @router.get("/alerts")
 async def get_user_alerts(
-    alert_service: AlertService = Depends(get_alert_service),
+    request: Request,
+    response: Response,
+    state: Optional[List[str]] = Query(None),
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    wait: Optional[float] = Query(None, ge=0, le=config.INBOX_LONG_POLL_MAX_SECONDS),
+    db=Depends(get_route_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get alerts for the current user"""
-    alerts = alert_service.get_alerts_for_user(current_user.id)
+    """Get alerts for the current user, newest first (optionally filtered by state and paginated by cursor).
+    
+    The response carries an ETag that changes whenever the user's inbox does. With a matching
+    If-None-Match the answer is 304 without touching the database; adding wait=N holds that
+    request for up to N seconds until the inbox changes (long-polling).
+    """
+    valid_states = {state_enum.value for state_enum in UserAlertStateEnum}
+    if state and not set(state) <= valid_states:
+        raise HTTPException(status_code=400, detail=f"state must be one of {sorted(valid_states)}")
+    
+    # Taken before the query, so a change that lands while it runs gets a new ETag on the next poll
+    etag = inbox_versions.etag(current_user.id)
+    if etag in _if_none_match(request) and not inbox_versions.needs_validation(current_user.id):
+        if wait:
+            etag = await inbox_versions.wait_for_change(current_user.id, etag, wait)
+        if etag in _if_none_match(request) and not inbox_versions.needs_validation(current_user.id):
+            return _not_modified(etag)
+    
+    alerts = await AsyncAlertService(db).get_alerts_for_user(current_user.id, state, cursor, limit)
+    # Keeps the ETag unless the inbox changed without this process seeing it
+    etag = inbox_versions.validate(current_user.id, inbox_cache.make_key(state, cursor, limit), etag, alerts)
+    if etag in _if_none_match(request):
+        return _not_modified(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return alerts
 
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+def _if_none_match(request: Request) -> List[str]:
+    header = request.headers.get("if-none-match")
+    return [tag.strip() for tag in header.split(",")] if header else []
+
 @router.post("/alerts/{alert_id}/read")
 async def mark_alert_read(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_route_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark an alert as read"""
-    notification_service = NotificationService(db)
+    notification_service = AsyncNotificationService(db)
     success = await notification_service.mark_alert_read(current_user.id, alert_id)
     
     if not success:
@@ -48,14 +89,46 @@ async def mark_alert_read(
 @router.post("/alerts/{alert_id}/snooze")
 async def snooze_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_route_db),
     current_user: User = Depends(get_current_user)
 ):
     """Snooze an alert until end of day"""
-    notification_service = NotificationService(db)
+    notification_service = AsyncNotificationService(db)
     success = await notification_service.snooze_alert(current_user.id, alert_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     return {"message": "Alert snoozed until end of day"}
+
+@router.websocket("/ws")
+async def alert_stream(
+    websocket: WebSocket,
+    current_user: User = Depends(get_current_user)
+):
+    """Push new alerts and read/snooze changes for the current user as they happen.
+    
+    Messages are JSON: {"type": "alert", "alert": {...}}, {"type": "alert_state", ...}, or
+    {"type": "resync"} when the client fell too far behind and should re-fetch GET /user/alerts.
+    """
+    await websocket.accept()
+    subscription = realtime_hub.subscribe(current_user.id)
+    sender = asyncio.create_task(_push_events(websocket, subscription))
+    try:
+        while True:
+            # Nothing is expected from the client - this just notices when it goes away
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        realtime_hub.unsubscribe(subscription)
+        # Collect the sender's outcome (a send to a closed socket fails) so it isn't logged as unhandled
+        await asyncio.gather(sender, return_exceptions=True)
+
+async def _push_events(websocket: WebSocket, subscription: Subscription):
+    while True:
+        event = await subscription.queue.get()
+        await websocket.send_json(event)
@@ -8,6 +8,12 @@ class SeverityEnum(str, Enum):
     WARNING = "warning"
     CRITICAL = "critical"
 
+class DeliveryTypeEnum(str, Enum):
+    IN_APP = "in_app"
+    EMAIL = "email"
+    SMS = "sms"
+    WEBHOOK = "webhook"
+
 class VisibilityTypeEnum(str, Enum):
     ORGANIZATION = "organization"
     TEAM = "team"
@@ -17,6 +23,7 @@ class AlertCreate(BaseModel):
     title: str
     message: str
     severity: SeverityEnum = SeverityEnum.INFO
+    delivery_type: DeliveryTypeEnum = DeliveryTypeEnum.IN_APP
     visibility_type: VisibilityTypeEnum = VisibilityTypeEnum.ORGANIZATION
     target_team_id: Optional[int] = None
     target_user_id: Optional[int] = None
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from datetime import datetime
 
 class SystemMetrics(BaseModel):
     total_alerts_created: int
@@ -16,6 +17,7 @@ class AlertPerformance(BaseModel):
     alert_title: str
     total_target_users: int
     total_deliveries: int
+    digest_deliveries: int
     state_breakdown: Dict[str, int]
     engagement_rate: float
 
@@ -25,3 +27,22 @@ class UserEngagement(BaseModel):
     total_alerts: int
     read_count: int
     read_rate: float
+
+class TrendBucket(BaseModel):
+    bucket_start: datetime
+    sent: int
+    failed: int
+    read: int
+    snoozed: int
+
+class RollupRun(BaseModel):
+    buckets: int
+    rows: int
+
+class ReadLatency(BaseModel):
+    group: str  # "all", "severity:critical", "team:3"
+    count: int
+    min_seconds: Optional[float]
+    max_seconds: Optional[float]
+    mean_seconds: Optional[float]
+    percentiles: Dict[str, Optional[float]]  # e.g. {"p50": 240.0, "p90": ..., "p99": ...}
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+class DeadLetterResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    alert_id: int
+    user_id: int
+    delivery_type: str
+    attempts: int
+    last_error: Optional[str]
+    first_failed_at: Optional[datetime]
+    dead_at: datetime
+
+class DeadLetterReplay(BaseModel):
+    # Narrow the replay to these dead letters and/or one alert; neither replays all of them
+    ids: Optional[List[int]] = None
+    alert_id: Optional[int] = None
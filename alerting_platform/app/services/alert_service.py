@@ -1,11 +1,19 @@
 from typing import List, Optional, Dict, Any
+from sqlalchemy import select, exists, literal, and_, or_
 from sqlalchemy.orm import Session
 from datetime import datetime
-from ..models.alert import Alert, SeverityEnum, VisibilityTypeEnum
-from ..models.user import User, Team
-from ..models.notification import UserAlertPreference, UserAlertStateEnum
+from ..core import config
+from ..core.inbox_cache import inbox_cache
+from ..core.inbox_versions import inbox_versions
+from ..database import dialect_insert, run_in_session
+from ..models.alert import Alert, DeliveryTypeEnum, SeverityEnum, VisibilityTypeEnum
+from ..models.user import User, Team, user_team_association
+from ..models.notification import UserAlertPreference, UserAlertStateEnum, DeliveryJobKindEnum
 from ..patterns.observer import AlertSubject
 from ..patterns.state import AlertStateContext
+from .audience_resolver import audience_resolver
+from .metric_counters import alert_status_counts, metric_counters, state_counter
+from .outbox import enqueue_delivery_jobs
 
 class AlertService:
     """Service for managing alerts with proper separation of concerns"""
@@ -20,6 +28,7 @@ class AlertService:
             title=alert_data["title"],
             message=alert_data["message"],
             severity=SeverityEnum(alert_data.get("severity", "info")),
+            delivery_type=DeliveryTypeEnum(alert_data.get("delivery_type", "in_app")),
             visibility_type=VisibilityTypeEnum(alert_data.get("visibility_type", "organization")),
             target_team_id=alert_data.get("target_team_id"),
             target_user_id=alert_data.get("target_user_id"),
@@ -29,11 +38,17 @@ class AlertService:
         )
         
         self.db.add(alert)
+        self.db.flush()
+        
+        # Create user preferences for all target users - and, with the outbox, the delivery
+        # jobs - in the same transaction as the alert
+        created_preferences = await self._create_user_preferences(alert)
+        if config.USE_DELIVERY_OUTBOX:
+            enqueue_delivery_jobs(self.db, alert, DeliveryJobKindEnum.ALERT_CREATED)
         self.db.commit()
         self.db.refresh(alert)
-        
-        # Create user preferences for all target users
-        await self._create_user_preferences(alert)
+        metric_counters.increment(state_counter(UserAlertStateEnum.UNREAD), created_preferences)
+        self._inbox_changed(alert)
         
         # Notify observers
         await self.alert_subject.notify_created(alert)
@@ -46,13 +61,19 @@ class AlertService:
         if not alert:
             return None
         
+        counts_before = alert_status_counts(alert)
         for key, value in update_data.items():
             if hasattr(alert, key):
                 setattr(alert, key, value)
         
         alert.updated_at = datetime.utcnow()
+        if config.USE_DELIVERY_OUTBOX and alert.is_active:
+            enqueue_delivery_jobs(self.db, alert, DeliveryJobKindEnum.ALERT_UPDATED)
         self.db.commit()
         self.db.refresh(alert)
+        # Only the writer still knows the old values - the counters move by exactly this change
+        metric_counters.increment_change(counts_before, alert_status_counts(alert))
+        self._inbox_changed(alert)
         
         await self.alert_subject.notify_updated(alert)
         return alert
@@ -63,13 +84,38 @@ class AlertService:
         if not alert:
             return False
         
+        counts_before = alert_status_counts(alert)
         alert.is_archived = True
         alert.is_active = False
         alert.updated_at = datetime.utcnow()
+        
+        # Archived alerts never remind again - take their preferences out of the reminder index
+        self.db.query(UserAlertPreference).filter(
+            UserAlertPreference.alert_id == alert_id
+        ).update({UserAlertPreference.next_reminder_at: None}, synchronize_session=False)
         self.db.commit()
+        self.db.refresh(alert)
+        metric_counters.increment_change(counts_before, alert_status_counts(alert))
+        self._inbox_changed(alert)
         
+        # Archiving is an update as far as observers are concerned (inactive alerts aren't re-sent)
+        await self.alert_subject.notify_updated(alert)
         return True
     
+    def _inbox_changed(self, alert: Alert):
+        """Drop the cached inboxes and change the inbox ETag of everyone who can see the alert.
+        
+        Done right after the commit - before observers run, since dispatch can take a while and
+        a woken long-poll must not be answered from a stale cache.
+        """
+        if alert.visibility_type == VisibilityTypeEnum.ORGANIZATION:
+            inbox_cache.invalidate_all()
+            inbox_versions.bump_all()
+        else:
+            audience = audience_resolver.resolve(alert, self.db)
+            inbox_cache.invalidate_users(audience)
+            inbox_versions.bump_users(audience)
+    
     def get_alerts_by_admin(self, admin_id: int, filters: Dict[str, Any] = None) -> List[Alert]:
         """Get alerts created by admin with optional filters"""
         query = self.db.query(Alert).filter(Alert.created_by == admin_id)
@@ -84,73 +130,144 @@ class AlertService:
         
         return query.order_by(Alert.created_at.desc()).all()
     
-    def get_alerts_for_user(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get alerts visible to a specific user with their preference state"""
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return []
-        
-        # Get alerts based on visibility
-        alerts_query = self.db.query(Alert).filter(
-            Alert.is_active == True,
-            Alert.is_archived == False
-        )
+    def get_alerts_for_user(self, user_id: int, states: Optional[List[str]] = None,
+                            cursor: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get alerts visible to a specific user with their preference state (served from the inbox cache when warm)"""
+        cache_key = inbox_cache.make_key(states, cursor, limit)
+        cached = inbox_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
         
-        # Filter by visibility rules
-        visibility_filter = (
-            (Alert.visibility_type == VisibilityTypeEnum.ORGANIZATION) |
-            (Alert.visibility_type == VisibilityTypeEnum.USER, Alert.target_user_id == user_id) |
-            (Alert.visibility_type == VisibilityTypeEnum.TEAM, Alert.target_team_id.in_([team.id for team in user.teams]))
+        cache_version = inbox_cache.version()
+        alerts = self.query_alerts_for_user(user_id, states, cursor, limit)
+        inbox_cache.set(user_id, cache_key, alerts, cache_version)
+        return alerts
+    
+    def query_alerts_for_user(self, user_id: int, states: Optional[List[str]] = None,
+                              cursor: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Load a user's inbox from the database in a single query"""
+        user_team_ids = select(user_team_association.c.team_id).where(
+            user_team_association.c.user_id == user_id
         )
         
-        alerts = alerts_query.filter(visibility_filter).all()
+        # Filter by visibility rules (resolved in SQL, including team membership)
+        visibility_filter = or_(
+            Alert.visibility_type == VisibilityTypeEnum.ORGANIZATION,
+            and_(Alert.visibility_type == VisibilityTypeEnum.USER, Alert.target_user_id == user_id),
+            and_(Alert.visibility_type == VisibilityTypeEnum.TEAM, Alert.target_team_id.in_(user_team_ids))
+        )
         
-        # Enrich with user preferences
-        result = []
-        for alert in alerts:
-            preference = self.db.query(UserAlertPreference).filter(
-                UserAlertPreference.alert_id == alert.id,
+        query = self.db.query(Alert, UserAlertPreference).outerjoin(
+            UserAlertPreference,
+            and_(
+                UserAlertPreference.alert_id == Alert.id,
                 UserAlertPreference.user_id == user_id
-            ).first()
-            
-            result.append({
-                "alert": alert,
+            )
+        ).filter(
+            exists().where(User.id == user_id),
+            Alert.is_active == True,
+            Alert.is_archived == False,
+            visibility_filter
+        )
+        
+        if states:
+            state_enums = [UserAlertStateEnum(state) for state in states]
+            state_filter = UserAlertPreference.state.in_(state_enums)
+            if UserAlertStateEnum.UNREAD in state_enums:
+                # Alerts without a preference row count as unread
+                state_filter = or_(state_filter, UserAlertPreference.id.is_(None))
+            query = query.filter(state_filter)
+        
+        # Cursor pagination: newest first, cursor is the last alert id of the previous page
+        if cursor is not None:
+            query = query.filter(Alert.id < cursor)
+        query = query.order_by(Alert.id.desc())
+        if limit is not None:
+            query = query.limit(limit)
+        
+        return [
+            {
+                "alert": self._serialize_alert(alert),
                 "state": preference.state.value if preference else "unread",
                 "snoozed_until": preference.snoozed_until if preference else None,
                 "read_at": preference.read_at if preference else None
-            })
-        
-        return result
+            }
+            for alert, preference in query.all()
+        ]
+    
+    def _serialize_alert(self, alert: Alert) -> Dict[str, Any]:
+        """Plain-dict view of an alert for inbox responses"""
+        return {
+            "id": alert.id,
+            "title": alert.title,
+            "message": alert.message,
+            "severity": alert.severity.value,
+            "delivery_type": alert.delivery_type.value if alert.delivery_type else None,
+            "visibility_type": alert.visibility_type.value,
+            "start_time": alert.start_time,
+            "expiry_time": alert.expiry_time,
+            "reminder_frequency_hours": alert.reminder_frequency_hours,
+            "created_at": alert.created_at,
+            "updated_at": alert.updated_at
+        }
     
-    async def _create_user_preferences(self, alert: Alert):
-        """Create user alert preferences for all target users"""
-        target_users = self._get_target_users(alert)
+    async def _create_user_preferences(self, alert: Alert) -> int:
+        """Create user alert preferences for all target users with one set-based INSERT ... SELECT (caller commits)"""
+        audience = audience_resolver.audience_query(alert)
+        if audience is None:
+            return 0
         
-        for user in target_users:
-            existing_preference = self.db.query(UserAlertPreference).filter(
+        now = datetime.utcnow()
+        missing_preferences = select(
+            audience.c.user_id,
+            literal(alert.id),
+            literal(UserAlertStateEnum.UNREAD, type_=UserAlertPreference.state.type),
+            literal(now, type_=UserAlertPreference.created_at.type),
+            literal(now, type_=UserAlertPreference.updated_at.type),
+            # New preferences are due for a reminder straight away (last_reminded_at is NULL)
+            literal(now, type_=UserAlertPreference.next_reminder_at.type)
+        ).where(
+            # Skip users that already have a preference (the WHERE also keeps SQLite's upsert parser happy)
+            ~exists().where(
                 UserAlertPreference.alert_id == alert.id,
-                UserAlertPreference.user_id == user.id
-            ).first()
-            
-            if not existing_preference:
-                preference = UserAlertPreference(
-                    alert_id=alert.id,
-                    user_id=user.id,
-                    state=UserAlertStateEnum.UNREAD
-                )
-                self.db.add(preference)
+                UserAlertPreference.user_id == audience.c.user_id
+            )
+        )
         
-        self.db.commit()
+        stmt = dialect_insert(self.db, UserAlertPreference.__table__).from_select(
+            ["user_id", "alert_id", "state", "created_at", "updated_at", "next_reminder_at"],
+            missing_preferences
+        )
+        if hasattr(stmt, "on_conflict_do_nothing"):
+            # Backed by the unique (user_id, alert_id) constraint - guards against concurrent fan-outs
+            stmt = stmt.on_conflict_do_nothing()
+        
+        result = self.db.execute(stmt)
+        return result.rowcount
+
+class AsyncAlertService:
+    """Async read API for alerts - queries run through an AsyncSession without blocking the event loop"""
     
-    def _get_target_users(self, alert: Alert) -> List[User]:
-        """Get all users that should receive this alert based on visibility"""
-        if alert.visibility_type == VisibilityTypeEnum.ORGANIZATION:
-            return self.db.query(User).all()
-        elif alert.visibility_type == VisibilityTypeEnum.TEAM and alert.target_team_id:
-            team = self.db.query(Team).filter(Team.id == alert.target_team_id).first()
-            return team.members if team else []
-        elif alert.visibility_type == VisibilityTypeEnum.USER and alert.target_user_id:
-            user = self.db.query(User).filter(User.id == alert.target_user_id).first()
-            return [user] if user else []
-        
-        return []
+    def __init__(self, db):
+        self.db = db
+    
+    async def get_alerts_by_admin(self, admin_id: int, filters: Dict[str, Any] = None) -> List[Alert]:
+        return await run_in_session(
+            self.db, lambda session: AlertService(session, AlertSubject()).get_alerts_by_admin(admin_id, filters)
+        )
+    
+    async def get_alerts_for_user(self, user_id: int, states: Optional[List[str]] = None,
+                                  cursor: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        # Check the inbox cache before touching the session at all
+        cache_key = inbox_cache.make_key(states, cursor, limit)
+        cached = inbox_cache.get(user_id, cache_key)
+        if cached is not None:
+            return cached
+        
+        cache_version = inbox_cache.version()
+        alerts = await run_in_session(
+            self.db,
+            lambda session: AlertService(session, AlertSubject()).query_alerts_for_user(user_id, states, cursor, limit)
+        )
+        inbox_cache.set(user_id, cache_key, alerts, cache_version)
+        return alerts
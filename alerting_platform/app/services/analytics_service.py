@@ -1,7 +1,13 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Sequence
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
 from datetime import datetime, timedelta
+from ..database import run_in_session
+from .metric_counters import (
+    MetricCounters, metric_counters, ALERTS_TOTAL, ALERTS_ACTIVE, DELIVERIES_TOTAL, DELIVERIES_SENT,
+    RECENT_ACTIVITY_DAYS, alert_status_counts, severity_counter, state_counter, created_day_counter
+)
+from .latency_sketches import LatencySketches, latency_sketches, READ_LATENCY_ALL, READ_LATENCY_PREFIX
 from ..models.alert import Alert, SeverityEnum
 from ..models.notification import NotificationDelivery, UserAlertPreference, NotificationStatusEnum, UserAlertStateEnum
 from ..models.user import User, Team
@@ -9,67 +15,39 @@ from ..models.user import User, Team
 class AnalyticsService:
     """Service for analytics and metrics tracking"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, counters: MetricCounters = None, sketches: LatencySketches = None):
         self.db = db
+        self.counters = counters or metric_counters
+        self.sketches = sketches or latency_sketches
     
     def get_system_metrics(self) -> Dict[str, Any]:
-        """Get comprehensive system-wide analytics"""
+        """Get comprehensive system-wide analytics from the incremental counters (no table scans)"""
+        counters = self.counters.snapshot(self.db)
         
-        # Total alerts created
-        total_alerts = self.db.query(Alert).count()
+        total_deliveries = counters.get(DELIVERIES_TOTAL, 0)
+        successful_deliveries = counters.get(DELIVERIES_SENT, 0)
+        read_alerts = counters.get(state_counter(UserAlertStateEnum.READ), 0)
         
-        # Active alerts
-        active_alerts = self.db.query(Alert).filter(
-            Alert.is_active == True,
-            Alert.is_archived == False
-        ).count()
-        
-        # Alerts by severity
-        severity_breakdown = self.db.query(
-            Alert.severity,
-            func.count(Alert.id)
-        ).group_by(Alert.severity).all()
-        
-        # Total deliveries
-        total_deliveries = self.db.query(NotificationDelivery).count()
-        
-        # Successful deliveries
-        successful_deliveries = self.db.query(NotificationDelivery).filter(
-            NotificationDelivery.status == NotificationStatusEnum.SENT
-        ).count()
-        
-        # Read vs unread alerts
-        read_alerts = self.db.query(UserAlertPreference).filter(
-            UserAlertPreference.state == UserAlertStateEnum.READ
-        ).count()
-        
-        unread_alerts = self.db.query(UserAlertPreference).filter(
-            UserAlertPreference.state == UserAlertStateEnum.UNREAD
-        ).count()
-        
-        snoozed_alerts = self.db.query(UserAlertPreference).filter(
-            UserAlertPreference.state == UserAlertStateEnum.SNOOZED
-        ).count()
-        
-        # Recent activity (last 7 days)
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        recent_alerts = self.db.query(Alert).filter(
-            Alert.created_at >= week_ago
-        ).count()
+        # Recent activity (today and the previous 6 days)
+        today = datetime.utcnow().date()
+        recent_alerts = sum(
+            counters.get(created_day_counter(today - timedelta(days=offset)), 0)
+            for offset in range(RECENT_ACTIVITY_DAYS)
+        )
         
         return {
-            "total_alerts_created": total_alerts,
-            "active_alerts": active_alerts,
+            "total_alerts_created": counters.get(ALERTS_TOTAL, 0),
+            "active_alerts": counters.get(ALERTS_ACTIVE, 0),
             "alerts_delivered": total_deliveries,
             "alerts_read": read_alerts,
             "delivery_success_rate": (successful_deliveries / max(total_deliveries, 1)) * 100,
             "severity_breakdown": {
-                str(severity): count for severity, count in severity_breakdown
+                str(severity): counters.get(severity_counter(severity), 0) for severity in SeverityEnum
             },
             "alert_states": {
                 "read": read_alerts,
-                "unread": unread_alerts,
-                "snoozed": snoozed_alerts
+                "unread": counters.get(state_counter(UserAlertStateEnum.UNREAD), 0),
+                "snoozed": counters.get(state_counter(UserAlertStateEnum.SNOOZED), 0)
             },
             "recent_activity": {
                 "alerts_last_7_days": recent_alerts
@@ -95,16 +73,20 @@ class AnalyticsService:
             UserAlertPreference.alert_id == alert_id
         ).group_by(UserAlertPreference.state).all()
         
-        # Delivery metrics
-        deliveries = self.db.query(NotificationDelivery).filter(
+        # Delivery metrics - reminders sent inside a digest still have one row per alert
+        deliveries, digest_deliveries = self.db.query(
+            func.count(NotificationDelivery.id),
+            func.count(NotificationDelivery.digest_id)
+        ).filter(
             NotificationDelivery.alert_id == alert_id
-        ).count()
+        ).one()
         
         return {
             "alert_id": alert_id,
             "alert_title": alert.title,
             "total_target_users": total_preferences,
             "total_deliveries": deliveries,
+            "digest_deliveries": digest_deliveries,
             "state_breakdown": {
                 str(state): count for state, count in state_breakdown
             },
@@ -116,17 +98,40 @@ class AnalyticsService:
     
     async def track_alert_created(self, alert: Alert):
         """Track when an alert is created (called by observer)"""
-        # In a real implementation, this could log to analytics systems,
-        # update counters in cache, send to monitoring systems, etc.
-        pass
+        self.counters.increment(ALERTS_TOTAL)
+        self.counters.increment_change({}, alert_status_counts(alert))
+        self.counters.increment(created_day_counter((alert.created_at or datetime.utcnow()).date()))
     
     async def track_alert_updated(self, alert: Alert):
         """Track when an alert is updated"""
-        pass
+        # Nothing left to count here: the event only carries the new values, so AlertService
+        # applies the active/severity change as a delta when it writes the update
     
     async def track_alert_expired(self, alert: Alert):
         """Track when an alert expires"""
-        pass
+        # Expiry doesn't change is_active/is_archived or severity - no counter moves
+    
+    def get_read_latency(self, breakdown: str = None, percentiles: Sequence[float] = (50, 90, 99)) -> List[Dict[str, Any]]:
+        """Time-to-read percentiles (seconds) from the latency sketches, overall and per severity or team"""
+        sketches = self.sketches.load(db=self.db)
+        prefix = f"{READ_LATENCY_PREFIX}{breakdown}:" if breakdown else None
+        
+        results = []
+        for name in sorted(sketches):
+            if name != READ_LATENCY_ALL and (prefix is None or not name.startswith(prefix)):
+                continue
+            sketch = sketches[name]
+            results.append({
+                "group": name[len(READ_LATENCY_PREFIX):],
+                "count": sketch.count,
+                "min_seconds": sketch.min,
+                "max_seconds": sketch.max,
+                "mean_seconds": sketch.mean,
+                "percentiles": {
+                    f"p{percentile:g}": sketch.quantile(percentile / 100) for percentile in percentiles
+                }
+            })
+        return results
     
     def get_user_engagement_metrics(self) -> List[Dict[str, Any]]:
         """Get user engagement metrics"""
@@ -136,7 +141,7 @@ class AnalyticsService:
             User.name,
             func.count(UserAlertPreference.id).label('total_alerts'),
             func.sum(
-                func.case(
+                case(
                     (UserAlertPreference.state == UserAlertStateEnum.READ, 1),
                     else_=0
                 )
@@ -155,3 +160,21 @@ class AnalyticsService:
             }
             for user_id, name, total_alerts, read_count in user_engagement
         ]
+
+class AsyncAnalyticsService:
+    """Async analytics API - aggregation queries run through an AsyncSession without blocking the event loop"""
+    
+    def __init__(self, db):
+        self.db = db
+    
+    async def get_system_metrics(self) -> Dict[str, Any]:
+        return await run_in_session(self.db, lambda session: AnalyticsService(session).get_system_metrics())
+    
+    async def get_alert_performance(self, alert_id: int) -> Dict[str, Any]:
+        return await run_in_session(self.db, lambda session: AnalyticsService(session).get_alert_performance(alert_id))
+    
+    async def get_read_latency(self, breakdown: str = None, percentiles: Sequence[float] = (50, 90, 99)) -> List[Dict[str, Any]]:
+        return await run_in_session(self.db, lambda session: AnalyticsService(session).get_read_latency(breakdown, percentiles))
+    
+    async def get_user_engagement_metrics(self) -> List[Dict[str, Any]]:
+        return await run_in_session(self.db, lambda session: AnalyticsService(session).get_user_engagement_metrics())
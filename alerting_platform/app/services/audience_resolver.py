@@ -0,0 +1,139 @@
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session, object_session
+from ..core import config
+from ..models.alert import Alert, VisibilityTypeEnum
+from ..models.user import AudienceVersion, User, Team, user_team_association
+
+class AudienceResolver:
+    """Resolves alert audiences to user ids from a compact in-memory membership index.
+    
+    The index holds every user id (sorted) and each team's member ids as int64
+    arrays, so org-wide fan-out never hydrates User objects. It is rebuilt lazily when
+    the audience version row shows a membership change committed by any process, or once
+    it is older than max_age_seconds (for writes that bypass the ORM).
+    """
+    
+    def __init__(self, max_age_seconds: float = None):
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else config.AUDIENCE_INDEX_MAX_AGE_SECONDS
+        self._org_user_ids = array("q")
+        self._team_member_ids: Dict[int, array] = {}
+        self._loaded_at: Optional[float] = None
+        self._version: Optional[int] = None
+        self._stale = True
+        self._lock = threading.Lock()
+    
+    def mark_stale(self):
+        """Force a rebuild on the next lookup (called when users or team memberships change)"""
+        self._stale = True
+    
+    def refresh(self, db: Session):
+        """Rebuild the index with two narrow id-only queries"""
+        version = current_audience_version(db)
+        org_user_ids = array("q", db.execute(select(User.id).order_by(User.id)).scalars())
+        
+        team_member_ids: Dict[int, array] = {}
+        for team_id, user_id in db.execute(
+            select(user_team_association.c.team_id, user_team_association.c.user_id).order_by(
+                user_team_association.c.team_id, user_team_association.c.user_id
+            )
+        ):
+            members = team_member_ids.setdefault(team_id, array("q"))
+            if not members or members[-1] != user_id:
+                members.append(user_id)
+        
+        with self._lock:
+            self._org_user_ids = org_user_ids
+            self._team_member_ids = team_member_ids
+            self._loaded_at = time.monotonic()
+            self._version = version
+            self._stale = False
+    
+    def resolve(self, alert: Alert, db: Session) -> Sequence[int]:
+        """Get the ids of all users that should receive this alert based on visibility"""
+        self._ensure_fresh(db)
+        
+        if alert.visibility_type == VisibilityTypeEnum.ORGANIZATION:
+            return self._org_user_ids
+        elif alert.visibility_type == VisibilityTypeEnum.TEAM and alert.target_team_id:
+            return self._team_member_ids.get(alert.target_team_id, array("q"))
+        elif alert.visibility_type == VisibilityTypeEnum.USER and alert.target_user_id:
+            return array("q", [alert.target_user_id]) if self._has_user(alert.target_user_id) else array("q")
+        
+        return array("q")
+    
+    def audience_query(self, alert: Alert):
+        """Same audience as resolve(), as a user_id subquery for set-based SQL (e.g. INSERT ... SELECT)"""
+        if alert.visibility_type == VisibilityTypeEnum.ORGANIZATION:
+            query = select(User.id.label("user_id"))
+        elif alert.visibility_type == VisibilityTypeEnum.TEAM and alert.target_team_id:
+            query = select(user_team_association.c.user_id.label("user_id")).where(
+                user_team_association.c.team_id == alert.target_team_id
+            ).distinct()
+        elif alert.visibility_type == VisibilityTypeEnum.USER and alert.target_user_id:
+            query = select(User.id.label("user_id")).where(User.id == alert.target_user_id)
+        else:
+            return None
+        
+        return query.subquery("audience")
+    
+    def _has_user(self, user_id: int) -> bool:
+        index = bisect_left(self._org_user_ids, user_id)
+        return index < len(self._org_user_ids) and self._org_user_ids[index] == user_id
+    
+    def _ensure_fresh(self, db: Session):
+        expired = self._loaded_at is None or time.monotonic() - self._loaded_at >= self.max_age_seconds
+        if self._stale or expired or current_audience_version(db) != self._version:
+            self.refresh(db)
+
+def current_audience_version(db: Session) -> int:
+    return db.execute(select(AudienceVersion.version).where(AudienceVersion.id == 1)).scalar() or 0
+
+# Shared resolver for the API process
+audience_resolver = AudienceResolver()
+
+def _flag_membership_change(target, *args):
+    """Remember on the session that users/teams changed; the index is marked stale once it commits"""
+    session = object_session(target)
+    if session is not None:
+        session.info["audience_changed"] = True
+    else:
+        audience_resolver.mark_stale()
+
+for _mapper_event in ("after_insert", "after_delete"):
+    event.listen(User, _mapper_event, lambda mapper, connection, target: _flag_membership_change(target))
+    event.listen(Team, _mapper_event, lambda mapper, connection, target: _flag_membership_change(target))
+
+for _attribute in (User.teams, Team.members):
+    event.listen(_attribute, "append", _flag_membership_change)
+    event.listen(_attribute, "remove", _flag_membership_change)
+
+@event.listens_for(Session, "after_flush")
+def _bump_audience_version(session, flush_context):
+    """Bump the version row in the membership change's own transaction, so every process sees it"""
+    if not session.info.get("audience_changed") or session.info.get("audience_version_bumped"):
+        return
+    session.info["audience_version_bumped"] = True
+    table, now = AudienceVersion.__table__, datetime.utcnow()
+    connection = session.connection()
+    bumped = connection.execute(
+        update(table).where(table.c.id == 1).values(version=table.c.version + 1, updated_at=now)
+    )
+    if not bumped.rowcount:
+        connection.execute(insert(table).values(id=1, version=1, updated_at=now))
+
+@event.listens_for(Session, "after_commit")
+def _mark_audience_stale_after_commit(session):
+    session.info.pop("audience_version_bumped", None)
+    if session.info.pop("audience_changed", False):
+        audience_resolver.mark_stale()
+
+@event.listens_for(Session, "after_rollback")
+def _forget_audience_change_after_rollback(session):
+    session.info.pop("audience_version_bumped", None)
+    session.info.pop("audience_changed", None)
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from sqlalchemy import insert
+from ..core import config
+from ..database import SessionLocal
+from ..models.notification import NotificationDelivery, NotificationStatusEnum
+from .metric_counters import MetricCounters, metric_counters, DELIVERIES_TOTAL, DELIVERIES_SENT
+
+logger = logging.getLogger(__name__)
+
+class DeliveryLogWriter:
+    """Collects delivery records in memory and writes them to notification_deliveries in bulk"""
+    
+    def __init__(self, session_factory=SessionLocal, batch_size: int = None, max_age_seconds: float = None,
+                 counters: MetricCounters = None):
+        self._session_factory = session_factory
+        self.counters = counters or metric_counters
+        self.batch_size = batch_size or config.DELIVERY_LOG_BATCH_SIZE
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else config.DELIVERY_LOG_MAX_AGE_SECONDS
+        
+        self._buffer: List[Dict[str, Any]] = []
+        self._oldest_at: Optional[float] = None
+        self._lock = threading.Lock()
+        
+        # Number of bulk inserts committed so far (one commit per batch)
+        self.flush_count = 0
+    
+    def record(self, alert_id: int, user_id: int, delivery_type: str,
+               status: NotificationStatusEnum, error_message: str = None, digest_id: str = None):
+        """Buffer one delivery record, flushing if the size or age threshold is reached"""
+        with self._lock:
+            if not self._buffer:
+                self._oldest_at = time.monotonic()
+            self._buffer.append({
+                "alert_id": alert_id,
+                "user_id": user_id,
+                "delivery_type": delivery_type,
+                "status": status,
+                "error_message": error_message,
+                "digest_id": digest_id,
+                "delivered_at": datetime.utcnow()
+            })
+            should_flush = len(self._buffer) >= self.batch_size or self._is_stale()
+        
+        if should_flush:
+            try:
+                self.flush()
+            except Exception:
+                # Rows stay buffered and are retried on the next flush - never fail the send path
+                logger.exception("Failed to flush %d delivery records", self.pending_count())
+    
+    def flush_if_stale(self) -> int:
+        """Flush buffered records if the oldest one has waited longer than max_age_seconds"""
+        with self._lock:
+            stale = self._is_stale()
+        return self.flush() if stale else 0
+    
+    def flush(self) -> int:
+        """Write all buffered records in bulk inserts of at most batch_size rows"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._oldest_at = None
+        
+        if not rows:
+            return 0
+        
+        db = self._session_factory()
+        written = 0
+        try:
+            while written < len(rows):
+                batch = rows[written:written + self.batch_size]
+                db.execute(insert(NotificationDelivery), batch)
+                db.commit()
+                written += len(batch)
+                self.flush_count += 1
+                
+                self.counters.increment(DELIVERIES_TOTAL, len(batch))
+                self.counters.increment(DELIVERIES_SENT, sum(
+                    1 for row in batch if row["status"] == NotificationStatusEnum.SENT
+                ))
+        except Exception:
+            db.rollback()
+            # Put the unwritten rows back so the next flush retries them
+            with self._lock:
+                self._buffer = rows[written:] + self._buffer
+                self._oldest_at = self._oldest_at or time.monotonic()
+            raise
+        finally:
+            db.close()
+        
+        return len(rows)
+    
+    def pending_count(self) -> int:
+        return len(self._buffer)
+    
+    def _is_stale(self) -> bool:
+        return self._oldest_at is not None and time.monotonic() - self._oldest_at >= self.max_age_seconds
+
+# Shared writer for the API process - flushed by the scheduler and on shutdown
+delivery_log_writer = DeliveryLogWriter()
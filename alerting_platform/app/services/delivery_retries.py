@@ -0,0 +1,323 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Sequence
+from sqlalchemy import DateTime, Integer, and_, delete, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, load_only
+from ..core import config
+from ..database import SessionLocal
+from ..models.alert import Alert
+from ..models.notification import DeadLetterDelivery, DeliveryRetry
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before resending a delivery that has failed `attempts` times"""
+    delay = min(config.DELIVERY_RETRY_BASE_SECONDS * 2 ** (attempts - 1), config.DELIVERY_RETRY_MAX_SECONDS)
+    # Jitter spreads out the retries of deliveries that failed together (e.g. a provider outage)
+    return random.uniform(delay / 2, delay)
+
+class DeliveryRetries:
+    """Failed deliveries - resent with exponential backoff, dead-lettered once they run out of attempts.
+    
+    schedule() only buffers, so a fan-out never waits on it; flush() writes the buffer in bulk.
+    drain() claims due delivery_retries rows under a lease (like DeliveryOutbox jobs, so several
+    processes can drain at once), resends them through the normal dispatch path and then deletes,
+    reschedules or dead-letters each row. Failures a strategy marks as not retryable (no address,
+    channel not configured, 4xx from a webhook) skip straight to the dead-letter table.
+    """
+    
+    def __init__(self, session_factory=SessionLocal, max_attempts: int = None, batch_size: int = None,
+                 lease_seconds: float = None):
+        self._session_factory = session_factory
+        self.max_attempts = max_attempts or config.DELIVERY_RETRY_MAX_ATTEMPTS
+        self.batch_size = batch_size or config.DELIVERY_RETRY_BATCH_SIZE
+        self.lease_seconds = lease_seconds or config.DELIVERY_RETRY_LEASE_SECONDS
+        
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+    
+    def schedule(self, alert_id: int, user_id: int, delivery_type: str, error: str = None,
+                 retryable: bool = True):
+        """Buffer a failed first send for retry (or for the dead-letter table, if it can't succeed on retry)"""
+        with self._lock:
+            self._buffer.append({
+                "alert_id": alert_id,
+                "user_id": user_id,
+                "delivery_type": delivery_type,
+                "attempts": 1,
+                "retryable": retryable,
+                "last_error": error,
+                "failed_at": datetime.utcnow()
+            })
+            should_flush = len(self._buffer) >= self.batch_size
+        
+        if should_flush:
+            try:
+                self.flush()
+            except Exception:
+                # Rows stay buffered and are retried on the next flush - never fail the send path
+                logger.exception("Failed to flush %d delivery retries", self.pending_count())
+    
+    def flush(self) -> int:
+        """Write buffered failures to delivery_retries (or dead_letter_deliveries) in bulk"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        
+        retries = [
+            {
+                "alert_id": row["alert_id"],
+                "user_id": row["user_id"],
+                "delivery_type": row["delivery_type"],
+                "attempts": row["attempts"],
+                "available_at": row["failed_at"] + timedelta(seconds=retry_delay(row["attempts"])),
+                "last_error": row["last_error"],
+                "created_at": row["failed_at"],
+                "updated_at": row["failed_at"]
+            }
+            for row in rows if self._will_retry(row)
+        ]
+        dead_letters = [self._dead_letter(row, row["failed_at"]) for row in rows if not self._will_retry(row)]
+        
+        db = self._session_factory()
+        try:
+            if retries:
+                db.execute(insert(DeliveryRetry), retries)
+            if dead_letters:
+                db.execute(insert(DeadLetterDelivery), dead_letters)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._buffer = rows + self._buffer
+            raise
+        finally:
+            db.close()
+        return len(rows)
+    
+    def pending_count(self) -> int:
+        return len(self._buffer)
+    
+    def claim(self, owner: str, limit: int = None) -> List[int]:
+        """Lease up to limit due retries to owner; returns their ids"""
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            lease_expires_at = now + timedelta(seconds=self.lease_seconds)
+            candidates = select(DeliveryRetry.id).where(self._claimable(now)).order_by(
+                DeliveryRetry.available_at, DeliveryRetry.id
+            ).limit(limit or self.batch_size)
+            if db.get_bind().dialect.name == "postgresql":
+                candidates = candidates.with_for_update(skip_locked=True)
+            candidate_ids = db.execute(candidates).scalars().all()
+            if not candidate_ids:
+                db.rollback()
+                return []
+            
+            # Conditional UPDATE - rows another process claimed in the meantime no longer match
+            db.execute(
+                update(DeliveryRetry).where(DeliveryRetry.id.in_(candidate_ids), self._claimable(now)).values(
+                    lease_owner=owner, lease_expires_at=lease_expires_at, updated_at=now
+                )
+            )
+            claimed = db.execute(select(DeliveryRetry.id).where(
+                DeliveryRetry.id.in_(candidate_ids),
+                DeliveryRetry.lease_owner == owner,
+                DeliveryRetry.lease_expires_at == lease_expires_at
+            )).scalars().all()
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+    
+    async def drain(self, owner: str = None, service_factory: Callable[[Session], Any] = None) -> Dict[str, int]:
+        """Resend every due retry, one claimed batch at a time; returns what happened to them.
+        
+        service_factory(db) builds the NotificationService that resends (default: the standard one).
+        """
+        owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.flush)
+        
+        totals = {"sent": 0, "rescheduled": 0, "dead_lettered": 0, "dropped": 0}
+        while True:
+            retry_ids = await loop.run_in_executor(None, self.claim, owner)
+            if not retry_ids:
+                break
+            db = self._session_factory()
+            try:
+                outcome = await self._resend(db, retry_ids, owner, service_factory)
+            finally:
+                db.close()
+            for key, count in outcome.items():
+                totals[key] += count
+        
+        if totals["sent"] or totals["rescheduled"] or totals["dead_lettered"]:
+            logger.info("Drained delivery retries: %s", totals)
+        return totals
+    
+    def dead_letters(self, db: Session, alert_id: int = None, cursor: int = None,
+                     limit: int = 100) -> List[DeadLetterDelivery]:
+        """Dead letters, newest first; cursor is the id of the last row of the previous page"""
+        query = db.query(DeadLetterDelivery)
+        if alert_id is not None:
+            query = query.filter(DeadLetterDelivery.alert_id == alert_id)
+        if cursor is not None:
+            query = query.filter(DeadLetterDelivery.id < cursor)
+        return query.order_by(DeadLetterDelivery.id.desc()).limit(limit).all()
+    
+    def replay(self, db: Session, ids: Sequence[int] = None, alert_id: int = None) -> int:
+        """Move dead letters (by id and/or alert, or all of them) back into the retry queue, due now.
+        
+        Replayed deliveries get a fresh set of max_attempts sends; one that fails them all again
+        returns to the dead-letter table.
+        """
+        condition = []
+        if ids is not None:
+            condition.append(DeadLetterDelivery.id.in_(ids))
+        if alert_id is not None:
+            condition.append(DeadLetterDelivery.alert_id == alert_id)
+        
+        replayed = 0
+        last_id = 0
+        while True:
+            # Chunks of fixed ids, so dead letters added meanwhile are neither copied nor deleted by accident
+            chunk = db.execute(
+                select(DeadLetterDelivery.id).where(DeadLetterDelivery.id > last_id, *condition)
+                .order_by(DeadLetterDelivery.id).limit(self.batch_size)
+            ).scalars().all()
+            if not chunk:
+                break
+            last_id = chunk[-1]
+            
+            now = datetime.utcnow()
+            db.execute(insert(DeliveryRetry).from_select(
+                ["alert_id", "user_id", "delivery_type", "attempts", "available_at", "last_error",
+                 "created_at", "updated_at"],
+                select(
+                    DeadLetterDelivery.alert_id,
+                    DeadLetterDelivery.user_id,
+                    DeadLetterDelivery.delivery_type,
+                    literal(0, Integer),
+                    literal(now, DateTime),
+                    DeadLetterDelivery.last_error,
+                    DeadLetterDelivery.first_failed_at,
+                    literal(now, DateTime)
+                ).where(DeadLetterDelivery.id.in_(chunk))
+            ))
+            db.execute(delete(DeadLetterDelivery).where(DeadLetterDelivery.id.in_(chunk)))
+            db.commit()
+            replayed += len(chunk)
+        
+        if replayed:
+            logger.info("Replayed %d dead-lettered deliveries", replayed)
+        return replayed
+    
+    def stats(self) -> Dict[str, Any]:
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            return {
+                "buffered": self.pending_count(),
+                "pending": db.query(func.count(DeliveryRetry.id)).scalar(),
+                "due": db.query(func.count(DeliveryRetry.id)).filter(self._claimable(now)).scalar(),
+                "dead_letters": db.query(func.count(DeadLetterDelivery.id)).scalar(),
+                "max_attempts": self.max_attempts
+            }
+        finally:
+            db.close()
+    
+    async def _resend(self, db: Session, retry_ids: List[int], owner: str,
+                      service_factory: Callable[[Session], Any] = None) -> Dict[str, int]:
+        from .notification_service import NotificationService
+        
+        retries = db.query(DeliveryRetry).filter(
+            DeliveryRetry.id.in_(retry_ids), DeliveryRetry.lease_owner == owner
+        ).all()
+        alerts = {alert.id: alert for alert in db.query(Alert).filter(Alert.id.in_({retry.alert_id for retry in retries}))}
+        users = {
+            user.id: user for user in db.query(User).options(load_only(User.id, User.name, User.email, User.role))
+            .filter(User.id.in_({retry.user_id for retry in retries}))
+        }
+        
+        live, done = [], []
+        for retry in retries:
+            alert = alerts.get(retry.alert_id)
+            if retry.user_id in users and alert is not None and alert.is_active and not alert.is_archived:
+                live.append(retry)
+            else:
+                # Archived/deactivated alerts (and deleted users) aren't worth another send
+                done.append(retry)
+        dropped = len(done)
+        
+        # The retry row is the record of this delivery - failures are handled below, not rescheduled again
+        service = (service_factory or NotificationService)(db)
+        service.retry_failures = False
+        results = await service.redeliver([(users[retry.user_id], alerts[retry.alert_id]) for retry in live])
+        
+        now = datetime.utcnow()
+        sent = rescheduled = 0
+        dead_letters = []
+        for retry, result in zip(live, results):
+            if result.get("status") == "sent":
+                sent += 1
+                done.append(retry)
+                continue
+            
+            retry.attempts += 1
+            retry.last_error = result.get("error") or result.get("status")
+            if retry.attempts >= self.max_attempts or result.get("retryable") is False:
+                dead_letters.append(self._dead_letter({
+                    "alert_id": retry.alert_id,
+                    "user_id": retry.user_id,
+                    "delivery_type": retry.delivery_type,
+                    "attempts": retry.attempts,
+                    "last_error": retry.last_error,
+                    "failed_at": retry.created_at
+                }, now))
+                done.append(retry)
+            else:
+                retry.available_at = now + timedelta(seconds=retry_delay(retry.attempts))
+                retry.lease_owner = None
+                retry.lease_expires_at = None
+                retry.updated_at = now
+                rescheduled += 1
+        
+        if dead_letters:
+            db.execute(insert(DeadLetterDelivery), dead_letters)
+        if done:
+            db.execute(delete(DeliveryRetry).where(DeliveryRetry.id.in_([retry.id for retry in done])))
+        db.commit()
+        return {"sent": sent, "rescheduled": rescheduled, "dead_lettered": len(dead_letters), "dropped": dropped}
+    
+    def _will_retry(self, row: Dict[str, Any]) -> bool:
+        return row["retryable"] and row["attempts"] < self.max_attempts
+    
+    @staticmethod
+    def _dead_letter(row: Dict[str, Any], dead_at: datetime) -> Dict[str, Any]:
+        return {
+            "alert_id": row["alert_id"],
+            "user_id": row["user_id"],
+            "delivery_type": row["delivery_type"],
+            "attempts": row["attempts"],
+            "last_error": row["last_error"],
+            "first_failed_at": row["failed_at"],
+            "dead_at": dead_at
+        }
+    
+    @staticmethod
+    def _claimable(now: datetime):
+        return and_(
+            DeliveryRetry.available_at <= now,
+            or_(DeliveryRetry.lease_expires_at.is_(None), DeliveryRetry.lease_expires_at < now)
+        )
+
+# Shared retry queue for the process - drained by the scheduler, flushed on shutdown
+delivery_retries = DeliveryRetries()
@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, delete, insert
+from sqlalchemy.orm import Session
+from ..core import config
+from ..core.sketch import QuantileSketch
+from ..database import SessionLocal, borrowed_session, dialect_insert
+from ..models.alert import Alert, SeverityEnum
+from ..models.analytics import LatencySketch
+from ..models.notification import UserAlertPreference, UserAlertStateEnum
+from ..models.user import user_team_association
+
+logger = logging.getLogger(__name__)
+
+READ_LATENCY_ALL = "read_latency:all"
+READ_LATENCY_PREFIX = "read_latency:"
+
+def severity_sketch(severity: SeverityEnum) -> str:
+    return f"read_latency:severity:{severity.value}"
+
+def team_sketch(team_id: int) -> str:
+    return f"read_latency:team:{team_id}"
+
+class LatencySketches:
+    """Time-to-read (alert created -> read_at) quantile sketches, overall, per severity and per team.
+    
+    Samples go into per-process delta sketches; flush() merges them into the rows of
+    latency_sketches under a row lock, so any number of processes can share one distribution.
+    Reads merge the persisted sketches with this process's unflushed samples.
+    """
+    
+    def __init__(self, session_factory=SessionLocal, relative_accuracy: float = None):
+        self._session_factory = session_factory
+        self.relative_accuracy = relative_accuracy or config.LATENCY_SKETCH_ACCURACY
+        self._pending: Dict[str, QuantileSketch] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, names: Iterable[str], value: float):
+        with self._lock:
+            for name in names:
+                if name not in self._pending:
+                    self._pending[name] = QuantileSketch(self.relative_accuracy)
+                self._pending[name].add(value)
+    
+    def record_read(self, db: Session, preference: UserAlertPreference):
+        """Add the time-to-read of a preference that has just been marked read"""
+        alert = preference.alert
+        if alert is None or preference.read_at is None or alert.created_at is None:
+            return
+        
+        team_ids = db.execute(
+            select(user_team_association.c.team_id).where(user_team_association.c.user_id == preference.user_id)
+        ).scalars().all()
+        latency = max((preference.read_at - alert.created_at).total_seconds(), 0.0)
+        self.record(self._sketch_names(alert.severity, team_ids), latency)
+    
+    def load(self, names: Optional[List[str]] = None, db: Session = None) -> Dict[str, QuantileSketch]:
+        """Persisted sketches (all, or the given names) merged with this process's pending samples"""
+        with self._session(db) as session:
+            query = select(LatencySketch.name, LatencySketch.data)
+            if names is not None:
+                query = query.where(LatencySketch.name.in_(names))
+            sketches = {
+                name: QuantileSketch.from_dict(json.loads(data)) for name, data in session.execute(query)
+            }
+        
+        with self._lock:
+            for name, pending in self._pending.items():
+                if names is not None and name not in names:
+                    continue
+                if name not in sketches:
+                    sketches[name] = QuantileSketch(self.relative_accuracy)
+                sketches[name].merge(pending)
+        return sketches
+    
+    def flush(self, db: Session = None) -> int:
+        """Merge pending samples into the persisted sketches in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        try:
+            with self._session(db) as session:
+                for name, delta in pending.items():
+                    self._merge_into_row(session, name, delta)
+                session.commit()
+        except Exception:
+            # Keep the samples for the next flush
+            with self._lock:
+                for name, delta in pending.items():
+                    if name in self._pending:
+                        delta.merge(self._pending[name])
+                    self._pending[name] = delta
+            raise
+        
+        return len(pending)
+    
+    def rebuild(self, db: Session = None, chunk_size: int = 10000):
+        """Rebuild every sketch from the read preferences (one-off scan, e.g. for existing data)"""
+        with self._session(db) as session:
+            teams_by_user = defaultdict(list)
+            for user_id, team_id in session.execute(select(user_team_association.c.user_id, user_team_association.c.team_id)):
+                teams_by_user[user_id].append(team_id)
+            
+            sketches: Dict[str, QuantileSketch] = {}
+            rows = session.execute(
+                select(UserAlertPreference.user_id, UserAlertPreference.read_at, Alert.created_at, Alert.severity)
+                .join(Alert, Alert.id == UserAlertPreference.alert_id)
+                .where(UserAlertPreference.state == UserAlertStateEnum.READ, UserAlertPreference.read_at.isnot(None))
+                .execution_options(yield_per=chunk_size)
+            )
+            for user_id, read_at, created_at, severity in rows:
+                if created_at is None:
+                    continue
+                latency = max((read_at - created_at).total_seconds(), 0.0)
+                for name in self._sketch_names(severity, teams_by_user.get(user_id, ())):
+                    if name not in sketches:
+                        sketches[name] = QuantileSketch(self.relative_accuracy)
+                    sketches[name].add(latency)
+            
+            with self._lock:
+                session.execute(delete(LatencySketch))
+                if sketches:
+                    session.execute(insert(LatencySketch), [
+                        {"name": name, "data": json.dumps(sketch.to_dict()), "updated_at": datetime.utcnow()}
+                        for name, sketch in sketches.items()
+                    ])
+                session.commit()
+                self._pending = {}
+        
+        logger.info("Rebuilt %d latency sketches from read preferences", len(sketches))
+    
+    def is_empty(self, db: Session = None) -> bool:
+        with self._session(db) as session:
+            return session.execute(select(LatencySketch.name).limit(1)).first() is None
+    
+    def _sketch_names(self, severity: Optional[SeverityEnum], team_ids: Iterable[int]) -> List[str]:
+        names = [READ_LATENCY_ALL]
+        if severity is not None:
+            names.append(severity_sketch(severity))
+        names.extend(team_sketch(team_id) for team_id in team_ids)
+        return names
+    
+    def _merge_into_row(self, session: Session, name: str, delta: QuantileSketch):
+        # Make sure the row exists, then lock it so concurrent flushes from other processes
+        # merge one after another instead of overwriting each other
+        empty = json.dumps(QuantileSketch(self.relative_accuracy).to_dict())
+        stmt = dialect_insert(session, LatencySketch.__table__).values(name=name, data=empty, updated_at=datetime.utcnow())
+        if hasattr(stmt, "on_conflict_do_nothing"):
+            session.execute(stmt.on_conflict_do_nothing(index_elements=["name"]))
+        
+        row = session.query(LatencySketch).filter(LatencySketch.name == name).with_for_update().first()
+        if row is None:
+            row = LatencySketch(name=name, data=empty)
+            session.add(row)
+        
+        merged = QuantileSketch.from_dict(json.loads(row.data))
+        merged.merge(delta)
+        row.data = json.dumps(merged.to_dict())
+        row.updated_at = datetime.utcnow()
+    
+    def _session(self, db: Session = None):
+        """Use the caller's session when given, otherwise a short-lived one"""
+        return borrowed_session(db) if db is not None else self._session_factory()
+
+# Shared sketches for the API process
+latency_sketches = LatencySketches()
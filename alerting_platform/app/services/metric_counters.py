@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from ..core import config
+from ..database import SessionLocal, borrowed_session, dialect_insert
+from ..models.alert import Alert, SeverityEnum
+from ..models.analytics import MetricCounter
+from ..models.notification import NotificationDelivery, UserAlertPreference, NotificationStatusEnum, UserAlertStateEnum
+
+logger = logging.getLogger(__name__)
+
+# Counter names
+ALERTS_TOTAL = "alerts_total"
+ALERTS_ACTIVE = "alerts_active"
+DELIVERIES_TOTAL = "deliveries_total"
+DELIVERIES_SENT = "deliveries_sent"
+RECENT_ACTIVITY_DAYS = 7
+
+def severity_counter(severity: SeverityEnum) -> str:
+    return f"alerts_severity:{severity.value}"
+
+def state_counter(state: UserAlertStateEnum) -> str:
+    return f"preferences_state:{state.value}"
+
+def created_day_counter(day: date) -> str:
+    return f"alerts_created_day:{day.isoformat()}"
+
+def alert_status_counts(alert: Alert) -> Dict[str, int]:
+    """What one alert adds to the counters an update can change (active count, severity)"""
+    counts = {severity_counter(alert.severity): 1} if alert.severity is not None else {}
+    if alert.is_active and not alert.is_archived:
+        counts[ALERTS_ACTIVE] = 1
+    return counts
+
+class MetricCounters:
+    """Incremental analytics counters, kept in memory and persisted to the metric_counters table.
+    
+    Increments are applied locally straight away and written to the table as deltas by
+    flush(), so several processes can share one set of counters. Reads come from memory and
+    are re-synced from the table every COUNTERS_REFRESH_SECONDS; reconcile() corrects
+    any drift against the base tables.
+    """
+    
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+        self._values: Dict[str, int] = {}
+        self._pending: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def increment(self, name: str, delta: int = 1):
+        if not delta:
+            return
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + delta
+            self._pending[name] = self._pending.get(name, 0) + delta
+    
+    def snapshot(self, db: Session = None) -> Dict[str, int]:
+        """Current counter values (re-read from the table if the local copy is old)"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= config.COUNTERS_REFRESH_SECONDS:
+            self.load(db)
+        with self._lock:
+            return dict(self._values)
+    
+    def load(self, db: Session = None):
+        """Replace local values with the persisted ones plus this process's unflushed increments"""
+        with self._session(db) as session:
+            persisted = dict(session.execute(select(MetricCounter.name, MetricCounter.value)).all())
+        
+        with self._lock:
+            for name, delta in self._pending.items():
+                persisted[name] = persisted.get(name, 0) + delta
+            self._values = persisted
+            self._loaded_at = time.monotonic()
+    
+    def flush(self, db: Session = None) -> int:
+        """Add pending increments to the persisted counters in one transaction"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        try:
+            with self._session(db) as session:
+                for name, delta in pending.items():
+                    self._add_to_row(session, name, delta)
+                session.commit()
+        except Exception:
+            # Keep the deltas for the next flush
+            with self._lock:
+                for name, delta in pending.items():
+                    self._pending[name] = self._pending.get(name, 0) + delta
+            raise
+        
+        return len(pending)
+    
+    def increment_change(self, before: Dict[str, int], after: Dict[str, int]):
+        """Increment by the difference between a row's counts before and after a change"""
+        for name in before.keys() | after.keys():
+            self.increment(name, after.get(name, 0) - before.get(name, 0))
+    
+    def reconcile(self, db: Session = None):
+        """Correct drift: add to each persisted counter its difference from the base tables.
+        
+        Corrections go through the same delta upsert as flush(), so increments that are still
+        pending here or in other processes are kept rather than overwritten.
+        """
+        self.flush(db)
+        with self._session(db) as session:
+            values = self.alert_counts_from_base_tables(session)
+            values[DELIVERIES_TOTAL] = session.query(NotificationDelivery).count()
+            values[DELIVERIES_SENT] = session.query(NotificationDelivery).filter(
+                NotificationDelivery.status == NotificationStatusEnum.SENT
+            ).count()
+            
+            for state in UserAlertStateEnum:
+                values[state_counter(state)] = 0
+            for state, count in session.query(
+                UserAlertPreference.state, func.count(UserAlertPreference.id)
+            ).group_by(UserAlertPreference.state):
+                if state is not None:
+                    values[state_counter(state)] = count
+            
+            stored = dict(session.execute(select(MetricCounter.name, MetricCounter.value)).all())
+            with self._lock:
+                # Increments since the flush above are already in the counts and still pending
+                drift = {
+                    name: value - stored.get(name, 0) - self._pending.get(name, 0)
+                    for name, value in values.items()
+                }
+            corrected = {name: delta for name, delta in drift.items() if delta or name not in stored}
+            for name, delta in corrected.items():
+                self._add_to_row(session, name, delta)
+            session.commit()
+        
+        self.load(db)
+        logger.info("Reconciled %d analytics counters from base tables, %d corrected", len(values), len(corrected))
+    
+    def alert_counts_from_base_tables(self, db: Session) -> Dict[str, int]:
+        """Alert-derived counters (alerts table only - small compared to deliveries/preferences)"""
+        values = {
+            ALERTS_TOTAL: db.query(Alert).count(),
+            ALERTS_ACTIVE: db.query(Alert).filter(Alert.is_active == True, Alert.is_archived == False).count()
+        }
+        
+        for severity in SeverityEnum:
+            values[severity_counter(severity)] = 0
+        for severity, count in db.query(Alert.severity, func.count(Alert.id)).group_by(Alert.severity):
+            if severity is not None:
+                values[severity_counter(severity)] = count
+        
+        today = datetime.utcnow().date()
+        for offset in range(RECENT_ACTIVITY_DAYS):
+            values[created_day_counter(today - timedelta(days=offset))] = 0
+        for created_day, count in db.query(
+            func.date(Alert.created_at), func.count(Alert.id)
+        ).filter(
+            Alert.created_at >= datetime.combine(today - timedelta(days=RECENT_ACTIVITY_DAYS - 1), datetime.min.time())
+        ).group_by(func.date(Alert.created_at)):
+            if created_day is not None:
+                day = created_day if isinstance(created_day, date) else date.fromisoformat(str(created_day))
+                values[created_day_counter(day)] = count
+        
+        return values
+    
+    def _add_to_row(self, session: Session, name: str, delta: int):
+        stmt = dialect_insert(session, MetricCounter.__table__).values(
+            name=name, value=delta, updated_at=datetime.utcnow()
+        )
+        if hasattr(stmt, "on_conflict_do_update"):
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["name"],
+                set_={"value": MetricCounter.__table__.c.value + stmt.excluded.value, "updated_at": stmt.excluded.updated_at}
+            ))
+            return
+        
+        updated = session.execute(
+            update(MetricCounter).where(MetricCounter.name == name).values(value=MetricCounter.value + delta)
+        )
+        if not updated.rowcount:
+            session.execute(stmt)
+    
+    def _session(self, db: Session = None):
+        """Use the caller's session when given, otherwise a short-lived one"""
+        return borrowed_session(db) if db is not None else self._session_factory()
+
+# Shared counters for the API process
+metric_counters = MetricCounters()
@@ -1,37 +1,106 @@
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+import time
+import uuid
+from typing import List, Dict, Any, Sequence, Tuple
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session, contains_eager, joinedload, load_only
 from datetime import datetime
-from ..models.alert import Alert
+from ..models.alert import Alert, SeverityEnum
 from ..models.user import User
 from ..models.notification import NotificationDelivery, UserAlertPreference, NotificationStatusEnum, UserAlertStateEnum
+from ..core import config
+from ..core.inbox_cache import inbox_cache
+from ..core.inbox_versions import inbox_versions
+from ..core.realtime import realtime_hub
+from ..database import run_in_session
 from ..patterns.notification_strategy import NotificationContext
 from ..patterns.state import AlertStateContext
+from .audience_resolver import AudienceResolver, audience_resolver as shared_audience_resolver
+from .delivery_log import DeliveryLogWriter, delivery_log_writer
+from .delivery_retries import DeliveryRetries, delivery_retries
+from .metric_counters import metric_counters, state_counter
+from .latency_sketches import latency_sketches
+
+logger = logging.getLogger(__name__)
+
+class ReminderDigests:
+    """A reminder cycle's digest-mode reminders, grouped per (user, delivery type) until they are sent"""
+    
+    def __init__(self):
+        self._digests: Dict[Tuple[int, str], Tuple[User, List[Alert]]] = {}
+        self._alerts: Dict[int, Alert] = {}
+        self._preference_ids: List[int] = []
+        self.size = 0
+    
+    def add(self, user: User, alert: Alert, preference_id: int):
+        # Detached copies - the cycle commits (expiring its ORM rows) before the digests go out
+        key = (user.id, alert.delivery_type.value)
+        if key not in self._digests:
+            self._digests[key] = (User(id=user.id, name=user.name, email=user.email, role=user.role), [])
+        if alert.id not in self._alerts:
+            self._alerts[alert.id] = Alert(
+                id=alert.id, title=alert.title, message=alert.message, severity=alert.severity,
+                delivery_type=alert.delivery_type, created_at=alert.created_at
+            )
+        self._digests[key][1].append(self._alerts[alert.id])
+        self._preference_ids.append(preference_id)
+        self.size += 1
+    
+    def take(self, max_alerts: int = None) -> Tuple[List[Tuple[User, List[Alert]]], List[int]]:
+        """Remove and return every digest as (user, alerts), split into digests of at most max_alerts,
+        and the ids of the preferences they remind of"""
+        max_alerts = max(max_alerts or config.REMINDER_DIGEST_MAX_ALERTS, 1)
+        digests = [
+            (user, alerts[start:start + max_alerts])
+            for user, alerts in self._digests.values()
+            for start in range(0, len(alerts), max_alerts)
+        ]
+        preference_ids = self._preference_ids
+        self._digests, self._alerts, self._preference_ids, self.size = {}, {}, [], 0
+        return digests, preference_ids
 
 class NotificationService:
     """Service for handling notification delivery and user interactions"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, delivery_log: DeliveryLogWriter = None,
+                 audience_resolver: AudienceResolver = None, retries: DeliveryRetries = None):
         self.db = db
+        self.delivery_log = delivery_log or delivery_log_writer
+        self.audience_resolver = audience_resolver or shared_audience_resolver
+        # Failed sends are handed to the retry queue (DeliveryRetries turns this off for its own resends)
+        self.retries = retries or delivery_retries
+        self.retry_failures = True
         self.notification_context = NotificationContext()
         self.state_contexts = {}
     
-    async def process_new_alert(self, alert: Alert):
-        """Process notifications for a newly created alert"""
-        target_users = self._get_alert_target_users(alert)
+    async def process_new_alert(self, alert: Alert, shard: Tuple[int, int] = None) -> Dict[str, Any]:
+        """Process notifications for a newly created alert (optionally one (shard, shard_count) slice of the audience)"""
+        started = time.perf_counter()
+        target_user_ids = self._in_shard(self.audience_resolver.resolve(alert, self.db), shard)
         
-        for user in target_users:
-            await self._send_notification(user, alert)
+        sent, failed = await self._dispatch_to_users(alert, target_user_ids)
+        return self._report_throughput(f"new alert {alert.id}", sent, failed, started)
     
-    async def process_alert_update(self, alert: Alert):
+    async def process_alert_update(self, alert: Alert, shard: Tuple[int, int] = None) -> Dict[str, Any]:
         """Handle alert updates - may trigger new notifications"""
         # For updated alerts, we might want to send notifications again
         # depending on the update type
-        target_users = self._get_alert_target_users(alert)
+        started = time.perf_counter()
+        target_user_ids = self._in_shard(self.audience_resolver.resolve(alert, self.db), shard)
         
-        for user in target_users:
-            preference = self._get_user_preference(user.id, alert.id)
-            if preference and preference.state != UserAlertStateEnum.READ:
-                await self._send_notification(user, alert)
+        # One query for everyone who still has the alert unread (or snoozed)
+        pending_user_ids = set(self.db.execute(
+            select(UserAlertPreference.user_id).where(
+                UserAlertPreference.alert_id == alert.id,
+                UserAlertPreference.state != UserAlertStateEnum.READ
+            )
+        ).scalars())
+        
+        sent, failed = await self._dispatch_to_users(
+            alert, [user_id for user_id in target_user_ids if user_id in pending_user_ids]
+        )
+        return self._report_throughput(f"updated alert {alert.id}", sent, failed, started)
     
     async def process_alert_expiry(self, alert: Alert):
         """Clean up expired alerts"""
@@ -46,104 +115,331 @@ class NotificationService:
     
     async def mark_alert_read(self, user_id: int, alert_id: int) -> bool:
         """Mark an alert as read for a user using state pattern"""
-        preference = self._get_user_preference(user_id, alert_id)
-        if not preference:
-            return False
-        
-        state_context = self._get_state_context(preference.state.value)
-        new_state = state_context.get_current_state().mark_read(preference)
-        
-        preference.state = UserAlertStateEnum(new_state.get_state_name())
-        preference.updated_at = datetime.utcnow()
-        
-        self.db.commit()
-        return True
+        return self.apply_state_transition(user_id, alert_id, "read")
     
     async def snooze_alert(self, user_id: int, alert_id: int, until: datetime = None) -> bool:
         """Snooze an alert for a user using state pattern"""
+        return self.apply_state_transition(user_id, alert_id, "snooze", until)
+    
+    def apply_state_transition(self, user_id: int, alert_id: int, action: str, until: datetime = None) -> bool:
+        """Apply a read/snooze transition (sync, so AsyncNotificationService can run it on an AsyncSession)"""
         preference = self._get_user_preference(user_id, alert_id)
         if not preference:
             return False
         
-        state_context = self._get_state_context(preference.state.value)
-        new_state = state_context.get_current_state().snooze(preference, until)
+        previous_state = preference.state
+        current_state = self._get_state_context(preference.state.value).get_current_state()
+        if action == "read":
+            new_state = current_state.mark_read(preference)
+        else:
+            new_state = current_state.snooze(preference, until)
         
         preference.state = UserAlertStateEnum(new_state.get_state_name())
+        preference.next_reminder_at = new_state.next_reminder_at(preference)
         preference.updated_at = datetime.utcnow()
         
         self.db.commit()
+        inbox_cache.invalidate_user(user_id)
+        inbox_versions.bump_user(user_id)
+        # The user's other open tabs/devices update without re-fetching the inbox
+        realtime_hub.publish(user_id, {
+            "type": "alert_state",
+            "alert_id": alert_id,
+            "state": preference.state.value,
+            "snoozed_until": preference.snoozed_until.isoformat() if preference.snoozed_until else None
+        })
+        
+        if preference.state != previous_state:
+            metric_counters.increment(state_counter(previous_state), -1)
+            metric_counters.increment(state_counter(preference.state))
+            if preference.state == UserAlertStateEnum.READ:
+                latency_sketches.record_read(self.db, preference)
         return True
     
-    async def process_reminders(self):
-        """Process all pending reminders - called by scheduler"""
-        # Get all active alerts with pending reminders
-        active_preferences = self.db.query(UserAlertPreference).join(Alert).filter(
-            Alert.is_active == True,
-            Alert.is_archived == False,
-            UserAlertPreference.state != UserAlertStateEnum.READ
-        ).all()
+    async def process_reminders(self, shard: Tuple[int, int] = None) -> Dict[str, Any]:
+        """Process pending reminders (all, or one (shard, shard_count) slice of users) - called by scheduler"""
+        # Only rows whose next_reminder_at has passed are read, walking the
+        # (next_reminder_at, id) index in keyset-paginated chunks
+        started = time.perf_counter()
+        cycle_started_at = datetime.utcnow()
+        last_due_at, last_seen_id = None, 0
+        sent = failed = digests_sent = 0
+        digests = ReminderDigests()
         
-        for preference in active_preferences:
-            state_context = self._get_state_context(preference.state.value)
+        while True:
+            query = self.db.query(UserAlertPreference).join(
+                UserAlertPreference.alert
+            ).join(
+                UserAlertPreference.user
+            ).options(
+                # Users and alerts come back with the chunk - no per-row lookups or lazy loads
+                contains_eager(UserAlertPreference.alert),
+                contains_eager(UserAlertPreference.user)
+            ).filter(
+                UserAlertPreference.next_reminder_at <= cycle_started_at,
+                UserAlertPreference.state != UserAlertStateEnum.READ,
+                Alert.is_active == True,
+                Alert.is_archived == False
+            )
+            if shard is not None and shard[1] > 1:
+                query = query.filter(UserAlertPreference.user_id % shard[1] == shard[0])
+            
+            if last_due_at is not None:
+                query = query.filter(or_(
+                    UserAlertPreference.next_reminder_at > last_due_at,
+                    and_(
+                        UserAlertPreference.next_reminder_at == last_due_at,
+                        UserAlertPreference.id > last_seen_id
+                    )
+                ))
+            
+            preferences = query.order_by(
+                UserAlertPreference.next_reminder_at,
+                UserAlertPreference.id
+            ).limit(config.REMINDER_CHUNK_SIZE).all()
+            
+            if not preferences:
+                break
+            
+            last_due_at, last_seen_id = preferences[-1].next_reminder_at, preferences[-1].id
+            
+            due_preferences = []
+            for preference in preferences:
+                state = self._get_state_context(preference.state.value).get_current_state()
+                if state.should_remind(preference):
+                    due_preferences.append(preference)
+                else:
+                    # Repair rows whose due time was out of date
+                    preference.next_reminder_at = state.next_reminder_at(preference)
+            
+            individual = []
+            for preference in due_preferences:
+                if self._reminds_in_digest(preference.alert):
+                    digests.add(preference.user, preference.alert, preference.id)
+                else:
+                    individual.append(preference)
+            
+            results = await self._dispatch([(preference.user, preference.alert) for preference in individual])
+            sent_in_chunk = self._count_sent(results)
+            sent += sent_in_chunk
+            failed += len(results) - sent_in_chunk
+            
+            # Digest-mode reminders stay due until their digest has gone out (_send_due_digests) -
+            # a crash before then leaves them for the next cycle instead of losing them
+            reminded_at = datetime.utcnow()
+            for preference in individual:
+                preference.last_reminded_at = reminded_at
+                state = self._get_state_context(preference.state.value).get_current_state()
+                preference.next_reminder_at = state.next_reminder_at(preference)
+            
+            # Commit per chunk; the session only holds weak references, so processed rows can be freed
+            self.db.commit()
             
-            if state_context.get_current_state().should_remind(preference):
-                user = self.db.query(User).filter(User.id == preference.user_id).first()
-                alert = self.db.query(Alert).filter(Alert.id == preference.alert_id).first()
-                
-                if user and alert:
-                    await self._send_notification(user, alert)
-                    preference.last_reminded_at = datetime.utcnow()
+            if digests.size >= config.REMINDER_DIGEST_BUFFER_SIZE:
+                # Bound memory on huge cycles - users seen again later in the cycle get a second digest
+                digest_sent, digest_failed, digest_count = await self._send_due_digests(digests)
+                sent, failed, digests_sent = sent + digest_sent, failed + digest_failed, digests_sent + digest_count
         
-        self.db.commit()
+        digest_sent, digest_failed, digest_count = await self._send_due_digests(digests)
+        sent, failed, digests_sent = sent + digest_sent, failed + digest_failed, digests_sent + digest_count
+        
+        label = "reminder cycle" if shard is None else f"reminder shard {shard[0]}/{shard[1]}"
+        stats = self._report_throughput(label, sent, failed, started)
+        stats["digests"] = digests_sent
+        return stats
     
-    async def _send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
-        """Send notification using strategy pattern"""
-        strategy = self.notification_context.get_strategy(alert.delivery_type.value)
+    def _reminds_in_digest(self, alert: Alert) -> bool:
+        """Whether this alert's reminders are coalesced into the per-user digest of its channel"""
+        channel = self.notification_context.get_strategy(alert.delivery_type.value).get_channel_name()
+        if not self.notification_context.uses_digest(channel):
+            return False
+        return config.REMINDER_DIGEST_INCLUDE_CRITICAL or alert.severity != SeverityEnum.CRITICAL
+    
+    async def _send_due_digests(self, pending: ReminderDigests) -> Tuple[int, int, int]:
+        """Send the collected digests, then move their preferences' next reminder on; returns (sent, failed, digests)"""
+        digests, preference_ids = pending.take()
+        counts = await self._send_digests(digests)
         
-        try:
-            result = await strategy.send_notification(user, alert)
-            
-            # Log delivery
-            delivery = NotificationDelivery(
+        reminded_at = datetime.utcnow()
+        for start in range(0, len(preference_ids), config.REMINDER_CHUNK_SIZE):
+            preferences = self.db.query(UserAlertPreference).options(
+                joinedload(UserAlertPreference.alert)
+            ).filter(UserAlertPreference.id.in_(preference_ids[start:start + config.REMINDER_CHUNK_SIZE])).all()
+            for preference in preferences:
+                preference.last_reminded_at = reminded_at
+                state = self._get_state_context(preference.state.value).get_current_state()
+                preference.next_reminder_at = state.next_reminder_at(preference)
+            self.db.commit()
+        return counts
+    
+    async def _send_digests(self, digests: List[Tuple[User, List[Alert]]]) -> Tuple[int, int, int]:
+        """Send collected digests under the channels' concurrency limits; returns (sent, failed, digests).
+        
+        sent/failed count reminded alerts, like individual reminders. A user with a single due
+        alert gets the regular reminder, which also lets it share a batch with other recipients.
+        """
+        single = [(user, alerts[0]) for user, alerts in digests if len(alerts) == 1]
+        results = await self._dispatch(single)
+        sent = self._count_sent(results)
+        failed = len(results) - sent
+        
+        multiple = [(user, alerts) for user, alerts in digests if len(alerts) > 1]
+        for start in range(0, len(multiple), config.DISPATCH_WINDOW_SIZE):
+            window = multiple[start:start + config.DISPATCH_WINDOW_SIZE]
+            results = await asyncio.gather(*(self._send_digest_with_limit(user, alerts) for user, alerts in window))
+            for (_, alerts), result in zip(window, results):
+                if result.get("status") == "sent":
+                    sent += len(alerts)
+                else:
+                    failed += len(alerts)
+        return sent, failed, len(multiple)
+    
+    async def _send_digest_with_limit(self, user: User, alerts: List[Alert]) -> Dict[str, Any]:
+        """Send one digest while holding a slot of the channel's concurrency limit; one delivery record per alert"""
+        strategy = self.notification_context.get_strategy(alerts[0].delivery_type.value)
+        lane = max((alert.severity for alert in alerts), key=list(SeverityEnum).index).value
+        async with self.notification_context.get_limiter(strategy.get_channel_name()).slot(lane):
+            try:
+                result = await strategy.send_digest(user, alerts)
+            except Exception as e:
+                result = {"status": "failed", "error": str(e)}
+        
+        # Per-alert rows keep get_alert_performance and the rollups per alert; digest_id ties them together
+        digest_id = uuid.uuid4().hex
+        sent = result.get("status") == "sent"
+        for alert in alerts:
+            self.delivery_log.record(
                 alert_id=alert.id,
                 user_id=user.id,
-                delivery_type=strategy.get_channel_name(),
-                status=NotificationStatusEnum.SENT if result.get("status") == "sent" else NotificationStatusEnum.FAILED
+                delivery_type=result.get("channel") or strategy.get_channel_name(),
+                status=NotificationStatusEnum.SENT if sent else NotificationStatusEnum.FAILED,
+                error_message=None if sent else result.get("error"),
+                digest_id=digest_id
             )
+            # A failed digest is retried alert by alert
+            self._schedule_retry(user, alert, strategy.get_channel_name(), result)
+        return result
+    
+    async def _dispatch(self, deliveries: List[Tuple[User, Alert]]) -> List[Dict[str, Any]]:
+        """Send notifications concurrently in per-channel batches, bounded per channel by the notification context"""
+        results: List[Dict[str, Any]] = [None] * len(deliveries)
+        
+        # Schedule in windows so a huge fan-out doesn't create one task per recipient up front
+        for start in range(0, len(deliveries), config.DISPATCH_WINDOW_SIZE):
+            window = deliveries[start:start + config.DISPATCH_WINDOW_SIZE]
+            await asyncio.gather(*(
+                self._send_batch_with_limit(alert, recipients, results)
+                for alert, recipients in self._group_batches(window, start)
+            ))
+        
+        # Results are in the same order as deliveries
+        return results
+    
+    def _group_batches(self, deliveries: List[Tuple[User, Alert]], offset: int = 0) -> List[Tuple[Alert, List[Tuple[int, User]]]]:
+        """Group recipients per alert (and so per channel) into batches of the strategy's max_batch_size"""
+        by_alert: Dict[int, Tuple[Alert, List[Tuple[int, User]]]] = {}
+        for index, (user, alert) in enumerate(deliveries, start=offset):
+            by_alert.setdefault(alert.id, (alert, []))[1].append((index, user))
+        
+        batches = []
+        for alert, recipients in by_alert.values():
+            batch_size = max(self.notification_context.get_strategy(alert.delivery_type.value).max_batch_size, 1)
+            for start in range(0, len(recipients), batch_size):
+                batches.append((alert, recipients[start:start + batch_size]))
+        return batches
+    
+    async def _dispatch_to_users(self, alert: Alert, user_ids: Sequence[int]) -> Tuple[int, int]:
+        """Fan an alert out to user ids, loading recipients one window at a time; returns (sent, failed)"""
+        sent = failed = 0
+        
+        for start in range(0, len(user_ids), config.DISPATCH_WINDOW_SIZE):
+            window_ids = list(user_ids[start:start + config.DISPATCH_WINDOW_SIZE])
+            users = self.db.query(User).options(
+                load_only(User.id, User.name, User.email)
+            ).filter(User.id.in_(window_ids)).all()
             
-            self.db.add(delivery)
-            self.db.commit()
-            
-            return result
-            
+            results = await self._dispatch([(user, alert) for user in users])
+            sent_in_window = self._count_sent(results)
+            sent += sent_in_window
+            failed += len(results) - sent_in_window
+        
+        return sent, failed
+    
+    async def _send_batch_with_limit(self, alert: Alert, recipients: List[Tuple[int, User]],
+                                     results: List[Dict[str, Any]]):
+        """Send one batch holding a slot of the channel's concurrency limit, taken in the alert's severity lane; fills in results by index"""
+        channel = self.notification_context.get_strategy(alert.delivery_type.value).get_channel_name()
+        async with self.notification_context.get_limiter(channel).slot(alert.severity.value):
+            batch_results = await self._send_batch([user for _, user in recipients], alert)
+        
+        for (index, _), result in zip(recipients, batch_results):
+            results[index] = result
+    
+    async def redeliver(self, deliveries: List[Tuple[User, Alert]]) -> List[Dict[str, Any]]:
+        """Send (user, alert) pairs again for DeliveryRetries; results are in the same order"""
+        return await self._dispatch(deliveries)
+    
+    def _schedule_retry(self, user: User, alert: Alert, channel: str, result: Dict[str, Any]):
+        if self.retry_failures and result.get("status") == "failed":
+            self.retries.schedule(
+                alert.id, user.id, channel, result.get("error"), retryable=result.get("retryable", True)
+            )
+    
+    def _in_shard(self, user_ids: Sequence[int], shard: Tuple[int, int] = None) -> Sequence[int]:
+        if shard is None or shard[1] <= 1:
+            return user_ids
+        index, count = shard
+        return [user_id for user_id in user_ids if user_id % count == index]
+    
+    def _count_sent(self, results: List[Dict[str, Any]]) -> int:
+        return sum(1 for result in results if result.get("status") == "sent")
+    
+    def _report_throughput(self, label: str, sent: int, failed: int, started: float) -> Dict[str, Any]:
+        """Summarize a fan-out and log its throughput"""
+        elapsed = time.perf_counter() - started
+        
+        stats = {
+            "total": sent + failed,
+            "sent": sent,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 4),
+            "per_second": round((sent + failed) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+        if stats["total"]:
+            logger.info(
+                "Dispatched %d notifications for %s (%d sent, %d failed) in %.3fs - %.1f/s",
+                stats["total"], label, sent, failed, elapsed, stats["per_second"]
+            )
+        return stats
+    
+    async def _send_batch(self, users: List[User], alert: Alert) -> List[Dict[str, Any]]:
+        """Send notifications using strategy pattern; one delivery record per user, even for partial failures"""
+        strategy = self.notification_context.get_strategy(alert.delivery_type.value)
+        
+        try:
+            results = list(await strategy.send_batch(users, alert))
         except Exception as e:
-            # Log failed delivery
-            delivery = NotificationDelivery(
+            # The whole request failed - every recipient in it failed
+            results = [{"status": "failed", "error": str(e)} for _ in users]
+        
+        if len(results) < len(users):
+            results.extend({"status": "failed", "error": "no result returned for recipient"}
+                           for _ in range(len(users) - len(results)))
+        
+        # Log deliveries (buffered - written in bulk by the delivery log writer)
+        for user, result in zip(users, results):
+            sent = result.get("status") == "sent"
+            self.delivery_log.record(
                 alert_id=alert.id,
                 user_id=user.id,
-                delivery_type=strategy.get_channel_name(),
-                status=NotificationStatusEnum.FAILED,
-                error_message=str(e)
+                # Critical alerts sent through the fallback of an open circuit are recorded under that channel
+                delivery_type=result.get("channel") or strategy.get_channel_name(),
+                status=NotificationStatusEnum.SENT if sent else NotificationStatusEnum.FAILED,
+                error_message=None if sent else result.get("error")
             )
-            
-            self.db.add(delivery)
-            self.db.commit()
-            
-            return {"status": "failed", "error": str(e)}
-    
-    def _get_alert_target_users(self, alert: Alert) -> List[User]:
-        """Get target users for an alert based on visibility settings"""
-        if alert.visibility_type.value == "organization":
-            return self.db.query(User).all()
-        elif alert.visibility_type.value == "team" and alert.target_team_id:
-            from ..models.user import Team
-            team = self.db.query(Team).filter(Team.id == alert.target_team_id).first()
-            return team.members if team else []
-        elif alert.visibility_type.value == "user" and alert.target_user_id:
-            user = self.db.query(User).filter(User.id == alert.target_user_id).first()
-            return [user] if user else []
-        
-        return []
+            self._schedule_retry(user, alert, strategy.get_channel_name(), result)
+        
+        return results[:len(users)]
     
     def _get_user_preference(self, user_id: int, alert_id: int) -> UserAlertPreference:
         """Get user preference for an alert"""
@@ -157,3 +453,19 @@ class NotificationService:
         if state_name not in self.state_contexts:
             self.state_contexts[state_name] = AlertStateContext(state_name)
         return self.state_contexts[state_name]
+
+class AsyncNotificationService:
+    """Async user-interaction API - state transitions run through an AsyncSession without blocking the event loop"""
+    
+    def __init__(self, db):
+        self.db = db
+    
+    async def mark_alert_read(self, user_id: int, alert_id: int) -> bool:
+        return await run_in_session(
+            self.db, lambda session: NotificationService(session).apply_state_transition(user_id, alert_id, "read")
+        )
+    
+    async def snooze_alert(self, user_id: int, alert_id: int, until: datetime = None) -> bool:
+        return await run_in_session(
+            self.db, lambda session: NotificationService(session).apply_state_transition(user_id, alert_id, "snooze", until)
+        )
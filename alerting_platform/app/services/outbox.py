@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+from ..core import config
+from ..database import SessionLocal
+from ..models.alert import Alert, VisibilityTypeEnum
+from ..models.notification import DeliveryJob, DeliveryJobKindEnum, DeliveryJobStatusEnum
+from .delivery_log import delivery_log_writer
+from .delivery_retries import delivery_retries
+from .metric_counters import metric_counters
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+def enqueue_delivery_jobs(db: Session, alert: Alert, kind: DeliveryJobKindEnum) -> int:
+    """Add the delivery jobs for an alert change to the session (committed by the caller with the change)"""
+    shard_count = 1 if alert.visibility_type == VisibilityTypeEnum.USER else max(config.OUTBOX_SHARDS, 1)
+    now = datetime.utcnow()
+    db.add_all([
+        DeliveryJob(
+            alert_id=alert.id,
+            kind=kind,
+            shard=shard,
+            shard_count=shard_count,
+            status=DeliveryJobStatusEnum.PENDING,
+            available_at=now,
+            created_at=now,
+            updated_at=now
+        )
+        for shard in range(shard_count)
+    ])
+    return shard_count
+
+class DeliveryOutbox:
+    """Claims delivery jobs under a lease and runs them.
+    
+    A claim sets status=running, lease_owner and lease_expires_at in one conditional UPDATE (after
+    SELECT ... FOR UPDATE SKIP LOCKED on Postgres), so two workers never hold the same job. The
+    lease is renewed while the job runs; if a worker dies, the job becomes claimable again once
+    its lease expires. Completion is fenced on lease_owner, so a worker that lost its lease can't
+    overwrite the new owner's result. Delivery is at-least-once: a job retried after a crash
+    re-sends to its whole shard.
+    """
+    
+    def __init__(self, session_factory=SessionLocal, lease_seconds: float = None):
+        self._session_factory = session_factory
+        self.lease_seconds = lease_seconds or config.OUTBOX_LEASE_SECONDS
+    
+    def claim(self, owner: str) -> Optional[int]:
+        """Claim the oldest available job for owner; returns its id, or None if there is nothing to do"""
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            candidates = select(DeliveryJob.id).where(self._claimable(now)).order_by(DeliveryJob.id)
+            if db.get_bind().dialect.name == "postgresql":
+                # Skip rows another worker is claiming right now instead of queueing behind its lock
+                candidate_ids = db.execute(candidates.limit(1).with_for_update(skip_locked=True)).scalars().all()
+            else:
+                candidate_ids = db.execute(candidates.limit(10)).scalars().all()
+            
+            for job_id in candidate_ids:
+                # Conditional UPDATE - only one worker's claim can match the claimable condition
+                claimed = db.execute(
+                    update(DeliveryJob).where(DeliveryJob.id == job_id, self._claimable(now)).values(
+                        status=DeliveryJobStatusEnum.RUNNING,
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        attempts=DeliveryJob.attempts + 1,
+                        updated_at=now
+                    )
+                )
+                if claimed.rowcount:
+                    db.commit()
+                    return job_id
+            
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    async def run(self, job_id: int, owner: str) -> Optional[Dict[str, Any]]:
+        """Run a claimed job and record its outcome; returns the dispatch stats"""
+        renewer = asyncio.get_running_loop().create_task(self._keep_lease(job_id, owner))
+        db = self._session_factory()
+        try:
+            job = db.get(DeliveryJob, job_id)
+            if job.attempts > config.OUTBOX_MAX_ATTEMPTS:
+                # Reclaimed after its worker died too many times - don't keep crashing workers
+                self._finish(job_id, owner, DeliveryJobStatusEnum.FAILED, "lease expired too many times")
+                return None
+            
+            stats = await self._execute(db, job)
+            # Make the delivery records (and their counters, and any retries) durable before the job is marked done
+            delivery_log_writer.flush()
+            delivery_retries.flush()
+            metric_counters.flush()
+            self._finish(job_id, owner, DeliveryJobStatusEnum.DONE)
+            return stats
+        except Exception as e:
+            logger.exception("Delivery job %d failed", job_id)
+            db.rollback()
+            self._fail(job_id, owner, str(e))
+            return None
+        finally:
+            renewer.cancel()
+            db.close()
+    
+    def pending_count(self) -> int:
+        db = self._session_factory()
+        try:
+            return db.query(DeliveryJob).filter(DeliveryJob.status.in_(
+                [DeliveryJobStatusEnum.PENDING, DeliveryJobStatusEnum.RUNNING]
+            )).count()
+        finally:
+            db.close()
+    
+    async def _execute(self, db: Session, job: DeliveryJob) -> Optional[Dict[str, Any]]:
+        alert = db.get(Alert, job.alert_id)
+        if alert is None:
+            return None
+        
+        service = NotificationService(db)
+        shard = (job.shard, job.shard_count)
+        if job.kind == DeliveryJobKindEnum.ALERT_CREATED:
+            return await service.process_new_alert(alert, shard=shard)
+        if alert.is_active:
+            # Same rule as NotificationObserver - deactivated alerts aren't re-sent
+            return await service.process_alert_update(alert, shard=shard)
+        return None
+    
+    async def _keep_lease(self, job_id: int, owner: str):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            db = self._session_factory()
+            try:
+                renewed = db.execute(
+                    update(DeliveryJob).where(
+                        DeliveryJob.id == job_id,
+                        DeliveryJob.lease_owner == owner,
+                        DeliveryJob.status == DeliveryJobStatusEnum.RUNNING
+                    ).values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                )
+                db.commit()
+                if not renewed.rowcount:
+                    logger.warning("Worker %s lost the lease on delivery job %d", owner, job_id)
+                    return
+            except Exception:
+                logger.exception("Failed to renew lease on delivery job %d", job_id)
+            finally:
+                db.close()
+    
+    def _fail(self, job_id: int, owner: str, error: str):
+        db = self._session_factory()
+        try:
+            attempts = db.execute(select(DeliveryJob.attempts).where(DeliveryJob.id == job_id)).scalar() or 0
+        finally:
+            db.close()
+        
+        if attempts >= config.OUTBOX_MAX_ATTEMPTS:
+            self._finish(job_id, owner, DeliveryJobStatusEnum.FAILED, error)
+            return
+        
+        # Exponential backoff with jitter before the job can be claimed again
+        delay = config.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+        self._finish(job_id, owner, DeliveryJobStatusEnum.PENDING, error,
+                     available_at=datetime.utcnow() + timedelta(seconds=delay))
+    
+    def _finish(self, job_id: int, owner: str, status: DeliveryJobStatusEnum, error: str = None,
+                available_at: datetime = None):
+        now = datetime.utcnow()
+        values = {
+            "status": status,
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "last_error": error,
+            "updated_at": now
+        }
+        if available_at is not None:
+            values["available_at"] = available_at
+        if status in (DeliveryJobStatusEnum.DONE, DeliveryJobStatusEnum.FAILED):
+            values["completed_at"] = now
+        
+        db = self._session_factory()
+        try:
+            finished = db.execute(
+                update(DeliveryJob).where(DeliveryJob.id == job_id, DeliveryJob.lease_owner == owner).values(**values)
+            )
+            db.commit()
+            if not finished.rowcount:
+                logger.warning("Delivery job %d was reclaimed from %s before it finished", job_id, owner)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _claimable(now: datetime):
+        return or_(
+            and_(DeliveryJob.status == DeliveryJobStatusEnum.PENDING, DeliveryJob.available_at <= now),
+            and_(DeliveryJob.status == DeliveryJobStatusEnum.RUNNING, DeliveryJob.lease_expires_at < now)
+        )
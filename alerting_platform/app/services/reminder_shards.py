@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from sqlalchemy import and_, or_, select, update
+from ..core import config
+from ..database import SessionLocal, dialect_insert
+from ..models.notification import ReminderShardLease
+from .delivery_log import delivery_log_writer
+from .delivery_retries import delivery_retries
+from .notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class ReminderShardLeases:
+    """Hands out reminder shards so each one is processed by exactly one process per cycle.
+    
+    Cycles are aligned to wall-clock multiples of REMINDER_INTERVAL_MINUTES, so every process
+    agrees on the current cycle without coordinating. A shard is claimable while its
+    completed_cycle is behind the current cycle and nobody holds an unexpired lease on it;
+    the claim is a conditional UPDATE (after SELECT ... FOR UPDATE SKIP LOCKED on Postgres).
+    """
+    
+    def __init__(self, session_factory=SessionLocal, shard_count: int = None, lease_seconds: float = None):
+        self._session_factory = session_factory
+        self.shard_count = shard_count or config.REMINDER_SHARDS
+        self.lease_seconds = lease_seconds or config.REMINDER_LEASE_SECONDS
+    
+    @staticmethod
+    def current_cycle(now: float = None) -> int:
+        return int((now if now is not None else time.time()) // (config.REMINDER_INTERVAL_MINUTES * 60))
+    
+    def ensure_shards(self):
+        """Create the lease rows for every shard (no-op for existing ones)"""
+        db = self._session_factory()
+        try:
+            existing = set(db.execute(select(ReminderShardLease.shard)).scalars())
+            for shard in range(self.shard_count):
+                if shard in existing:
+                    continue
+                stmt = dialect_insert(db, ReminderShardLease.__table__).values(
+                    shard=shard, completed_cycle=-1, updated_at=datetime.utcnow()
+                )
+                if hasattr(stmt, "on_conflict_do_nothing"):
+                    # Another process may be creating the same rows
+                    stmt = stmt.on_conflict_do_nothing(index_elements=["shard"])
+                db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+    
+    def claim(self, owner: str, cycle: int) -> Optional[int]:
+        """Claim a shard that hasn't been processed in this cycle; None when all are done or leased"""
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            candidates = select(ReminderShardLease.shard).where(
+                ReminderShardLease.shard < self.shard_count, self._claimable(cycle, now)
+            ).order_by(ReminderShardLease.shard)
+            if db.get_bind().dialect.name == "postgresql":
+                candidate_shards = db.execute(candidates.limit(1).with_for_update(skip_locked=True)).scalars().all()
+            else:
+                candidate_shards = db.execute(candidates).scalars().all()
+            
+            for shard in candidate_shards:
+                claimed = db.execute(
+                    update(ReminderShardLease).where(
+                        ReminderShardLease.shard == shard, self._claimable(cycle, now)
+                    ).values(
+                        lease_owner=owner,
+                        lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now
+                    )
+                )
+                if claimed.rowcount:
+                    db.commit()
+                    return shard
+            
+            db.rollback()
+            return None
+        finally:
+            db.close()
+    
+    def renew(self, shard: int, owner: str) -> bool:
+        return self._update_owned(shard, owner, lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+    
+    def complete(self, shard: int, owner: str, cycle: int) -> bool:
+        now = datetime.utcnow()
+        return self._update_owned(
+            shard, owner, lease_owner=None, lease_expires_at=None, completed_cycle=cycle, completed_at=now
+        )
+    
+    def release(self, shard: int, owner: str) -> bool:
+        """Give a shard back without completing it (another process can retry it this cycle)"""
+        return self._update_owned(shard, owner, lease_owner=None, lease_expires_at=None)
+    
+    def _update_owned(self, shard: int, owner: str, **values) -> bool:
+        db = self._session_factory()
+        try:
+            updated = db.execute(
+                update(ReminderShardLease).where(
+                    ReminderShardLease.shard == shard, ReminderShardLease.lease_owner == owner
+                ).values(updated_at=datetime.utcnow(), **values)
+            )
+            db.commit()
+            return bool(updated.rowcount)
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _claimable(cycle: int, now: datetime):
+        return and_(
+            ReminderShardLease.completed_cycle < cycle,
+            or_(ReminderShardLease.lease_expires_at.is_(None), ReminderShardLease.lease_expires_at < now)
+        )
+
+async def run_reminder_cycle(owner: str = None, session_factory=SessionLocal,
+                             leases: ReminderShardLeases = None) -> Dict[str, Any]:
+    """Process every reminder shard of the current cycle this process can claim"""
+    owner = owner or default_owner()
+    leases = leases or ReminderShardLeases(session_factory)
+    cycle = leases.current_cycle()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, leases.ensure_shards)
+    
+    totals = {"shards": 0, "sent": 0, "failed": 0}
+    while True:
+        shard = await loop.run_in_executor(None, leases.claim, owner, cycle)
+        if shard is None:
+            break
+        
+        renewer = loop.create_task(_keep_lease(leases, shard, owner))
+        db = session_factory()
+        try:
+            stats = await NotificationService(db).process_reminders(shard=(shard, leases.shard_count))
+            # Delivery records must be durable before the shard is marked done for the cycle
+            delivery_log_writer.flush()
+            delivery_retries.flush()
+            if leases.complete(shard, owner, cycle):
+                totals["shards"] += 1
+                totals["sent"] += stats["sent"]
+                totals["failed"] += stats["failed"]
+            else:
+                logger.warning("Reminder shard %d was reclaimed from %s before it finished", shard, owner)
+        except Exception:
+            logger.exception("Reminder shard %d failed", shard)
+            # Hand it back and stop here - the next poll (here or elsewhere) retries it
+            leases.release(shard, owner)
+            break
+        finally:
+            renewer.cancel()
+            db.close()
+    
+    return totals
+
+async def _keep_lease(leases: ReminderShardLeases, shard: int, owner: str):
+    while True:
+        await asyncio.sleep(leases.lease_seconds / 3)
+        try:
+            if not leases.renew(shard, owner):
+                logger.warning("Worker %s lost the lease on reminder shard %d", owner, shard)
+                return
+        except Exception:
+            logger.exception("Failed to renew lease on reminder shard %d", shard)
@@ -0,0 +1,211 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import func, case, delete, insert
+from sqlalchemy.orm import Session
+from ..core import config
+from ..database import run_in_session
+from ..models.alert import Alert, SeverityEnum
+from ..models.analytics import AlertHourlyRollup, RollupWatermark
+from ..models.notification import NotificationDelivery, UserAlertPreference, NotificationStatusEnum, UserAlertStateEnum
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = "alert_hourly_rollups"
+ROLLUP_METRICS = ("sent", "failed", "read", "snoozed")
+
+def floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def _hour_bucket(db: Session, column):
+    """SQL expression truncating a timestamp column to the start of its hour"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("hour", column)
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+def _as_datetime(value) -> datetime:
+    # SQLite returns the strftime bucket as text
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+class RollupService:
+    """Maintains hourly per-alert/channel delivery and engagement rollups from the raw tables.
+    
+    A bucket is always rebuilt whole from notification_deliveries and user_alert_preferences, so
+    re-running any range is idempotent. The incremental run rebuilds the buckets from the stored
+    watermark's hour up to now - ROLLUP_LAG_SECONDS and advances the watermark in the same
+    transaction as each slice.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def run_incremental(self, until: datetime = None) -> Dict[str, Any]:
+        """Roll up raw events since the watermark (starting from the earliest event on first run)"""
+        until = until or datetime.utcnow() - timedelta(seconds=config.ROLLUP_LAG_SECONDS)
+        watermark = self.db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).first()
+        start = watermark.processed_until if watermark else self._earliest_event()
+        
+        if start is None or start >= until:
+            self._set_watermark(until if start is None else start)
+            self.db.commit()
+            return {"buckets": 0, "rows": 0, "processed_until": until if start is None else start}
+        
+        stats = self._rebuild(start, until, advance_watermark=True)
+        stats["processed_until"] = until
+        return stats
+    
+    def backfill(self, start: datetime = None, end: datetime = None) -> Dict[str, Any]:
+        """Rebuild the rollups for a range (default: everything) from the raw tables"""
+        start = start or self._earliest_event()
+        end = end or datetime.utcnow()
+        if start is None or start >= end:
+            return {"buckets": 0, "rows": 0}
+        return self._rebuild(start, end, advance_watermark=False)
+    
+    def get_trends(self, start: datetime, end: datetime, granularity: str = "hour",
+                   alert_id: int = None, severity: SeverityEnum = None, channel: str = None) -> List[Dict[str, Any]]:
+        """Sum the rollups per hour (or day) for a time range"""
+        query = self.db.query(
+            AlertHourlyRollup.bucket_start,
+            func.sum(AlertHourlyRollup.sent_count),
+            func.sum(AlertHourlyRollup.failed_count),
+            func.sum(AlertHourlyRollup.read_count),
+            func.sum(AlertHourlyRollup.snoozed_count)
+        ).filter(
+            AlertHourlyRollup.bucket_start >= floor_hour(start),
+            AlertHourlyRollup.bucket_start < end
+        )
+        if alert_id is not None:
+            query = query.filter(AlertHourlyRollup.alert_id == alert_id)
+        if severity is not None:
+            query = query.filter(AlertHourlyRollup.severity == severity)
+        if channel is not None:
+            query = query.filter(AlertHourlyRollup.channel == channel)
+        
+        buckets: Dict[datetime, Dict[str, Any]] = {}
+        for bucket_start, sent, failed, read, snoozed in query.group_by(AlertHourlyRollup.bucket_start):
+            if granularity == "day":
+                bucket_start = bucket_start.replace(hour=0)
+            bucket = buckets.setdefault(bucket_start, {"bucket_start": bucket_start, **{m: 0 for m in ROLLUP_METRICS}})
+            bucket["sent"] += sent or 0
+            bucket["failed"] += failed or 0
+            bucket["read"] += read or 0
+            bucket["snoozed"] += snoozed or 0
+        
+        return [buckets[key] for key in sorted(buckets)]
+    
+    def _rebuild(self, start: datetime, end: datetime, advance_watermark: bool) -> Dict[str, Any]:
+        """Rebuild every hour bucket touching [start, end), one committed slice at a time"""
+        slice_start = floor_hour(start)
+        stats = {"buckets": 0, "rows": 0}
+        while slice_start < end:
+            slice_end = min(slice_start + timedelta(hours=config.ROLLUP_SLICE_HOURS), floor_hour(end) + timedelta(hours=1))
+            stats["rows"] += self._rebuild_slice(slice_start, slice_end)
+            stats["buckets"] += int((slice_end - slice_start).total_seconds() // 3600)
+            if advance_watermark:
+                self._set_watermark(min(slice_end, end))
+            self.db.commit()
+            slice_start = slice_end
+        
+        logger.info("Rolled up %d hour buckets (%d rows) from %s to %s", stats["buckets"], stats["rows"], start, end)
+        return stats
+    
+    def _rebuild_slice(self, start: datetime, end: datetime) -> int:
+        """Replace the rollup rows for the hour buckets in [start, end) (not committed)"""
+        rows: Dict[Tuple[datetime, int, str], Dict[str, Any]] = {}
+        
+        def row_for(bucket, alert_id, channel):
+            key = (_as_datetime(bucket), alert_id, channel)
+            if key not in rows:
+                rows[key] = {
+                    "bucket_start": key[0], "alert_id": alert_id, "channel": channel,
+                    "sent_count": 0, "failed_count": 0, "read_count": 0, "snoozed_count": 0
+                }
+            return rows[key]
+        
+        # Deliveries, by the channel they went out on
+        bucket = _hour_bucket(self.db, NotificationDelivery.delivered_at)
+        deliveries = self.db.query(
+            bucket,
+            NotificationDelivery.alert_id,
+            NotificationDelivery.delivery_type,
+            func.sum(case((NotificationDelivery.status == NotificationStatusEnum.FAILED, 0), else_=1)),
+            func.sum(case((NotificationDelivery.status == NotificationStatusEnum.FAILED, 1), else_=0))
+        ).filter(
+            NotificationDelivery.delivered_at >= start,
+            NotificationDelivery.delivered_at < end
+        ).group_by(bucket, NotificationDelivery.alert_id, NotificationDelivery.delivery_type)
+        for bucket_start, alert_id, channel, sent, failed in deliveries:
+            row = row_for(bucket_start, alert_id, channel or "unknown")
+            row["sent_count"] += sent or 0
+            row["failed_count"] += failed or 0
+        
+        # Reads and snoozes, attributed to the alert's channel. Preferences only keep their latest
+        # state, so a snooze counts in the hour it was made for as long as the user hasn't read it
+        alerts = {}
+        for timestamp, state, field in (
+            (UserAlertPreference.read_at, UserAlertStateEnum.READ, "read_count"),
+            (UserAlertPreference.updated_at, UserAlertStateEnum.SNOOZED, "snoozed_count"),
+        ):
+            bucket = _hour_bucket(self.db, timestamp)
+            counts = self.db.query(
+                bucket,
+                UserAlertPreference.alert_id,
+                Alert.delivery_type,
+                Alert.severity,
+                func.count(UserAlertPreference.id)
+            ).join(Alert, Alert.id == UserAlertPreference.alert_id).filter(
+                UserAlertPreference.state == state,
+                timestamp >= start,
+                timestamp < end
+            ).group_by(bucket, UserAlertPreference.alert_id, Alert.delivery_type, Alert.severity)
+            for bucket_start, alert_id, delivery_type, severity, count in counts:
+                alerts[alert_id] = severity
+                row = row_for(bucket_start, alert_id, delivery_type.value if delivery_type else "unknown")
+                row[field] += count
+        
+        missing = {alert_id for _, alert_id, _ in rows} - alerts.keys()
+        if missing:
+            alerts.update(self.db.query(Alert.id, Alert.severity).filter(Alert.id.in_(missing)).all())
+        
+        self.db.execute(delete(AlertHourlyRollup).where(
+            AlertHourlyRollup.bucket_start >= start,
+            AlertHourlyRollup.bucket_start < end
+        ))
+        if rows:
+            now = datetime.utcnow()
+            self.db.execute(insert(AlertHourlyRollup), [
+                {**row, "severity": alerts.get(row["alert_id"]), "updated_at": now} for row in rows.values()
+            ])
+        return len(rows)
+    
+    def _earliest_event(self) -> Optional[datetime]:
+        candidates = [
+            self.db.query(func.min(NotificationDelivery.delivered_at)).scalar(),
+            self.db.query(func.min(UserAlertPreference.read_at)).scalar(),
+            self.db.query(func.min(UserAlertPreference.updated_at)).filter(
+                UserAlertPreference.state == UserAlertStateEnum.SNOOZED
+            ).scalar()
+        ]
+        candidates = [_as_datetime(value) for value in candidates if value is not None]
+        return min(candidates) if candidates else None
+    
+    def _set_watermark(self, processed_until: datetime):
+        watermark = self.db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK_NAME).first()
+        if watermark is None:
+            watermark = RollupWatermark(name=WATERMARK_NAME)
+            self.db.add(watermark)
+        watermark.processed_until = processed_until
+        watermark.updated_at = datetime.utcnow()
+
+class AsyncRollupService:
+    """Async rollup API - runs RollupService through an AsyncSession"""
+    
+    def __init__(self, db):
+        self.db = db
+    
+    async def get_trends(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        return await run_in_session(self.db, lambda session: RollupService(session).get_trends(*args, **kwargs))
+    
+    async def backfill(self, start: datetime = None, end: datetime = None) -> Dict[str, Any]:
+        return await run_in_session(self.db, lambda session: RollupService(session).backfill(start, end))
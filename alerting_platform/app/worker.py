@@ -0,0 +1,94 @@
+"""Delivery worker - runs the jobs written to the delivery outbox by the API.
+    
+    python -m app.worker [--processes N]
+
+Each process claims one job at a time under a lease and fans it out with the usual
+NotificationService dispatch, so delivery throughput scales with the number of processes
+(and machines) independently of the API. Enable the outbox in the API with USE_DELIVERY_OUTBOX=true.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+
+from .core import config
+from .core.smtp_pool import close_smtp_pool
+from .core.webhook_pool import close_webhook_pool
+from .database import create_tables
+from .services.delivery_log import delivery_log_writer
+from .services.delivery_retries import delivery_retries
+from .services.latency_sketches import latency_sketches
+from .services.metric_counters import metric_counters
+from .services.outbox import DeliveryOutbox
+
+logger = logging.getLogger(__name__)
+
+async def work(owner: str, stop: asyncio.Event):
+    """Claim and run delivery jobs until stop is set"""
+    outbox = DeliveryOutbox()
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        job_id = await loop.run_in_executor(None, outbox.claim, owner)
+        if job_id is None:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=config.OUTBOX_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        
+        stats = await outbox.run(job_id, owner)
+        logger.info("Worker %s finished delivery job %d: %s", owner, job_id, stats)
+
+def run_process(index: int):
+    """Entry point of one worker process"""
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    owner = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Finish the current job, then exit
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await work(owner, stop)
+        finally:
+            await close_smtp_pool()
+            await close_webhook_pool()
+            delivery_log_writer.flush()
+            delivery_retries.flush()
+            metric_counters.flush()
+            latency_sketches.flush()
+    
+    asyncio.run(main())
+
+def main():
+    parser = argparse.ArgumentParser(description="Run delivery outbox workers")
+    parser.add_argument("--processes", type=int, default=config.WORKER_PROCESSES)
+    args = parser.parse_args()
+    
+    create_tables()
+    if args.processes <= 1:
+        run_process(0)
+        return
+    
+    # Spawn (not fork) so no process inherits another's database connections
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_process, args=(index,), name=f"delivery-worker-{index}")
+        for index in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    
+    # Ctrl+C reaches the whole process group, so the parent just waits; SIGTERM is passed on to the children
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: [process.terminate() for process in processes])
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark / check: alert observers run inline vs. on the event bus.
+
+Seeds --users users and creates --alerts ORGANIZATION alerts with three observers attached:
+a NotificationObserver fanning out through an in-app stand-in that takes --latency seconds
+per send, an observer that always raises, and one that hangs past its --timeout-ms timeout.
+
+Inline (observers awaited one after another in create_alert, as before), every create waits
+for the whole fan-out, and the failing observer's exception aborts the request. On the event
+bus, create_alert returns once the events are queued. The bus then runs the observers
+concurrently, and drain() waits for them.
+
+Reports create_alert time per alert in each mode. Checks that on the bus every alert still
+reached every user despite the failing and hanging observers, and that their failures and
+timeouts were counted. With --queue-size smaller than --alerts it also checks that
+publishing waited for room instead of queueing without bound.
+
+Usage:
+    python benchmarks/bench_alert_events.py [--users 500] [--alerts 20] [--latency 0.02] [--queue-size 100]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from common import make_session_factory, seed_users
+
+from app.core.event_bus import AlertEventBus
+from app.models.alert import Alert
+from app.models.notification import NotificationDelivery
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertObserver, AlertSubject, NotificationObserver
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+class SlowInAppStrategy(NotificationStrategy):
+    """In-app stand-in with a fixed per-send latency"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return {"status": "sent", "channel": "in_app", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "in_app"
+
+class FailingObserver(AlertObserver):
+    """Raises on every event"""
+    
+    async def on_alert_created(self, alert: Alert) -> None:
+        raise RuntimeError("analytics backend unavailable")
+    
+    async def on_alert_updated(self, alert: Alert) -> None:
+        raise RuntimeError("analytics backend unavailable")
+    
+    async def on_alert_expired(self, alert: Alert) -> None:
+        raise RuntimeError("analytics backend unavailable")
+
+class HangingObserver(AlertObserver):
+    """Takes far longer than its timeout"""
+    
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+    
+    async def on_alert_created(self, alert: Alert) -> None:
+        await asyncio.sleep(self.timeout_seconds * 100)
+    
+    async def on_alert_updated(self, alert: Alert) -> None:
+        await asyncio.sleep(self.timeout_seconds * 100)
+    
+    async def on_alert_expired(self, alert: Alert) -> None:
+        await asyncio.sleep(self.timeout_seconds * 100)
+
+class InlineSubject(AlertSubject):
+    """The previous AlertSubject - observers awaited one after another by the caller"""
+    
+    async def notify_created(self, alert: Alert) -> None:
+        for observer in self._observers:
+            await observer.on_alert_created(alert)
+
+async def run(users: int, alerts: int, latency: float, timeout: float, queue_size: int):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        strategy = SlowInAppStrategy(latency)
+        delivery_log = DeliveryLogWriter(SessionLocal)
+        
+        def make_service(session) -> NotificationService:
+            service = NotificationService(session, delivery_log)
+            service.notification_context.add_strategy("in_app", strategy)
+            return service
+        
+        print(f"{users} users x {alerts} alerts, {latency * 1000:.0f} ms per send, "
+              f"a failing and a hanging ({timeout * 1000:.0f} ms timeout) observer attached")
+        print(f"{'mode':<10} {'create_alert (ms)':>18} {'failed creates':>15} {'until all done (s)':>19}")
+        for name in ("inline", "event bus"):
+            bus = AlertEventBus(max_queue=queue_size)
+            subject = InlineSubject(bus) if name == "inline" else AlertSubject(bus)
+            subject.attach(NotificationObserver(make_service, session_factory=SessionLocal))
+            subject.attach(FailingObserver())
+            subject.attach(HangingObserver(timeout))
+            alert_service = AlertService(db, subject)
+            
+            db.query(NotificationDelivery).delete()
+            db.commit()
+            failed_creates, create_seconds = 0, 0.0
+            started = time.perf_counter()
+            for number in range(alerts):
+                create_started = time.perf_counter()
+                try:
+                    await alert_service.create_alert(
+                        {"title": f"Benchmark {number}", "message": "Alert events"}, created_by=1
+                    )
+                except RuntimeError:
+                    failed_creates += 1
+                create_seconds += time.perf_counter() - create_started
+            await bus.drain()
+            elapsed = time.perf_counter() - started
+            delivery_log.flush()
+            
+            print(f"{name:<10} {create_seconds / alerts * 1000:>18.1f} {failed_creates:>15} {elapsed:>19.3f}")
+            if name == "event bus":
+                check_bus(db, users, alerts, failed_creates, bus, queue_size)
+    finally:
+        db.close()
+
+def check_bus(db, users: int, alerts: int, failed_creates: int, bus: AlertEventBus, queue_size: int):
+    stats = {lane["observer"]: lane for lane in bus.stats()}
+    for lane in stats.values():
+        print(f"    {lane['observer']:<22} completed {lane['completed']:>4}  failed {lane['failed']:>4}  "
+              f"timed out {lane['timed_out']:>4}  publishes that waited for room {lane['blocked']:>4}")
+    
+    assert failed_creates == 0, "a failing observer should never fail create_alert"
+    delivered = db.query(NotificationDelivery).count()
+    assert delivered == users * alerts, f"{delivered} deliveries, expected {users * alerts}"
+    assert stats["NotificationObserver"]["completed"] == alerts
+    assert stats["FailingObserver"]["failed"] == alerts
+    assert stats["HangingObserver"]["timed_out"] == alerts
+    assert all(lane["queued"] == 0 and lane["in_flight"] == 0 for lane in stats.values()), "drain left events behind"
+    if queue_size < alerts:
+        assert any(lane["blocked"] for lane in stats.values()), "a full queue should make publish wait"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--alerts", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--timeout-ms", type=float, default=100)
+    parser.add_argument("--queue-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.alerts, args.latency, args.timeout_ms / 1000, args.queue_size))
@@ -0,0 +1,48 @@
+"""
+Benchmark: alert creation time vs. audience size.
+
+Creates an ORGANIZATION alert against databases seeded with a growing number of
+users and reports how long AlertService.create_alert takes (preference fan-out
+included, observers excluded).
+
+Usage:
+    python benchmarks/bench_alert_fanout.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import asyncio
+import time
+
+from common import make_session_factory, seed_users
+
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.models.notification import UserAlertPreference
+
+async def run(sizes):
+    print(f"{'users':>10} {'create_alert (s)':>18} {'us/user':>10} {'prefs':>10}")
+    for size in sizes:
+        SessionLocal = make_session_factory()
+        db = SessionLocal()
+        try:
+            seed_users(db, size)
+            alert_service = AlertService(db, AlertSubject())
+            
+            started = time.perf_counter()
+            alert = await alert_service.create_alert(
+                {"title": "Benchmark", "message": "Org-wide fan-out", "visibility_type": "organization"},
+                created_by=1
+            )
+            elapsed = time.perf_counter() - started
+            
+            preferences = db.query(UserAlertPreference).filter(
+                UserAlertPreference.alert_id == alert.id
+            ).count()
+            print(f"{size:>10} {elapsed:>18.3f} {elapsed / size * 1e6:>10.2f} {preferences:>10}")
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000, 200000])
+    args = parser.parse_args()
+    asyncio.run(run(args.sizes))
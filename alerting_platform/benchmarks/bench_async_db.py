@@ -0,0 +1,93 @@
+"""
+Benchmark: sync vs. async database path for async route handlers.
+
+Runs --requests concurrent analytics requests (AnalyticsService.get_system_metrics,
+the heaviest read) plus a heartbeat coroutine that ticks every 10 ms. The sync path
+calls the service on a regular Session inside the coroutine, exactly like the
+routes did before USE_ASYNC_DB; the async path goes through AsyncAnalyticsService
+on an aiosqlite AsyncSession. Reports request throughput and the worst heartbeat
+lag, i.e. how long the event loop was blocked.
+
+Usage:
+    python benchmarks/bench_async_db.py [--users 20000] [--alerts 10] [--requests 20]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from common import make_session_factory, seed_users
+
+from app.database import _async_database_url
+from app.models.notification import NotificationDelivery, NotificationStatusEnum
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.analytics_service import AnalyticsService, AsyncAnalyticsService
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the worst observed delay between scheduled ticks"""
+    worst_lag = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        worst_lag = max(worst_lag, time.perf_counter() - expected)
+    return worst_lag
+
+async def measure(label: str, requests: int, handler):
+    stop = asyncio.Event()
+    heartbeat_task = asyncio.create_task(heartbeat(stop))
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(handler() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    
+    stop.set()
+    worst_lag = await heartbeat_task
+    print(f"{label:>6} {elapsed:>12.3f} {requests / elapsed:>10.1f} {worst_lag * 1000:>18.1f}")
+
+async def run(users: int, alerts: int, requests: int):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        for index in range(alerts):
+            alert = await AlertService(db, AlertSubject()).create_alert(
+                {"title": f"Benchmark {index}", "message": "Async DB benchmark"}, created_by=1
+            )
+            db.execute(insert(NotificationDelivery), [
+                {"alert_id": alert.id, "user_id": user_id, "delivery_type": "in_app", "status": NotificationStatusEnum.SENT}
+                for user_id in range(1, users + 1)
+            ])
+        db.commit()
+    finally:
+        db.close()
+    
+    async_engine = create_async_engine(_async_database_url(str(SessionLocal.kw["bind"].url)))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    
+    async def sync_request():
+        session = SessionLocal()
+        try:
+            AnalyticsService(session).get_system_metrics()
+        finally:
+            session.close()
+    
+    async def async_request():
+        async with AsyncSessionLocal() as session:
+            await AsyncAnalyticsService(session).get_system_metrics()
+    
+    print(f"{users * alerts} preferences / deliveries, {requests} concurrent /analytics/system requests")
+    print(f"{'path':>6} {'elapsed (s)':>12} {'req/s':>10} {'max loop lag (ms)':>18}")
+    await measure("sync", requests, sync_request)
+    await measure("async", requests, async_request)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--alerts", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.alerts, args.requests))
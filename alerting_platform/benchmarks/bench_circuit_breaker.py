@@ -0,0 +1,132 @@
+"""
+Benchmark: a provider outage with and without the email circuit breaker.
+
+Registers a fault-injecting email stand-in that, while "down", waits out a --timeout-ms
+timeout on every send and then raises. Fans --alerts warning email alerts out to --users
+recipients during the outage, once with the breaker disabled and once enabled, and
+reports the fan-out time - with the breaker open, sends fail fast instead of each waiting
+for its timeout. Failed sends are queued for retry either way.
+
+Then, with the circuit still open, a critical email alert is sent (reporting how many users
+it reached through the in-app fallback channel), the provider comes back, and after
+--open-seconds two more alerts show the probe closing the circuit again and sends going
+through once it has. tests/test_circuit_breaker.py checks this behaviour, including a
+cancelled probe.
+
+Usage:
+    python benchmarks/bench_circuit_breaker.py [--users 200] [--alerts 5] [--timeout-ms 50]
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from common import make_session_factory, seed_users
+
+from app.core import config
+from app.core.circuit_breaker import circuit_breakers
+from app.models.alert import Alert
+from app.models.notification import DeliveryRetry, NotificationDelivery, NotificationStatusEnum
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.delivery_retries import DeliveryRetries
+from app.services.notification_service import NotificationService
+
+class FaultyEmailStrategy(NotificationStrategy):
+    """Email stand-in - times out (after `timeout` seconds) on every send while down"""
+    
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.down = False
+        self.attempts = 0
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        self.attempts += 1
+        if self.down:
+            await asyncio.sleep(self.timeout)
+            raise TimeoutError("provider did not respond")
+        return {"status": "sent", "channel": "email", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "email"
+
+async def run(users: int, alerts: int, timeout: float, open_seconds: float):
+    config.CIRCUIT_OPEN_SECONDS = open_seconds
+    config.CIRCUIT_FALLBACK_CHANNEL = "in_app"
+    
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        alert_service = AlertService(db, AlertSubject())
+        
+        async def create(number: int, severity: str = "warning") -> Alert:
+            return await alert_service.create_alert({
+                "title": f"Benchmark {number}",
+                "message": "Circuit breaker",
+                "delivery_type": "email",
+                "severity": severity
+            }, created_by=1)
+        
+        created = [await create(number) for number in range(alerts)]
+        strategy = FaultyEmailStrategy(timeout)
+        delivery_log = DeliveryLogWriter(SessionLocal)
+        retries = DeliveryRetries(SessionLocal)
+        
+        def make_service() -> NotificationService:
+            service = NotificationService(db, delivery_log, retries=retries)
+            service.notification_context.add_strategy("email", strategy, concurrency_limit=10)
+            return service
+        
+        print(f"{users} users x {alerts} email alerts during an outage, {timeout * 1000:.0f} ms per timed-out send")
+        print(f"{'breaker':<10} {'elapsed (s)':>12} {'provider calls':>15} {'queued for retry':>17}")
+        elapsed = {}
+        for name, threshold in (("off", 0), ("on", 5)):
+            config.CIRCUIT_FAILURE_THRESHOLD = threshold
+            circuit_breakers.reset()
+            db.query(DeliveryRetry).delete()
+            db.commit()
+            strategy.down, strategy.attempts = True, 0
+            
+            started = time.perf_counter()
+            for alert in created:
+                await make_service().process_new_alert(alert)
+            elapsed[name] = time.perf_counter() - started
+            retries.flush()
+            queued = db.query(DeliveryRetry).count()
+            print(f"{name:<10} {elapsed[name]:>12.3f} {strategy.attempts:>15} {queued:>17}")
+        
+        # Still down and open: a critical alert goes out in-app instead
+        breaker = circuit_breakers.get("email")
+        critical = await create(alerts, "critical")
+        stats = await make_service().process_new_alert(critical)
+        delivery_log.flush()
+        fallback = db.query(NotificationDelivery).filter(
+            NotificationDelivery.alert_id == critical.id,
+            NotificationDelivery.delivery_type == "in_app",
+            NotificationDelivery.status == NotificationStatusEnum.SENT
+        ).count()
+        print(f"critical alert while open: {stats['sent']} sent, {fallback} recorded as in-app fallback deliveries")
+        
+        # Provider recovers; after open_seconds a probe is let through and closes the circuit
+        strategy.down = False
+        await asyncio.sleep(open_seconds)
+        # (the probe is a single send - the rest of that fan-out still fails fast and is queued for retry)
+        stats = await make_service().process_new_alert(await create(alerts + 1))
+        print(f"first alert after recovery: {stats['sent']} sent (the probe), {stats['failed']} failed fast")
+        stats = await make_service().process_new_alert(await create(alerts + 2))
+        print(f"next alert: {stats['sent']} sent; breaker {breaker.stats()}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--alerts", type=int, default=5)
+    parser.add_argument("--timeout-ms", type=float, default=50)
+    parser.add_argument("--open-seconds", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.alerts, args.timeout_ms / 1000, args.open_seconds))
@@ -0,0 +1,143 @@
+"""
+Benchmark / check: failed deliveries retried in the background, then dead-lettered and replayed.
+
+Fans --alerts ORGANIZATION alerts out to --users recipients through an in-app stand-in
+that fails each send with probability --failure-rate (and always fails, permanently, for
+every --unreachable-th user). Compares the fan-out time against a run without failures -
+failed sends are only queued, so the fan-out shouldn't slow down - then runs drain rounds
+(backoff shortened to --base-ms) until no retries are left. Finally the stand-in is
+"fixed", the dead letters are replayed and drained once more.
+
+Checks that every (user, alert) pair ends up with exactly one successful delivery or one
+dead letter, never both, and that after the replay every pair has been delivered.
+
+Usage:
+    python benchmarks/bench_delivery_retries.py [--users 2000] [--alerts 5] [--failure-rate 0.3]
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict
+
+from common import make_session_factory, seed_users
+
+from app.core import config
+from app.models.alert import Alert
+from app.models.notification import DeadLetterDelivery, DeliveryRetry, NotificationDelivery, NotificationStatusEnum
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.delivery_retries import DeliveryRetries
+from app.services.notification_service import NotificationService
+
+class FlakyInAppStrategy(NotificationStrategy):
+    """In-app stand-in that fails a share of sends, and every send to unreachable users"""
+    
+    def __init__(self, latency: float, failure_rate: float, unreachable: int):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.unreachable = unreachable
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        if self.unreachable and user.id % self.unreachable == 0:
+            return {"status": "failed", "error": "no device registered", "retryable": False}
+        if random.random() < self.failure_rate:
+            raise ConnectionError("provider unavailable")
+        return {"status": "sent", "channel": "in_app", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "in_app"
+
+async def run(users: int, alerts: int, failure_rate: float, unreachable: int, latency: float, base_ms: float):
+    # Short backoff so the benchmark doesn't wait minutes between rounds
+    config.DELIVERY_RETRY_BASE_SECONDS = base_ms / 1000
+    config.DELIVERY_RETRY_MAX_SECONDS = base_ms * 8 / 1000
+    # Failures here are random, not an outage - keep the in-app circuit from opening
+    config.CIRCUIT_FAILURE_THRESHOLD = 0
+    
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        start_id = seed_users(db, users)
+        created = [
+            await AlertService(db, AlertSubject()).create_alert(
+                {"title": f"Benchmark {number}", "message": "Delivery retries"}, created_by=1
+            )
+            for number in range(alerts)
+        ]
+        
+        delivery_log = DeliveryLogWriter(SessionLocal)
+        retries = DeliveryRetries(SessionLocal)
+        strategy = FlakyInAppStrategy(latency, failure_rate, unreachable)
+        
+        def make_service(session):
+            service = NotificationService(session, delivery_log, retries=retries)
+            service.notification_context.add_strategy("in_app", strategy)
+            return service
+        
+        print(f"{users} users x {alerts} alerts, {failure_rate:.0%} of sends fail, "
+              f"every {unreachable}th user unreachable, max {retries.max_attempts} attempts")
+        for name, rate in (("fan-out, no failures", 0.0), ("fan-out with failures", failure_rate)):
+            strategy.failure_rate = rate
+            db.query(NotificationDelivery).delete()
+            db.query(DeliveryRetry).delete()
+            db.query(DeadLetterDelivery).delete()
+            db.commit()
+            started = time.perf_counter()
+            for alert in created:
+                await make_service(db).process_new_alert(alert)
+            elapsed = time.perf_counter() - started
+            retries.flush()
+            delivery_log.flush()
+            print(f"{name:<24} {elapsed:>8.3f} s   {db.query(DeliveryRetry).count()} queued for retry, "
+                  f"{db.query(DeadLetterDelivery).count()} dead-lettered")
+        
+        rounds = 0
+        started = time.perf_counter()
+        while db.query(DeliveryRetry).count():
+            await asyncio.sleep(config.DELIVERY_RETRY_BASE_SECONDS)
+            totals = await retries.drain(owner="bench", service_factory=make_service)
+            delivery_log.flush()
+            rounds += 1
+            print(f"drain round {rounds:>3}: {totals}")
+        print(f"retry queue empty after {rounds} drain rounds ({time.perf_counter() - started:.2f} s)")
+        
+        expected = {(user_id, alert.id) for user_id in range(start_id, start_id + users) for alert in created}
+        delivered = check_outcomes(db, expected)
+        
+        strategy.failure_rate, strategy.unreachable = 0.0, 0
+        replayed = retries.replay(db)
+        totals = await retries.drain(owner="bench", service_factory=make_service)
+        delivery_log.flush()
+        print(f"replayed {replayed} dead letters after fixing the channel: {totals}")
+        assert check_outcomes(db, expected) == expected, "every delivery should have succeeded after the replay"
+        assert delivered < expected
+    finally:
+        db.close()
+
+def check_outcomes(db, expected):
+    sent = db.query(NotificationDelivery.user_id, NotificationDelivery.alert_id).filter(
+        NotificationDelivery.status == NotificationStatusEnum.SENT
+    ).all()
+    dead = db.query(DeadLetterDelivery.user_id, DeadLetterDelivery.alert_id).all()
+    assert len(sent) == len(set(sent)), "a delivery succeeded more than once"
+    assert len(dead) == len(set(dead)), "a delivery was dead-lettered more than once"
+    assert not set(sent) & set(dead), "a delivery is both sent and dead-lettered"
+    assert set(sent) | set(dead) == expected, "some deliveries were neither sent nor dead-lettered"
+    print(f"outcome: {len(sent)} delivered, {len(dead)} dead-lettered")
+    return set(sent)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--alerts", type=int, default=5)
+    parser.add_argument("--failure-rate", type=float, default=0.3)
+    parser.add_argument("--unreachable", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.001)
+    parser.add_argument("--base-ms", type=float, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.alerts, args.failure_rate, args.unreachable, args.latency, args.base_ms))
@@ -0,0 +1,68 @@
+"""
+Benchmark: notification dispatch throughput vs. per-channel concurrency.
+
+Registers an in-app strategy that takes --latency seconds per send (a stand-in
+for a slow provider), fans one ORGANIZATION alert out to --users recipients and
+reports notifications per second for each concurrency limit.
+
+Usage:
+    python benchmarks/bench_dispatch.py [--users 1000] [--latency 0.1] [--limits 1 10 100 500]
+"""
+import argparse
+import asyncio
+from typing import Dict, Any
+
+from common import make_session_factory, seed_users
+
+from app.models.alert import Alert
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+class SlowInAppStrategy(NotificationStrategy):
+    """In-app stand-in with a fixed per-send latency"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return {"status": "sent", "channel": "in_app", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "in_app"
+
+async def run(users: int, latency: float, limits):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        alert = await AlertService(db, AlertSubject()).create_alert(
+            {"title": "Benchmark", "message": "Dispatch throughput"}, created_by=1
+        )
+        
+        print(f"{users} recipients, {latency * 1000:.0f} ms per send")
+        print(f"{'limit':>8} {'elapsed (s)':>12} {'sends/s':>10} {'deliveries logged':>18}")
+        for limit in limits:
+            delivery_log = DeliveryLogWriter(SessionLocal)
+            notification_service = NotificationService(db, delivery_log)
+            notification_service.notification_context.add_strategy(
+                "in_app", SlowInAppStrategy(latency), concurrency_limit=limit
+            )
+            
+            stats = await notification_service.process_new_alert(alert)
+            logged = delivery_log.flush()
+            print(f"{limit:>8} {stats['elapsed_seconds']:>12.3f} {stats['per_second']:>10.1f} {logged:>18}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 10, 100, 500])
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.latency, args.limits))
@@ -0,0 +1,87 @@
+"""
+Benchmark: email fan-out through the pooled SMTP strategy.
+
+Starts the tests' minimal SMTP server on localhost (EHLO, AUTH PLAIN, MAIL, RCPT, DATA,
+RSET, NOOP, QUIT), waiting --rtt seconds before every reply, as a stand-in for a remote
+relay, and refuses every --reject-every'th recipient. One ORGANIZATION email alert is
+fanned out to --users recipients with the real EmailNotificationStrategy in three modes:
+    
+    new connection per message   - connect + EHLO + AUTH for every email
+    pooled, 1 recipient/message  - logged-in sessions reused across messages
+    pooled, batched recipients   - reused sessions, SMTP_RECIPIENTS_PER_MESSAGE per message
+
+Reports emails per second, connections opened and messages sent for each mode
+(tests/test_smtp_pool.py checks the deliveries themselves).
+
+Usage:
+    python benchmarks/bench_email.py [--users 2000] [--rtt 0.005] [--pool-size 10] [--reject-every 50]
+"""
+import argparse
+import asyncio
+
+from common import make_session_factory, seed_users
+
+from app.core import config
+from app.core.smtp_pool import SMTPConnectionPool
+from app.models.notification import NotificationDelivery
+from app.patterns.notification_strategy import EmailNotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+from tests.smtp_stub import PASSWORD, USERNAME, StubSMTPServer
+
+async def run(users: int, rtt: float, pool_size: int, reject_every: int):
+    server = StubSMTPServer(rtt, reject_every)
+    port = await server.start()
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        start_id = seed_users(db, users)
+        alert = await AlertService(db, AlertSubject()).create_alert(
+            {"title": "Benchmark", "message": "Email throughput", "delivery_type": "email"}, created_by=1
+        )
+        addresses = {f"user{user_id}@example.com" for user_id in range(start_id, start_id + users)}
+        expected = {address for address in addresses if not server.refuses(address)}
+        
+        modes = [
+            ("new connection per message", 1, 1),
+            ("pooled, 1 recipient/message", config.SMTP_MESSAGES_PER_CONNECTION, 1),
+            ("pooled, batched recipients", config.SMTP_MESSAGES_PER_CONNECTION, config.SMTP_RECIPIENTS_PER_MESSAGE),
+        ]
+        print(f"{users} recipients, {rtt * 1000:.1f} ms per SMTP reply, pool of {pool_size}, "
+              f"{len(addresses) - len(expected)} refused")
+        print(f"{'mode':<30} {'elapsed (s)':>12} {'emails/s':>10} {'connections':>12} {'messages':>9}")
+        for name, messages_per_connection, batch_size in modes:
+            server.reset_counts()
+            pool = SMTPConnectionPool(
+                hostname="127.0.0.1", port=port, username=USERNAME, password=PASSWORD,
+                use_tls=False, start_tls=False, max_size=pool_size, max_messages=messages_per_connection
+            )
+            strategy = EmailNotificationStrategy(pool=pool, sender="alerts@example.com")
+            strategy.max_batch_size = batch_size
+            
+            delivery_log = DeliveryLogWriter(SessionLocal)
+            notification_service = NotificationService(db, delivery_log)
+            notification_service.notification_context.add_strategy("email", strategy, concurrency_limit=pool_size)
+            
+            stats = await notification_service.process_new_alert(alert)
+            await pool.close()
+            delivery_log.flush()
+            
+            print(f"{name:<30} {stats['elapsed_seconds']:>12.3f} {stats['per_second']:>10.1f} "
+                  f"{server.connections:>12} {server.messages:>9}")
+            db.query(NotificationDelivery).delete()
+            db.commit()
+    finally:
+        db.close()
+        await server.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rtt", type=float, default=0.005)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--reject-every", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.rtt, args.pool_size, args.reject_every))
@@ -0,0 +1,116 @@
+"""
+Benchmark: statements issued per inbox load vs. inbox size.
+
+Seeds a user who belongs to a team, then grows their inbox to each of --sizes alerts:
+half ORGANIZATION alerts, a quarter targeted at their team and a quarter at them. Each
+step also adds alerts the user must not see: another team's, another user's, archived
+and inactive ones. Some visible alerts are marked read or snoozed.
+
+Counts the SQL statements AlertService.query_alerts_for_user runs, using a
+before_cursor_execute listener on the engine, for the whole inbox, for unread only
+and for one cursor page, and times the whole-inbox load. Each should stay a single
+statement at every size (tests/test_inbox_queries.py checks that).
+
+Usage:
+    python benchmarks/bench_inbox_queries.py [--sizes 10 100 1000 5000] [--page-size 50]
+"""
+import argparse
+import time
+
+from sqlalchemy import event, insert
+
+from common import make_session_factory, seed_users
+
+from app.models.alert import Alert, DeliveryTypeEnum, SeverityEnum, VisibilityTypeEnum
+from app.models.notification import UserAlertPreference, UserAlertStateEnum
+from app.models.user import Team
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+
+class StatementCounter:
+    """Counts the statements an engine sends to the database"""
+    
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+    
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+    
+    def measure(self, fn):
+        """Run fn(); returns (result, statements, seconds)"""
+        self.count = 0
+        started = time.perf_counter()
+        result = fn()
+        return result, self.count, time.perf_counter() - started
+
+def add_alerts(db, count: int, **fields) -> list:
+    rows = [
+        {
+            "title": f"Benchmark {number}",
+            "message": "Inbox queries",
+            "severity": SeverityEnum.INFO,
+            "delivery_type": DeliveryTypeEnum.IN_APP,
+            "is_active": True,
+            "is_archived": False,
+            **fields
+        }
+        for number in range(count)
+    ]
+    return list(db.execute(insert(Alert).returning(Alert.id), rows).scalars())
+
+def run(sizes, page_size: int):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        user_id = seed_users(db, 10, team_size=5)
+        other_user_id = seed_users(db, 5, team_size=5)
+        team_id, other_team_id = [team_id for (team_id,) in db.query(Team.id).order_by(Team.id)]
+        counter = StatementCounter(db.get_bind())
+        alert_service = AlertService(db, AlertSubject())
+        
+        visible = []
+        print(f"{'inbox size':>10} {'all (stmts)':>12} {'unread (stmts)':>15} {'page (stmts)':>13} {'all (ms)':>9}")
+        for size in sorted(sizes):
+            missing = size - len(visible)
+            new_ids = (
+                add_alerts(db, missing - 2 * (missing // 4), visibility_type=VisibilityTypeEnum.ORGANIZATION)
+                + add_alerts(db, missing // 4, visibility_type=VisibilityTypeEnum.TEAM, target_team_id=team_id)
+                + add_alerts(db, missing // 4, visibility_type=VisibilityTypeEnum.USER, target_user_id=user_id)
+            )
+            # Not in this user's inbox
+            hidden = max(missing // 4, 1)
+            add_alerts(db, hidden, visibility_type=VisibilityTypeEnum.TEAM, target_team_id=other_team_id)
+            add_alerts(db, hidden, visibility_type=VisibilityTypeEnum.USER, target_user_id=other_user_id)
+            add_alerts(db, hidden, visibility_type=VisibilityTypeEnum.ORGANIZATION, is_archived=True)
+            add_alerts(db, hidden, visibility_type=VisibilityTypeEnum.ORGANIZATION, is_active=False)
+            
+            preferences = []
+            for index, alert_id in enumerate(new_ids, start=len(visible)):
+                if index % 3 == 0:
+                    preferences.append({"user_id": user_id, "alert_id": alert_id, "state": UserAlertStateEnum.READ})
+                elif index % 5 == 0:
+                    preferences.append({"user_id": user_id, "alert_id": alert_id, "state": UserAlertStateEnum.SNOOZED})
+            if preferences:
+                db.execute(insert(UserAlertPreference), preferences)
+            db.commit()
+            visible.extend(new_ids)
+            
+            _, all_statements, elapsed = counter.measure(lambda: alert_service.query_alerts_for_user(user_id))
+            _, unread_statements, _ = counter.measure(
+                lambda: alert_service.query_alerts_for_user(user_id, states=["unread"])
+            )
+            cursor = sorted(visible, reverse=True)[min(page_size, len(visible) - 1)]
+            _, page_statements, _ = counter.measure(
+                lambda: alert_service.query_alerts_for_user(user_id, cursor=cursor, limit=page_size)
+            )
+            print(f"{size:>10} {all_statements:>12} {unread_statements:>15} {page_statements:>13} {elapsed * 1000:>9.1f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+    run(args.sizes, args.page_size)
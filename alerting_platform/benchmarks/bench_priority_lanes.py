@@ -0,0 +1,146 @@
+"""
+Benchmark / check: a critical alert created during a big info reminder cycle.
+
+Seeds --users users and --info-alerts INFO ORGANIZATION alerts, all due for a reminder,
+and starts a reminder cycle through an in-app stand-in that takes --latency seconds per
+send under a --limit concurrency limit. --delay seconds in, a CRITICAL alert for a team
+of --team-size users is created and fanned out while the cycle is still running.
+
+Runs this twice: once with a single lane (sends get slots in arrival order, as before)
+and once with the default severity lanes (DISPATCH_LANE_WEIGHTS). Reports how long the
+critical fan-out took, how long the whole cycle took and each lane's wait times. Checks
+that the critical fan-out finishes sooner with lanes and that info sends kept getting
+slots while it ran.
+
+Usage:
+    python benchmarks/bench_priority_lanes.py [--users 1000] [--info-alerts 10] [--team-size 200]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from common import make_session_factory, seed_users
+
+from app.core import config
+from app.core.dispatch_lanes import dispatch_lanes
+from app.models.alert import Alert
+from app.models.notification import UserAlertPreference
+from app.models.user import Team, User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+class SlowInAppStrategy(NotificationStrategy):
+    """In-app stand-in with a fixed per-send latency"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        return {"status": "sent", "channel": "in_app", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "in_app"
+
+async def run(users: int, info_alerts: int, team_size: int, latency: float, limit: int, delay: float):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users, team_size=team_size)
+        team_id = db.query(Team.id).scalar()
+        alert_service = AlertService(db, AlertSubject())
+        info_ids = [
+            (await alert_service.create_alert(
+                {"title": f"Benchmark {number}", "message": "Priority lanes", "severity": "info"}, created_by=1
+            )).id
+            for number in range(info_alerts)
+        ]
+        
+        strategy = SlowInAppStrategy(latency)
+        delivery_log = DeliveryLogWriter(SessionLocal)
+        
+        def make_service(session) -> NotificationService:
+            service = NotificationService(session, delivery_log)
+            service.notification_context.add_strategy("in_app", strategy, concurrency_limit=limit)
+            return service
+        
+        print(f"{users * info_alerts} info reminders, then a critical alert for {team_size} users "
+              f"after {delay:.1f} s; {latency * 1000:.0f} ms per send, limit {limit}")
+        print(f"{'mode':<14} {'critical fan-out (s)':>21} {'reminder cycle (s)':>19} {'info sends meanwhile':>21}")
+        critical_elapsed = {}
+        default_weights = dict(config.DISPATCH_LANE_WEIGHTS)
+        for name, weights in (("arrival order", {"info": 1}), ("severity lanes", default_weights)):
+            config.DISPATCH_LANE_WEIGHTS = weights
+            dispatch_lanes.reset()
+            db.query(UserAlertPreference).filter(UserAlertPreference.alert_id.in_(info_ids)).update({
+                UserAlertPreference.last_reminded_at: None,
+                UserAlertPreference.next_reminder_at: datetime.utcnow() - timedelta(minutes=1)
+            })
+            # (the previous run's critical alert is not part of this cycle)
+            db.query(UserAlertPreference).filter(UserAlertPreference.alert_id.notin_(info_ids)).update({
+                UserAlertPreference.next_reminder_at: None
+            })
+            db.commit()
+            
+            reminder_db, critical_db = SessionLocal(), SessionLocal()
+            try:
+                started = time.perf_counter()
+                cycle = asyncio.create_task(make_service(reminder_db).process_reminders())
+                await asyncio.sleep(delay)
+                
+                critical = await AlertService(critical_db, AlertSubject()).create_alert({
+                    "title": "Critical", "message": "Priority lanes", "severity": "critical",
+                    "visibility_type": "team", "target_team_id": team_id
+                }, created_by=1)
+                service = make_service(critical_db)
+                limiter = service.notification_context.get_limiter("in_app")
+                info_before = limiter_acquired(limiter, "info", weights)
+                critical_started = time.perf_counter()
+                stats = await service.process_new_alert(critical)
+                critical_elapsed[name] = time.perf_counter() - critical_started
+                info_meanwhile = limiter_acquired(limiter, "info", weights) - info_before
+                
+                reminders = await cycle
+                cycle_elapsed = time.perf_counter() - started
+            finally:
+                reminder_db.close()
+                critical_db.close()
+            delivery_log.flush()
+            
+            print(f"{name:<14} {critical_elapsed[name]:>21.3f} {cycle_elapsed:>19.3f} {info_meanwhile:>21}")
+            for lane in dispatch_lanes.stats():
+                if lane["acquired"]:
+                    print(f"    lane {lane['lane']:<8} acquired {lane['acquired']:>6}  max depth {lane['max_depth']:>5}  "
+                          f"mean wait {lane['mean_wait_seconds'] * 1000:>8.1f} ms  max wait {lane['max_wait_seconds'] * 1000:>8.1f} ms")
+            assert stats["sent"] == team_size, f"{stats['sent']} critical sends, expected {team_size}"
+            assert reminders["sent"] == users * info_alerts, f"{reminders['sent']} reminders, expected {users * info_alerts}"
+            if name == "severity lanes":
+                assert info_meanwhile > 0, "info sends were starved during the critical fan-out"
+        config.DISPATCH_LANE_WEIGHTS = default_weights
+        
+        assert critical_elapsed["severity lanes"] < critical_elapsed["arrival order"], (
+            "the critical fan-out should finish sooner with severity lanes"
+        )
+    finally:
+        db.close()
+
+def limiter_acquired(limiter, lane: str, weights: Dict[str, int]) -> int:
+    # With a single lane every send is counted there
+    lane = lane if lane in weights else next(iter(weights))
+    return next(stats["acquired"] for stats in limiter.stats() if stats["lane"] == lane)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--info-alerts", type=int, default=10)
+    parser.add_argument("--team-size", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.info_alerts, args.team_size, args.latency, args.limit, args.delay))
@@ -0,0 +1,154 @@
+"""
+Benchmark: idle realtime connections and broadcast latency over GET /user/ws.
+
+Starts the API under uvicorn in a separate process (against a throwaway SQLite
+database seeded with --connections users), opens one WebSocket per user, holds them
+idle for --idle seconds and reports the server's memory per connection. Then creates
+one ORGANIZATION alert through POST /admin/alerts and measures how long each client
+takes to receive the pushed alert. Finally checks in-process that a connection which
+never reads stays bounded at REALTIME_QUEUE_SIZE queued events.
+
+The benchmark server resolves the current user from a ?user_id= query parameter (the
+API's own get_current_user is a single-user mock). Needs a file descriptor limit above
+2 x --connections (ulimit -n). --ws picks uvicorn's WebSocket implementation: idle
+connections cost roughly 20 KiB each with wsproto and 120 KiB with websockets.
+
+Usage:
+    python benchmarks/bench_realtime.py [--connections 10000] [--idle 10] [--ws wsproto]
+"""
+import argparse
+import os
+import tempfile
+
+# Point the app (and the spawned server, which inherits the environment) at a throwaway database
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="alerting_bench_"), "bench.db")
+
+import asyncio
+import json
+import multiprocessing
+import statistics
+import time
+
+import httpx
+import websockets
+
+from common import seed_users
+
+from app.core import config
+from app.core.realtime import RealtimeHub
+from app.database import SessionLocal, create_tables
+from app.models.user import User
+
+def serve(port: int, ws: str):
+    """Server process: the real app, with the current user taken from the query string"""
+    import uvicorn
+    from app.main import app
+    from app.routers.user import get_current_user
+    
+    def user_from_query(user_id: int = 1) -> User:
+        return User(id=user_id, name=f"User {user_id}", email=f"user{user_id}@example.com", role="user")
+    
+    app.dependency_overrides[get_current_user] = user_from_query
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096, ws=ws)
+
+def rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+async def wait_until_up(base_url: str):
+    async with httpx.AsyncClient() as client:
+        for _ in range(300):
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API server did not start")
+
+async def run(connections: int, idle: float, port: int, server_pid: int):
+    base_url = f"http://127.0.0.1:{port}"
+    await wait_until_up(base_url)
+    baseline = rss_mib(server_pid)
+    
+    sockets = []
+    started = time.perf_counter()
+    for first in range(0, connections, 500):
+        sockets += await asyncio.gather(*(
+            websockets.connect(f"ws://127.0.0.1:{port}/user/ws?user_id={user_id}", ping_interval=None, open_timeout=120)
+            for user_id in range(first + 1, min(first + 500, connections) + 1)
+        ))
+    connect_seconds = time.perf_counter() - started
+    print(f"opened {len(sockets)} connections in {connect_seconds:.1f} s")
+    
+    await asyncio.sleep(idle)
+    connected = rss_mib(server_pid)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        hub = (await client.get("/analytics/realtime")).json()
+    print(f"after {idle:.0f} s idle: {hub['connections']} connections registered, server RSS "
+          f"{baseline:.0f} -> {connected:.0f} MiB ({(connected - baseline) * 1024 / max(len(sockets), 1):.1f} KiB/connection)")
+    assert hub["connections"] == connections, "every connection should still be registered"
+    
+    received_at = {}
+    
+    async def receive(user_id: int, socket):
+        while True:
+            event = json.loads(await socket.recv())
+            if event["type"] == "alert":
+                received_at[user_id] = time.perf_counter()
+                return
+    
+    receivers = [asyncio.create_task(receive(user_id, socket)) for user_id, socket in enumerate(sockets, start=1)]
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        posted = time.perf_counter()
+        response = await client.post("/admin/alerts", json={"title": "Broadcast", "message": "Realtime benchmark"})
+        response.raise_for_status()
+        returned = time.perf_counter() - posted
+    await asyncio.wait_for(asyncio.gather(*receivers), timeout=300)
+    
+    latencies = sorted(received - posted for received in received_at.values())
+    print(f"broadcast to {len(latencies)} clients: POST returned in {returned * 1000:.0f} ms, received "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms, p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.0f} ms, "
+          f"max {latencies[-1] * 1000:.0f} ms")
+    
+    await asyncio.gather(*(socket.close() for socket in sockets))
+
+async def check_slow_client(events: int = 10000):
+    """A subscriber that never reads holds at most max_queue events"""
+    hub = RealtimeHub()
+    subscription = hub.subscribe(1)
+    for number in range(events):
+        hub.publish(1, {"type": "alert", "alert": {"id": number}})
+    assert subscription.queue.qsize() <= hub.max_queue
+    print(f"slow client: {events} events published, {subscription.queue.qsize()} queued "
+          f"(limit {config.REALTIME_QUEUE_SIZE}), {subscription.overflows} resyncs requested")
+
+def main(connections: int, idle: float, port: int, ws: str):
+    create_tables()
+    db = SessionLocal()
+    try:
+        seed_users(db, connections)
+    finally:
+        db.close()
+    
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(port, ws), name="api-server")
+    server.start()
+    try:
+        asyncio.run(run(connections, idle, port, server.pid))
+    finally:
+        server.terminate()
+        server.join()
+    asyncio.run(check_slow_client())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--idle", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ws", choices=["wsproto", "websockets"], default="wsproto", help="uvicorn WebSocket implementation")
+    args = parser.parse_args()
+    main(args.connections, args.idle, args.port, args.ws)
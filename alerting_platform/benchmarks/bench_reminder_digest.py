@@ -0,0 +1,92 @@
+"""
+Benchmark: reminder cycles with and without digests.
+
+Seeds --users recipients of --alerts ORGANIZATION email alerts (one of them critical),
+all due for a reminder, and runs one reminder cycle with individual reminders and one
+with email digests, through an email stand-in that takes --latency seconds per message.
+Reports messages sent, digests, delivery records and cycle time for each mode
+(tests/test_reminder_digest.py checks that every (user, alert) pair still gets exactly
+one delivery record in both modes).
+
+Usage:
+    python benchmarks/bench_reminder_digest.py [--users 1000] [--alerts 40] [--latency 0.01]
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from common import make_session_factory, seed_users
+
+from app.models.alert import Alert
+from app.models.notification import NotificationDelivery, UserAlertPreference
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+class CountingEmailStrategy(NotificationStrategy):
+    """Email stand-in - one message per send_notification call, after a fixed latency"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.messages = 0
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+        return {"status": "sent", "channel": "email", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "email"
+
+async def run(users: int, alerts: int, latency: float):
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        alert_service = AlertService(db, AlertSubject())
+        for number in range(alerts):
+            await alert_service.create_alert({
+                "title": f"Benchmark {number}",
+                "message": "Reminder digests",
+                "delivery_type": "email",
+                "severity": "critical" if number == 0 else "warning"
+            }, created_by=1)
+        
+        print(f"{users} users x {alerts} due email reminders (1 critical), {latency * 1000:.0f} ms per message")
+        print(f"{'mode':<12} {'elapsed (s)':>12} {'messages':>9} {'digests':>8} {'delivery rows':>14}")
+        for name, digest in (("individual", False), ("digest", True)):
+            # Everything due again, no deliveries recorded yet
+            db.query(UserAlertPreference).update({
+                UserAlertPreference.last_reminded_at: None,
+                UserAlertPreference.next_reminder_at: datetime.utcnow() - timedelta(minutes=1)
+            })
+            db.query(NotificationDelivery).delete()
+            db.commit()
+            
+            strategy = CountingEmailStrategy(latency)
+            delivery_log = DeliveryLogWriter(SessionLocal)
+            notification_service = NotificationService(db, delivery_log)
+            notification_service.notification_context.add_strategy("email", strategy)
+            notification_service.notification_context.set_digest_mode("email", digest)
+            
+            started = time.perf_counter()
+            stats = await notification_service.process_reminders()
+            elapsed = time.perf_counter() - started
+            delivery_log.flush()
+            rows = db.query(NotificationDelivery).count()
+            print(f"{name:<12} {elapsed:>12.3f} {strategy.messages:>9} {stats['digests']:>8} {rows:>14}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--alerts", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.alerts, args.latency))
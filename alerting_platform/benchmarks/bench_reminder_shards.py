@@ -0,0 +1,95 @@
+"""
+Benchmark: one reminder cycle split across several processes.
+
+Seeds --users recipients of --alerts ORGANIZATION alerts (all due for a reminder),
+then starts --processes processes that each run the sharded reminder cycle against
+the same SQLite database at the same time. Reports how the shards were split, the
+cycle time and any duplicate or missed reminders (tests/test_reminder_shards.py checks
+there are none).
+
+Usage:
+    python benchmarks/bench_reminder_shards.py [--users 5000] [--alerts 2] [--processes 4] [--shards 16]
+"""
+import argparse
+import os
+import tempfile
+
+# Point the app (and the spawned processes, which inherit the environment) at a throwaway database
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="alerting_bench_"), "bench.db")
+
+import asyncio
+import multiprocessing
+import time
+
+from sqlalchemy import func
+
+from common import seed_users
+
+from app.core import config
+from app.database import SessionLocal, create_tables
+from app.models.notification import NotificationDelivery, UserAlertPreference
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import delivery_log_writer
+from app.services.reminder_shards import ReminderShardLeases, run_reminder_cycle
+
+def run_worker(index: int, shard_count: int, results):
+    leases = ReminderShardLeases(shard_count=shard_count)
+    totals = asyncio.run(run_reminder_cycle(owner=f"bench-{index}", leases=leases))
+    delivery_log_writer.flush()
+    results.put((index, totals))
+
+async def seed(users: int, alerts: int):
+    db = SessionLocal()
+    try:
+        seed_users(db, users)
+        for number in range(alerts):
+            await AlertService(db, AlertSubject()).create_alert(
+                {"title": f"Benchmark {number}", "message": "Sharded reminders"}, created_by=1
+            )
+        return db.query(UserAlertPreference).count()
+    finally:
+        db.close()
+
+def main(users: int, alerts: int, processes: int, shards: int):
+    create_tables()
+    due = asyncio.run(seed(users, alerts))
+    print(f"{due} preferences due, {processes} processes, {shards} shards")
+    
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=run_worker, args=(index, shards, results)) for index in range(processes)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    per_worker = dict(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    
+    print(f"{'process':>8} {'shards':>7} {'sent':>8}")
+    for index in sorted(per_worker):
+        print(f"{index:>8} {per_worker[index]['shards']:>7} {per_worker[index]['sent']:>8}")
+    
+    db = SessionLocal()
+    try:
+        per_recipient = db.query(
+            NotificationDelivery.user_id, NotificationDelivery.alert_id, func.count(NotificationDelivery.id)
+        ).group_by(NotificationDelivery.user_id, NotificationDelivery.alert_id).all()
+    finally:
+        db.close()
+    
+    duplicates = sum(1 for _, _, count in per_recipient if count > 1)
+    missed = due - len(per_recipient)
+    print(f"elapsed {elapsed:.2f}s, shards processed {sum(t['shards'] for t in per_worker.values())}/{shards}, "
+          f"duplicates {duplicates}, missed {missed}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--alerts", type=int, default=2)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--shards", type=int, default=config.REMINDER_SHARDS)
+    args = parser.parse_args()
+    main(args.users, args.alerts, args.processes, args.shards)
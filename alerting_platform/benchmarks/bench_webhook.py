@@ -0,0 +1,185 @@
+"""
+Benchmark: webhook delivery through the pooled HTTP client.
+
+Starts a minimal HTTP/1.1 server on localhost that answers every POST after --latency
+seconds, then creates --alerts webhook alerts for --users recipients spread over
+--endpoints webhook URLs and dispatches them all concurrently through
+NotificationService with a WebhookNotificationStrategy registered via add_strategy:
+
+    no keep-alive            - the server closes the connection after every response
+    keep-alive               - connections reused from the shared client pool
+    keep-alive + batching    - up to --alerts-per-request alerts per POST (--linger-ms)
+    ... + gzip               - request bodies of 1 KiB or more compressed
+
+Each run checks that every (alert, recipient) pair reached the server exactly once, that
+every delivery was recorded as sent, and that no endpoint ever had more than
+--endpoint-concurrency requests in flight.
+
+Usage:
+    python benchmarks/bench_webhook.py [--alerts 200] [--users 50] [--endpoints 4] [--latency 0.01]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from collections import Counter
+
+from common import make_session_factory, seed_users
+
+from app.core.webhook_pool import WebhookPool
+from app.models.notification import NotificationDelivery
+from app.patterns.notification_strategy import WebhookNotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+class StubWebhookServer:
+    """Keep-alive HTTP/1.1 server that records every alert payload it is posted"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.keep_alive = True
+        self.reset_counts()
+        self._server = None
+    
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+    
+    def reset_counts(self):
+        self.connections = 0
+        self.requests = 0
+        self.body_bytes = 0
+        self.received = Counter()
+        self.in_flight = Counter()
+        self.max_in_flight = Counter()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode().split("\r\n")
+                path = lines[0].split(" ")[1]
+                headers = {
+                    name.strip().lower(): value.strip()
+                    for name, value in (line.split(":", 1) for line in lines[1:] if ":" in line)
+                }
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                
+                self.requests += 1
+                self.body_bytes += len(body)
+                self.in_flight[path] += 1
+                self.max_in_flight[path] = max(self.max_in_flight[path], self.in_flight[path])
+                try:
+                    if headers.get("content-encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    for payload in json.loads(body)["alerts"]:
+                        self.received.update(
+                            (path, payload["alert_id"], recipient["user_id"]) for recipient in payload["recipients"]
+                        )
+                    await asyncio.sleep(self.latency)
+                finally:
+                    self.in_flight[path] -= 1
+                
+                close = not self.keep_alive or headers.get("connection", "").lower() == "close"
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n"
+                    + (b"Connection: close\r\n" if close else b"") + b"\r\n{}"
+                )
+                await writer.drain()
+                if close:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+async def run(alerts: int, users: int, endpoints: int, latency: float, endpoint_concurrency: int,
+              alerts_per_request: int, linger_ms: float):
+    server = StubWebhookServer(latency)
+    port = await server.start()
+    urls = [f"http://127.0.0.1:{port}/hooks/{index}" for index in range(endpoints)]
+    
+    SessionLocal = make_session_factory()
+    db = SessionLocal()
+    try:
+        start_id = seed_users(db, users)
+        alert_service = AlertService(db, AlertSubject())
+        created = [
+            await alert_service.create_alert(
+                {"title": f"Benchmark {index}", "message": "Webhook throughput " * 20, "delivery_type": "webhook"},
+                created_by=1
+            )
+            for index in range(alerts)
+        ]
+        expected = {
+            (f"/hooks/{user_id % endpoints}", alert.id, user_id)
+            for alert in created for user_id in range(start_id, start_id + users)
+        }
+        
+        modes = [
+            ("no keep-alive", dict(alerts_per_request=1, gzip_min_bytes=0)),
+            ("keep-alive", dict(alerts_per_request=1, gzip_min_bytes=0)),
+            ("keep-alive + batching", dict(alerts_per_request=alerts_per_request, gzip_min_bytes=0)),
+            ("keep-alive + batching + gzip", dict(alerts_per_request=alerts_per_request, gzip_min_bytes=1024)),
+        ]
+        print(f"{alerts} alerts x {users} recipients over {endpoints} endpoints, "
+              f"{latency * 1000:.0f} ms per request, {endpoint_concurrency} in flight per endpoint")
+        print(f"{'mode':<30} {'elapsed (s)':>12} {'alerts/s':>9} {'connections':>12} {'requests':>9} {'KiB sent':>9}")
+        for name, options in modes:
+            server.reset_counts()
+            # The baseline closes every connection after its response, like a receiver without keep-alive
+            server.keep_alive = name != "no keep-alive"
+            pool = WebhookPool(endpoint_concurrency=endpoint_concurrency, linger_seconds=linger_ms / 1000, **options)
+            strategy = WebhookNotificationStrategy(
+                pool=pool, endpoint_for=lambda user, alert: urls[user.id % endpoints]
+            )
+            delivery_log = DeliveryLogWriter(SessionLocal)
+            notification_service = NotificationService(db, delivery_log)
+            notification_service.notification_context.add_strategy("webhook", strategy)
+            
+            started = time.perf_counter()
+            await asyncio.gather(*(notification_service.process_new_alert(alert) for alert in created))
+            elapsed = time.perf_counter() - started
+            await pool.close()
+            delivery_log.flush()
+            
+            check_run(db, expected, server, endpoint_concurrency)
+            print(f"{name:<30} {elapsed:>12.3f} {alerts / elapsed:>9.1f} {server.connections:>12} "
+                  f"{server.requests:>9} {server.body_bytes / 1024:>9.0f}")
+            db.query(NotificationDelivery).delete()
+            db.commit()
+    finally:
+        db.close()
+        await server.stop()
+
+def check_run(db, expected, server: StubWebhookServer, endpoint_concurrency: int):
+    duplicates = [key for key, count in server.received.items() if count > 1]
+    assert not duplicates, f"{len(duplicates)} (alert, recipient) pairs were posted more than once"
+    assert set(server.received) == expected, f"server received {len(server.received)} pairs, expected {len(expected)}"
+    assert max(server.max_in_flight.values()) <= endpoint_concurrency, (
+        f"{max(server.max_in_flight.values())} requests in flight to one endpoint"
+    )
+    
+    statuses = Counter(status.value for (status,) in db.query(NotificationDelivery.status).all())
+    assert statuses == {"sent": len(expected)}, f"delivery records: {dict(statuses)}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--endpoints", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--endpoint-concurrency", type=int, default=8)
+    parser.add_argument("--alerts-per-request", type=int, default=20)
+    parser.add_argument("--linger-ms", type=float, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.alerts, args.users, args.endpoints, args.latency, args.endpoint_concurrency,
+                    args.alerts_per_request, args.linger_ms))
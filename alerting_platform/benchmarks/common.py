@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+# Allow running benchmarks as plain scripts from the alerting_platform directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base
+from app.models import user, alert, notification, analytics  # noqa: F401 - register models on Base
+from app.models.user import User, Team, user_team_association
+
+def make_session_factory(db_path: str = None):
+    """Create a throwaway SQLite database so benchmarks never touch alerting_platform.db"""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="alerting_bench_"), "bench.db")
+    bench_engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=bench_engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=bench_engine)
+
+def seed_users(db, count: int, team_size: int = 0) -> int:
+    """Bulk insert `count` users, optionally grouping them into teams of `team_size`"""
+    start_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+    db.execute(insert(User), [
+        {"id": user_id, "name": f"User {user_id}", "email": f"user{user_id}@example.com", "role": "user"}
+        for user_id in range(start_id, start_id + count)
+    ])
+    
+    if team_size:
+        team = Team(name=f"Bench team {start_id}", description="Benchmark team")
+        db.add(team)
+        db.flush()
+        db.execute(insert(user_team_association), [
+            {"user_id": user_id, "team_id": team.id}
+            for user_id in range(start_id, start_id + min(team_size, count))
+        ])
+    
+    db.commit()
+    return start_id
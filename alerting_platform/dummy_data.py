@@ -7,7 +7,7 @@ from sqlalchemy import create_engine
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import database and all models
-from app.database import engine, Base
+from app.database import engine, create_tables as migrate_database
 from app.models.user import User, Team  # Import User and Team models
 from app.models.alert import Alert, SeverityEnum, VisibilityTypeEnum  # Import Alert models
 from app.models.notification import NotificationDelivery, UserAlertPreference, NotificationStatusEnum, UserAlertStateEnum  # Import Notification models
@@ -18,8 +18,8 @@ def create_tables():
     """Create all database tables"""
     print("🔄 Creating database tables...")
     
-    # This will create all tables defined in the imported models
-    Base.metadata.create_all(bind=engine)
+    # Creates all tables defined in the imported models on a new database, migrates an existing one
+    migrate_database()
     print("✅ Database tables created successfully!")
 
 def create_seed_data():
@@ -0,0 +1,37 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import Base, SQLALCHEMY_DATABASE_URL
+from app.models import user, alert, notification, analytics
+
+config = context.config
+target_metadata = Base.metadata
+
+def run_migrations_online():
+    # create_tables() hands over a connection of the app's engine; the alembic command line makes its own
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_migrations(connection)
+        return
+    
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+    try:
+        with engine.connect() as connection:
+            _run_migrations(connection)
+    finally:
+        engine.dispose()
+
+def _run_migrations(connection):
+    # Batch mode lets SQLite add constraints by copying the table; other databases ALTER in place
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    # The migrations look at the live schema (a pre-migrations database may already have some tables)
+    raise SystemExit("Offline (--sql) migrations are not supported - run them against the database")
+run_migrations_online()
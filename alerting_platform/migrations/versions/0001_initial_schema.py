@@ -0,0 +1,111 @@
+"""Initial schema - the tables create_tables() built before the project used migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-09-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_name", "users", ["name"])
+    
+    op.create_table(
+        "teams",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_teams_id", "teams", ["id"])
+    op.create_index("ix_teams_name", "teams", ["name"])
+    
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("severity", sa.Enum("INFO", "WARNING", "CRITICAL", name="severityenum"), nullable=True),
+        sa.Column("delivery_type", sa.Enum("IN_APP", "EMAIL", "SMS", name="deliverytypeenum"), nullable=True),
+        sa.Column("visibility_type", sa.Enum("ORGANIZATION", "TEAM", "USER", name="visibilitytypeenum"), nullable=True),
+        sa.Column("target_team_id", sa.Integer(), nullable=True),
+        sa.Column("target_user_id", sa.Integer(), nullable=True),
+        sa.Column("start_time", sa.DateTime(), nullable=True),
+        sa.Column("expiry_time", sa.DateTime(), nullable=True),
+        sa.Column("reminder_frequency_hours", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_archived", sa.Boolean(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["target_team_id"], ["teams.id"]),
+        sa.ForeignKeyConstraint(["target_user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_alerts_title", "alerts", ["title"])
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+    
+    op.create_table(
+        "user_teams",
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("team_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["team_id"], ["teams.id"]),
+    )
+    
+    op.create_table(
+        "notification_deliveries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("alert_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("delivery_type", sa.String(), nullable=True),
+        sa.Column("status", sa.Enum("SENT", "DELIVERED", "FAILED", name="notificationstatusenum"), nullable=True),
+        sa.Column("delivered_at", sa.DateTime(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_notification_deliveries_id", "notification_deliveries", ["id"])
+    
+    op.create_table(
+        "user_alert_preferences",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("alert_id", sa.Integer(), nullable=True),
+        sa.Column("state", sa.Enum("UNREAD", "READ", "SNOOZED", name="useralertstateenum"), nullable=True),
+        sa.Column("snoozed_until", sa.DateTime(), nullable=True),
+        sa.Column("last_reminded_at", sa.DateTime(), nullable=True),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_alert_preferences_id", "user_alert_preferences", ["id"])
+
+def downgrade() -> None:
+    for table in ("user_alert_preferences", "notification_deliveries", "user_teams", "alerts", "teams", "users"):
+        op.drop_table(table)
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_name in ("useralertstateenum", "notificationstatusenum", "visibilitytypeenum", "deliverytypeenum", "severityenum"):
+            op.execute(f"DROP TYPE IF EXISTS {enum_name}")
@@ -0,0 +1,32 @@
+"""One preference per (user, alert)
+
+Audience fan-out inserts preferences with ON CONFLICT DO NOTHING, which needs this constraint.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-09-02 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    constraints = sa.inspect(op.get_bind()).get_unique_constraints("user_alert_preferences")
+    if any(constraint["name"] == "uq_user_alert_preferences_user_alert" for constraint in constraints):
+        return
+    
+    # Keep the oldest of any duplicates
+    op.execute(
+        "DELETE FROM user_alert_preferences WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_alert_preferences GROUP BY user_id, alert_id)"
+    )
+    with op.batch_alter_table("user_alert_preferences") as batch_op:
+        batch_op.create_unique_constraint("uq_user_alert_preferences_user_alert", ["user_id", "alert_id"])
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_alert_preferences") as batch_op:
+        batch_op.drop_constraint("uq_user_alert_preferences_user_alert", type_="unique")
@@ -0,0 +1,32 @@
+"""Indexed next_reminder_at on preferences
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "next_reminder_at" not in {column["name"] for column in inspector.get_columns("user_alert_preferences")}:
+        op.add_column("user_alert_preferences", sa.Column("next_reminder_at", sa.DateTime(), nullable=True))
+        # Unread/snoozed rows become due no later than they really are; the next reminder
+        # cycle moves rows that aren't due yet on to their exact time
+        op.execute(
+            "UPDATE user_alert_preferences SET next_reminder_at = "
+            "COALESCE(snoozed_until, last_reminded_at, created_at, CURRENT_TIMESTAMP) "
+            "WHERE state IS NULL OR state != 'READ'"
+        )
+    if "ix_user_alert_preferences_next_reminder" not in {index["name"] for index in inspector.get_indexes("user_alert_preferences")}:
+        op.create_index("ix_user_alert_preferences_next_reminder", "user_alert_preferences", ["next_reminder_at", "id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_user_alert_preferences_next_reminder", table_name="user_alert_preferences")
+    with op.batch_alter_table("user_alert_preferences") as batch_op:
+        batch_op.drop_column("next_reminder_at")
@@ -0,0 +1,27 @@
+"""Incremental analytics counters
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("metric_counters"):
+        return
+    op.create_table(
+        "metric_counters",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+def downgrade() -> None:
+    op.drop_table("metric_counters")
@@ -0,0 +1,53 @@
+"""Hourly delivery/engagement rollups and their watermark
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Created by 0001 - on Postgres the existing enum type is reused, not created again
+severity_enum = sa.Enum("INFO", "WARNING", "CRITICAL", name="severityenum").with_variant(
+    postgresql.ENUM("INFO", "WARNING", "CRITICAL", name="severityenum", create_type=False), "postgresql"
+)
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("alert_hourly_rollups"):
+        op.create_table(
+            "alert_hourly_rollups",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("alert_id", sa.Integer(), nullable=False),
+            sa.Column("severity", severity_enum, nullable=True),
+            sa.Column("channel", sa.String(), nullable=False),
+            sa.Column("sent_count", sa.Integer(), nullable=False),
+            sa.Column("failed_count", sa.Integer(), nullable=False),
+            sa.Column("read_count", sa.Integer(), nullable=False),
+            sa.Column("snoozed_count", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("bucket_start", "alert_id", "channel", name="uq_alert_hourly_rollups_bucket_alert_channel"),
+        )
+        op.create_index("ix_alert_hourly_rollups_id", "alert_hourly_rollups", ["id"])
+        op.create_index("ix_alert_hourly_rollups_bucket_severity", "alert_hourly_rollups", ["bucket_start", "severity"])
+    if not inspector.has_table("rollup_watermarks"):
+        op.create_table(
+            "rollup_watermarks",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("processed_until", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+def downgrade() -> None:
+    op.drop_table("rollup_watermarks")
+    op.drop_table("alert_hourly_rollups")
@@ -0,0 +1,27 @@
+"""Time-to-read quantile sketches
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("latency_sketches"):
+        return
+    op.create_table(
+        "latency_sketches",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("data", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+def downgrade() -> None:
+    op.drop_table("latency_sketches")
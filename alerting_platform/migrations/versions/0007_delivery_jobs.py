@@ -0,0 +1,46 @@
+"""Delivery outbox
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("delivery_jobs"):
+        return
+    op.create_table(
+        "delivery_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("alert_id", sa.Integer(), nullable=True),
+        sa.Column("kind", sa.Enum("ALERT_CREATED", "ALERT_UPDATED", name="deliveryjobkindenum"), nullable=True),
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("shard_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "status", sa.Enum("PENDING", "RUNNING", "DONE", "FAILED", name="deliveryjobstatusenum"), nullable=False
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", sa.DateTime(), nullable=True),
+        sa.Column("lease_owner", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_delivery_jobs_id", "delivery_jobs", ["id"])
+    op.create_index("ix_delivery_jobs_claim", "delivery_jobs", ["status", "available_at", "id"])
+
+def downgrade() -> None:
+    op.drop_table("delivery_jobs")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS deliveryjobstatusenum")
+        op.execute("DROP TYPE IF EXISTS deliveryjobkindenum")
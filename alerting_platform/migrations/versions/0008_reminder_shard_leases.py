@@ -0,0 +1,30 @@
+"""Reminder shard leases
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("reminder_shard_leases"):
+        return
+    op.create_table(
+        "reminder_shard_leases",
+        sa.Column("shard", sa.Integer(), nullable=False),
+        sa.Column("lease_owner", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_cycle", sa.Integer(), nullable=False),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("shard"),
+    )
+
+def downgrade() -> None:
+    op.drop_table("reminder_shard_leases")
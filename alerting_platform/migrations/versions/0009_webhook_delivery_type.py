@@ -0,0 +1,39 @@
+"""Webhook delivery type
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # ADD VALUE can't run inside a transaction block before Postgres 12
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE deliverytypeenum ADD VALUE IF NOT EXISTS 'WEBHOOK'")
+        return
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.alter_column(
+            "delivery_type",
+            existing_type=sa.Enum("IN_APP", "EMAIL", "SMS", name="deliverytypeenum"),
+            type_=sa.Enum("IN_APP", "EMAIL", "SMS", "WEBHOOK", name="deliverytypeenum"),
+            existing_nullable=True
+        )
+
+def downgrade() -> None:
+    # (Postgres can't drop an enum value - 'WEBHOOK' stays in deliverytypeenum)
+    if op.get_bind().dialect.name == "postgresql":
+        return
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.alter_column(
+            "delivery_type",
+            existing_type=sa.Enum("IN_APP", "EMAIL", "SMS", "WEBHOOK", name="deliverytypeenum"),
+            type_=sa.Enum("IN_APP", "EMAIL", "SMS", name="deliverytypeenum"),
+            existing_nullable=True
+        )
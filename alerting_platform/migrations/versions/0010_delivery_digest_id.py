@@ -0,0 +1,25 @@
+"""digest_id on deliveries sent as part of a reminder digest
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "digest_id" not in {column["name"] for column in inspector.get_columns("notification_deliveries")}:
+        op.add_column("notification_deliveries", sa.Column("digest_id", sa.String(), nullable=True))
+    if "ix_notification_deliveries_digest_id" not in {index["name"] for index in inspector.get_indexes("notification_deliveries")}:
+        op.create_index("ix_notification_deliveries_digest_id", "notification_deliveries", ["digest_id"])
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_deliveries_digest_id", table_name="notification_deliveries")
+    with op.batch_alter_table("notification_deliveries") as batch_op:
+        batch_op.drop_column("digest_id")
@@ -0,0 +1,57 @@
+"""Delivery retries and dead letters
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("delivery_retries"):
+        op.create_table(
+            "delivery_retries",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("alert_id", sa.Integer(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("delivery_type", sa.String(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("available_at", sa.DateTime(), nullable=True),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("lease_owner", sa.String(), nullable=True),
+            sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_delivery_retries_id", "delivery_retries", ["id"])
+        op.create_index("ix_delivery_retries_due", "delivery_retries", ["available_at", "id"])
+    if not inspector.has_table("dead_letter_deliveries"):
+        op.create_table(
+            "dead_letter_deliveries",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("alert_id", sa.Integer(), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("delivery_type", sa.String(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("last_error", sa.Text(), nullable=True),
+            sa.Column("first_failed_at", sa.DateTime(), nullable=True),
+            sa.Column("dead_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["alert_id"], ["alerts.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_dead_letter_deliveries_id", "dead_letter_deliveries", ["id"])
+        op.create_index("ix_dead_letter_deliveries_alert_id", "dead_letter_deliveries", ["alert_id"])
+
+def downgrade() -> None:
+    op.drop_table("dead_letter_deliveries")
+    op.drop_table("delivery_retries")
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Point the app (and any processes a test spawns) at a throwaway database before it is imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="alerting_tests_"), "tests.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import user, alert, notification, analytics  # noqa: F401 - register models on Base
+from app.models.user import User, Team, user_team_association
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessions on a fresh SQLite database per test"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def seed_users(db):
+    """seed_users(count, team_size=0) bulk inserts users, optionally with the first team_size in a new team; returns the first id"""
+    def seed(count: int, team_size: int = 0) -> int:
+        start_id = (db.query(User.id).order_by(User.id.desc()).limit(1).scalar() or 0) + 1
+        db.execute(insert(User), [
+            {"id": user_id, "name": f"User {user_id}", "email": f"user{user_id}@example.com", "role": "user"}
+            for user_id in range(start_id, start_id + count)
+        ])
+        if team_size:
+            team = Team(name=f"Test team {start_id}", description="Test team")
+            db.add(team)
+            db.flush()
+            db.execute(insert(user_team_association), [
+                {"user_id": user_id, "team_id": team.id}
+                for user_id in range(start_id, start_id + min(team_size, count))
+            ])
+        db.commit()
+        return start_id
+    return seed
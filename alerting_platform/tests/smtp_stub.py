@@ -0,0 +1,92 @@
+"""Minimal local SMTP relay, shared by the email tests and benchmarks/bench_email.py"""
+import asyncio
+import base64
+from collections import Counter
+
+USERNAME = "bench"
+PASSWORD = "secret"
+
+class StubSMTPServer:
+    """Just enough of an SMTP relay for aiosmtplib, counting what it is sent"""
+    
+    def __init__(self, rtt: float, reject_every: int):
+        self.rtt = rtt
+        self.reject_every = reject_every
+        self.connections = 0
+        self.logins = 0
+        self.messages = 0
+        self.delivered = Counter()
+        self._server = None
+    
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+    
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+    
+    def reset_counts(self):
+        self.connections = self.logins = self.messages = 0
+        self.delivered = Counter()
+    
+    def refuses(self, address: str) -> bool:
+        user_id = int(address.split("@")[0].removeprefix("user"))
+        return bool(self.reject_every) and user_id % self.reject_every == 0
+    
+    async def _reply(self, writer: asyncio.StreamWriter, *lines: str):
+        if self.rtt:
+            await asyncio.sleep(self.rtt)
+        writer.write("".join(lines).encode())
+        await writer.drain()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        recipients = []
+        try:
+            await self._reply(writer, "220 stub ESMTP ready\r\n")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                
+                if verb in ("EHLO", "HELO"):
+                    await self._reply(writer, "250-stub\r\n", "250-AUTH PLAIN\r\n", "250 8BITMIME\r\n")
+                elif verb == "AUTH":
+                    credentials = base64.b64decode(command.split()[2]).split(b"\0")
+                    if credentials[1:] == [USERNAME.encode(), PASSWORD.encode()]:
+                        self.logins += 1
+                        await self._reply(writer, "235 2.7.0 Authentication successful\r\n")
+                    else:
+                        await self._reply(writer, "535 5.7.8 Authentication failed\r\n")
+                elif verb == "MAIL":
+                    recipients = []
+                    await self._reply(writer, "250 OK\r\n")
+                elif verb == "RCPT":
+                    address = command[command.index("<") + 1:command.index(">")]
+                    if self.refuses(address):
+                        await self._reply(writer, "550 5.1.1 No such user\r\n")
+                    else:
+                        recipients.append(address)
+                        await self._reply(writer, "250 OK\r\n")
+                elif verb == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>\r\n")
+                    while (await reader.readline()) not in (b".\r\n", b""):
+                        pass
+                    self.messages += 1
+                    self.delivered.update(recipients)
+                    await self._reply(writer, "250 OK queued\r\n")
+                elif verb in ("RSET", "NOOP"):
+                    recipients = []
+                    await self._reply(writer, "250 OK\r\n")
+                elif verb == "QUIT":
+                    await self._reply(writer, "221 Bye\r\n")
+                    return
+                else:
+                    await self._reply(writer, "502 Command not implemented\r\n")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
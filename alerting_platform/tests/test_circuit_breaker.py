@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+import pytest
+
+from app.core import config
+from app.core.circuit_breaker import circuit_breakers
+from app.models.alert import Alert
+from app.models.notification import DeliveryRetry, NotificationDelivery, NotificationStatusEnum
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.delivery_retries import DeliveryRetries
+from app.services.notification_service import NotificationService
+
+USERS = 40
+TIMEOUT = 0.02
+OPEN_SECONDS = 0.2
+
+class FaultyEmailStrategy(NotificationStrategy):
+    """Email stand-in - times out (after TIMEOUT seconds) on every send while down"""
+    
+    def __init__(self):
+        self.down = False
+        self.attempts = 0
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        self.attempts += 1
+        if self.down:
+            await asyncio.sleep(TIMEOUT)
+            raise TimeoutError("provider did not respond")
+        return {"status": "sent", "channel": "email", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "email"
+
+class Outage:
+    """An email provider that can be taken down, and the services that fan alerts out to it"""
+    
+    def __init__(self, db, session_factory):
+        self.db = db
+        self.strategy = FaultyEmailStrategy()
+        self.delivery_log = DeliveryLogWriter(session_factory)
+        self.retries = DeliveryRetries(session_factory)
+        self.alert_service = AlertService(db, AlertSubject())
+    
+    def create(self, severity: str = "warning") -> Alert:
+        return asyncio.run(self.alert_service.create_alert({
+            "title": "Test", "message": "Circuit breaker", "delivery_type": "email", "severity": severity
+        }, created_by=1))
+    
+    def notification_service(self) -> NotificationService:
+        service = NotificationService(self.db, self.delivery_log, retries=self.retries)
+        service.notification_context.add_strategy("email", self.strategy, concurrency_limit=10)
+        return service
+    
+    def fan_out(self, alert: Alert) -> Dict[str, Any]:
+        stats = asyncio.run(self.notification_service().process_new_alert(alert))
+        self.delivery_log.flush()
+        self.retries.flush()
+        return stats
+
+@pytest.fixture
+def outage(db, session_factory, seed_users, monkeypatch):
+    monkeypatch.setattr(config, "CIRCUIT_FAILURE_THRESHOLD", 5)
+    monkeypatch.setattr(config, "CIRCUIT_OPEN_SECONDS", OPEN_SECONDS)
+    monkeypatch.setattr(config, "CIRCUIT_FALLBACK_CHANNEL", "in_app")
+    circuit_breakers.reset()
+    seed_users(USERS)
+    yield Outage(db, session_factory)
+    circuit_breakers.reset()
+
+def test_open_circuit_fails_fast_and_queues_retries(outage, db):
+    outage.strategy.down = True
+    outage.fan_out(outage.create())
+    
+    assert circuit_breakers.get("email").state == "open"
+    # Only the sends before the circuit opened reached the provider and waited out the timeout
+    assert outage.strategy.attempts < USERS
+    assert db.query(DeliveryRetry).count() == USERS
+
+def test_critical_alert_falls_back_to_in_app_while_open(outage, db):
+    outage.strategy.down = True
+    outage.fan_out(outage.create())
+    critical = outage.create("critical")
+    outage.fan_out(critical)
+    
+    fallback = db.query(NotificationDelivery).filter(
+        NotificationDelivery.alert_id == critical.id,
+        NotificationDelivery.delivery_type == "in_app",
+        NotificationDelivery.status == NotificationStatusEnum.SENT
+    ).count()
+    assert fallback == USERS
+
+def test_cancelled_probe_is_handed_back(outage):
+    outage.strategy.down = True
+    alert = outage.create()
+    outage.fan_out(alert)
+    breaker = circuit_breakers.get("email")
+    time.sleep(OPEN_SECONDS)
+    
+    wrapped = outage.notification_service().notification_context.get_strategy("email")
+    probe_user = User(id=1, name="Probe", email="probe@example.com", role="user")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(wrapped.send_notification(probe_user, alert), TIMEOUT / 2))
+    
+    assert breaker.state == "half_open"
+    assert breaker.allow(), "a cancelled probe should let the next call probe"
+
+def test_recovered_provider_closes_the_circuit(outage):
+    outage.strategy.down = True
+    outage.fan_out(outage.create())
+    breaker = circuit_breakers.get("email")
+    
+    outage.strategy.down = False
+    time.sleep(OPEN_SECONDS)
+    # The probe is a single send - the rest of that fan-out still fails fast
+    outage.fan_out(outage.create())
+    assert breaker.state == "closed"
+    
+    stats = outage.fan_out(outage.create())
+    assert stats["sent"] == USERS
+    assert all(breaker.transitions[state] >= 1 for state in ("open", "half_open", "closed"))
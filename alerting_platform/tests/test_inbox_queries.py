@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import event, insert
+
+from app.models.alert import Alert, DeliveryTypeEnum, SeverityEnum, VisibilityTypeEnum
+from app.models.notification import UserAlertPreference, UserAlertStateEnum
+from app.models.user import Team
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+
+def add_alerts(db, count: int, **fields) -> list:
+    rows = [
+        {
+            "title": f"Test {number}",
+            "message": "Inbox queries",
+            "severity": SeverityEnum.INFO,
+            "delivery_type": DeliveryTypeEnum.IN_APP,
+            "is_active": True,
+            "is_archived": False,
+            **fields
+        }
+        for number in range(count)
+    ]
+    return list(db.execute(insert(Alert).returning(Alert.id), rows).scalars())
+
+@pytest.fixture
+def inbox(db, seed_users):
+    """A user with read, snoozed and unread alerts from every audience, plus alerts they must not see"""
+    user_id = seed_users(10, team_size=5)
+    other_user_id = seed_users(5, team_size=5)
+    team_id, other_team_id = [team_id for (team_id,) in db.query(Team.id).order_by(Team.id)]
+    
+    visible = (
+        add_alerts(db, 20, visibility_type=VisibilityTypeEnum.ORGANIZATION)
+        + add_alerts(db, 10, visibility_type=VisibilityTypeEnum.TEAM, target_team_id=team_id)
+        + add_alerts(db, 10, visibility_type=VisibilityTypeEnum.USER, target_user_id=user_id)
+    )
+    add_alerts(db, 5, visibility_type=VisibilityTypeEnum.TEAM, target_team_id=other_team_id)
+    add_alerts(db, 5, visibility_type=VisibilityTypeEnum.USER, target_user_id=other_user_id)
+    add_alerts(db, 5, visibility_type=VisibilityTypeEnum.ORGANIZATION, is_archived=True)
+    add_alerts(db, 5, visibility_type=VisibilityTypeEnum.ORGANIZATION, is_active=False)
+    
+    read, snoozed = set(visible[::3]), set(visible[1::5]) - set(visible[::3])
+    db.execute(insert(UserAlertPreference), [
+        {"user_id": user_id, "alert_id": alert_id, "state": UserAlertStateEnum.READ} for alert_id in read
+    ] + [
+        {"user_id": user_id, "alert_id": alert_id, "state": UserAlertStateEnum.SNOOZED} for alert_id in snoozed
+    ])
+    db.commit()
+    return user_id, sorted(visible, reverse=True), read, snoozed
+
+@pytest.fixture
+def statements(db):
+    """SQL statements sent to the database, recorded as they execute"""
+    executed = []
+    listener = lambda conn, cursor, statement, *args: executed.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    yield executed
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+def test_inbox_is_one_statement(db, inbox, statements):
+    user_id, visible, read, snoozed = inbox
+    items = AlertService(db, AlertSubject()).query_alerts_for_user(user_id)
+    
+    assert len(statements) == 1
+    assert [item["alert"]["id"] for item in items] == visible
+    states = {item["alert"]["id"]: item["state"] for item in items}
+    assert {alert_id for alert_id, state in states.items() if state == "read"} == read
+    assert {alert_id for alert_id, state in states.items() if state == "snoozed"} == snoozed
+
+def test_unread_filter_is_one_statement(db, inbox, statements):
+    user_id, visible, read, snoozed = inbox
+    items = AlertService(db, AlertSubject()).query_alerts_for_user(user_id, states=["unread"])
+    
+    assert len(statements) == 1
+    assert {item["alert"]["id"] for item in items} == set(visible) - read - snoozed
+
+def test_cursor_page_is_one_statement(db, inbox, statements):
+    user_id, visible, read, snoozed = inbox
+    cursor = visible[10]
+    items = AlertService(db, AlertSubject()).query_alerts_for_user(user_id, cursor=cursor, limit=15)
+    
+    assert len(statements) == 1
+    assert [item["alert"]["id"] for item in items] == visible[11:26]
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict
+
+import pytest
+
+from app.core import config
+from app.models.alert import Alert
+from app.models.notification import NotificationDelivery, UserAlertPreference
+from app.models.user import User
+from app.patterns.notification_strategy import NotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.analytics_service import AnalyticsService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+
+USERS = 30
+ALERTS = 5
+
+class CountingEmailStrategy(NotificationStrategy):
+    """Email stand-in - one message per send_notification call"""
+    
+    def __init__(self):
+        self.messages = 0
+    
+    async def send_notification(self, user: User, alert: Alert) -> Dict[str, Any]:
+        self.messages += 1
+        return {"status": "sent", "channel": "email", "user_id": user.id, "alert_id": alert.id}
+    
+    def get_channel_name(self) -> str:
+        return "email"
+
+@pytest.mark.parametrize("digest", [False, True])
+def test_reminder_cycle_records_one_delivery_per_alert(db, session_factory, seed_users, digest):
+    seed_users(USERS)
+    alert_service = AlertService(db, AlertSubject())
+    created = [
+        asyncio.run(alert_service.create_alert({
+            "title": f"Test {number}",
+            "message": "Reminder digests",
+            "delivery_type": "email",
+            "severity": "critical" if number == 0 else "warning"
+        }, created_by=1))
+        for number in range(ALERTS)
+    ]
+    strategy = CountingEmailStrategy()
+    delivery_log = DeliveryLogWriter(session_factory)
+    notification_service = NotificationService(db, delivery_log)
+    notification_service.notification_context.add_strategy("email", strategy)
+    notification_service.notification_context.set_digest_mode("email", digest)
+    
+    stats = asyncio.run(notification_service.process_reminders())
+    delivery_log.flush()
+    
+    assert stats["sent"] == USERS * ALERTS
+    analytics = AnalyticsService(db)
+    assert all(analytics.get_alert_performance(alert.id)["total_deliveries"] == USERS for alert in created)
+    # Digested reminders are moved on once their digest has gone out, like individual ones
+    assert db.query(UserAlertPreference).filter(UserAlertPreference.next_reminder_at <= datetime.utcnow()).count() == 0
+    
+    digested = db.query(NotificationDelivery).filter(NotificationDelivery.digest_id.isnot(None)).count()
+    if digest:
+        # The critical alert is always sent on its own
+        assert digested == USERS * (ALERTS - 1)
+        assert stats["digests"] == USERS * -(-(ALERTS - 1) // config.REMINDER_DIGEST_MAX_ALERTS)
+        assert strategy.messages == USERS + stats["digests"]
+    else:
+        assert digested == 0
+        assert strategy.messages == USERS * ALERTS
@@ -0,0 +1,46 @@
+import asyncio
+import multiprocessing
+
+from sqlalchemy import func
+
+from app.models.notification import NotificationDelivery, UserAlertPreference
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+
+PROCESSES = 3
+SHARDS = 8
+
+def run_worker(index: int, results):
+    # Imported here so the spawned process picks up the DATABASE_URL the test set
+    from app.services.delivery_log import delivery_log_writer
+    from app.services.reminder_shards import ReminderShardLeases, run_reminder_cycle
+    
+    totals = asyncio.run(run_reminder_cycle(owner=f"test-{index}", leases=ReminderShardLeases(shard_count=SHARDS)))
+    delivery_log_writer.flush()
+    results.put((index, totals))
+
+def test_one_cycle_across_processes_reminds_everyone_once(db, seed_users, tmp_path, monkeypatch):
+    # The spawned processes inherit the environment, so they share the test's database
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    seed_users(300)
+    for number in range(2):
+        asyncio.run(AlertService(db, AlertSubject()).create_alert(
+            {"title": f"Test {number}", "message": "Sharded reminders"}, created_by=1
+        ))
+    due = db.query(UserAlertPreference).count()
+    
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [context.Process(target=run_worker, args=(index, results)) for index in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    per_worker = dict(results.get(timeout=120) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=30)
+    
+    assert sum(totals["shards"] for totals in per_worker.values()) == SHARDS
+    per_recipient = db.query(
+        NotificationDelivery.user_id, NotificationDelivery.alert_id, func.count(NotificationDelivery.id)
+    ).group_by(NotificationDelivery.user_id, NotificationDelivery.alert_id).all()
+    assert len(per_recipient) == due == 600
+    assert all(count == 1 for _, _, count in per_recipient)
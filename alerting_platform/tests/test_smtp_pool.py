@@ -0,0 +1,88 @@
+import asyncio
+from collections import Counter
+from email.message import EmailMessage
+
+import pytest
+
+from app.core.smtp_pool import SMTPConnectionPool
+from app.models.notification import NotificationDelivery
+from app.patterns.notification_strategy import EmailNotificationStrategy
+from app.patterns.observer import AlertSubject
+from app.services.alert_service import AlertService
+from app.services.delivery_log import DeliveryLogWriter
+from app.services.notification_service import NotificationService
+from smtp_stub import PASSWORD, USERNAME, StubSMTPServer
+
+USERS = 60
+REJECT_EVERY = 7
+
+def make_pool(port: int, **options) -> SMTPConnectionPool:
+    return SMTPConnectionPool(
+        hostname="127.0.0.1", port=port, username=USERNAME, password=PASSWORD,
+        use_tls=False, start_tls=False, **options
+    )
+
+@pytest.mark.parametrize("messages_per_connection, batch_size", [(1, 1), (100, 1), (100, 10)])
+def test_fan_out_delivers_every_accepted_recipient_once(db, session_factory, seed_users, messages_per_connection, batch_size):
+    start_id = seed_users(USERS)
+    alert = asyncio.run(AlertService(db, AlertSubject()).create_alert(
+        {"title": "Test", "message": "Pooled email", "delivery_type": "email"}, created_by=1
+    ))
+    server = StubSMTPServer(rtt=0, reject_every=REJECT_EVERY)
+    addresses = {f"user{user_id}@example.com" for user_id in range(start_id, start_id + USERS)}
+    accepted = {address for address in addresses if not server.refuses(address)}
+    
+    async def fan_out():
+        port = await server.start()
+        pool = make_pool(port, max_size=4, max_messages=messages_per_connection)
+        strategy = EmailNotificationStrategy(pool=pool, sender="alerts@example.com")
+        strategy.max_batch_size = batch_size
+        delivery_log = DeliveryLogWriter(session_factory)
+        notification_service = NotificationService(db, delivery_log)
+        notification_service.notification_context.add_strategy("email", strategy, concurrency_limit=4)
+        try:
+            await notification_service.process_new_alert(alert)
+        finally:
+            await pool.close()
+            await server.stop()
+        delivery_log.flush()
+    
+    asyncio.run(fan_out())
+    
+    assert server.delivered == Counter(accepted)
+    assert server.logins == server.connections
+    if messages_per_connection > 1:
+        assert server.connections <= 4
+    statuses = Counter(status.value for (status,) in db.query(NotificationDelivery.status).filter(
+        NotificationDelivery.alert_id == alert.id
+    ))
+    assert statuses == {"sent": len(accepted), "failed": len(addresses) - len(accepted)}
+
+def test_cancelled_send_does_not_hand_its_connection_on():
+    rtt = 0.05
+    server = StubSMTPServer(rtt=rtt, reject_every=0)
+    message = EmailMessage()
+    message["Subject"] = "Test"
+    message.set_content("Cancelled send")
+    
+    async def sends():
+        port = await server.start()
+        pool = make_pool(port, max_size=1)
+        try:
+            await pool.send_message(message, sender="alerts@example.com", recipients=["user1@example.com"])
+            # Logged in already - cancelled while MAIL/RCPT/DATA are in flight
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    pool.send_message(message, sender="alerts@example.com", recipients=["user2@example.com"]), rtt * 1.5
+                )
+            server.reset_counts()
+            await pool.send_message(message, sender="alerts@example.com", recipients=["user3@example.com"])
+        finally:
+            await pool.close()
+            await server.stop()
+        return pool
+    
+    pool = asyncio.run(sends())
+    
+    assert pool.connections_opened == 2
+    assert list(server.delivered) == ["user3@example.com"]